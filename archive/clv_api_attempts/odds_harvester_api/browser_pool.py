@@ -0,0 +1,308 @@
+"""
+Browser Pool for OddsHarvester Scrapes
+======================================
+
+Keeps started headless browsers (OddsHarvester scrapers) alive between
+scrapes so sequential scrapes skip the browser cold start:
+- Pool size follows available memory (capped by the scrape worker count)
+- Browsers are leased per scrape and health-checked on lease and release
+- Browsers are recycled after N pages, on RSS growth, on errors, or when idle
+
+Browser startup/shutdown is delegated to factory callables so this module
+does not import OddsHarvester itself.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Optional
+
+import tracing
+
+try:
+    import psutil
+except ImportError:  # Optional: sizing and RSS checks degrade gracefully
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+
+def get_browser_rss_mb() -> Optional[float]:
+    """Get total RSS of this process' child processes (the browsers) in MB."""
+    if psutil is None:
+        return None
+    try:
+        children = psutil.Process().children(recursive=True)
+        total = 0
+        for child in children:
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                continue
+        return round(total / (1024 * 1024), 1)
+    except psutil.Error:
+        return None
+
+
+class PooledBrowser:
+    """A started scraper plus the bookkeeping needed to decide when to recycle it."""
+
+    def __init__(self, scraper: Any):
+        self.scraper = scraper
+        self.created_at = time.time()
+        self.last_used = time.time()
+        self.leases = 0
+        self.pages = 0
+        self.broken = False
+
+    def record_pages(self, count: int):
+        """Record pages loaded during the current lease."""
+        self.pages += max(0, count)
+
+    def is_connected(self) -> bool:
+        """Best-effort liveness check of the underlying Playwright browser."""
+        manager = getattr(self.scraper, "playwright_manager", None)
+        browser = getattr(manager, "browser", None)
+        if browser is None or not hasattr(browser, "is_connected"):
+            return True
+        try:
+            return bool(browser.is_connected())
+        except Exception:
+            return False
+
+
+class BrowserPool:
+    """Lease-based pool of long-lived headless browsers."""
+
+    def __init__(
+        self,
+        create: Callable[[], Awaitable[Any]],
+        close: Callable[[Any], Awaitable[None]],
+        max_size: int = 3,
+        memory_per_browser_mb: int = 1024,
+        max_pages: int = 200,
+        max_rss_mb: int = 1536,
+        idle_timeout: int = 900,
+    ):
+        self._create = create
+        self._close = close
+        self.max_size = max(1, max_size)
+        self.memory_per_browser_mb = memory_per_browser_mb
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.idle_timeout = idle_timeout
+
+        self._idle: deque[PooledBrowser] = deque()
+        self._live = 0
+        self._cond = asyncio.Condition()
+        self._closed = False
+        self._maintenance_task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.leases = 0
+        self.reuses = 0
+        self.cold_starts = 0
+        self.recycled: dict[str, int] = {}
+        self._lease_waits: deque = deque(maxlen=500)
+
+    @property
+    def live(self) -> int:
+        """Browsers currently started (idle or leased)."""
+        return self._live
+
+    # === Sizing ===
+
+    def get_target_size(self) -> int:
+        """Pool size allowed by available memory, capped by max_size."""
+        if psutil is None:
+            return self.max_size
+        try:
+            available_mb = psutil.virtual_memory().available / (1024 * 1024)
+        except Exception:
+            return self.max_size
+        # Browsers already running are counted as available to themselves
+        budget = available_mb + self._live * self.memory_per_browser_mb
+        return max(1, min(self.max_size, int(budget // self.memory_per_browser_mb)))
+
+    # === Leasing ===
+
+    @asynccontextmanager
+    async def lease(self):
+        """
+        Lease a started browser for one scrape.
+
+        Any exception inside the block marks the browser broken so it is
+        closed instead of returned to the pool.
+        """
+        wait_start = time.perf_counter()
+        with tracing.span("browser.acquire"):
+            entry = await self._acquire()
+        self._lease_waits.append((time.perf_counter() - wait_start) * 1000)
+
+        try:
+            yield entry
+        except BaseException:
+            entry.broken = True
+            raise
+        finally:
+            await self._release(entry)
+
+    async def _acquire(self) -> PooledBrowser:
+        retired: list[PooledBrowser] = []
+        try:
+            async with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Browser pool is closed")
+
+                    while self._idle:
+                        entry = self._idle.popleft()
+                        reason = self._recycle_reason(entry)
+                        if reason is None:
+                            entry.leases += 1
+                            self.leases += 1
+                            self.reuses += 1
+                            return entry
+                        retired.append(self._retire(entry, reason))
+
+                    if self._live < self.get_target_size():
+                        # Reserve the slot before starting the browser
+                        self._live += 1
+                        break
+
+                    await self._cond.wait()
+        finally:
+            await self._close_all(retired)
+
+        try:
+            with tracing.span("browser.start"):
+                scraper = await self._create()
+        except BaseException:
+            async with self._cond:
+                self._live -= 1
+                self._cond.notify()
+            raise
+
+        self.cold_starts += 1
+        self.leases += 1
+        entry = PooledBrowser(scraper)
+        entry.leases = 1
+        logger.info(f"🌐 Browser started ({self._live} live)")
+        return entry
+
+    async def _release(self, entry: PooledBrowser):
+        entry.last_used = time.time()
+        async with self._cond:
+            reason = "error" if entry.broken else self._recycle_reason(entry)
+            if self._closed:
+                reason = "shutdown"
+            if reason is None and self._live > self.get_target_size():
+                reason = "memory"
+
+            if reason is None:
+                self._idle.append(entry)
+            else:
+                self._retire(entry, reason)
+            self._cond.notify()
+
+        if reason is not None:
+            await self._close_all([entry])
+
+    def _recycle_reason(self, entry: PooledBrowser) -> Optional[str]:
+        """Return why an entry must be recycled, or None if it is healthy."""
+        if entry.pages >= self.max_pages:
+            return "pages"
+        if not entry.is_connected():
+            return "disconnected"
+        rss_mb = get_browser_rss_mb()
+        if rss_mb is not None and self._live and rss_mb / self._live > self.max_rss_mb:
+            return "rss"
+        return None
+
+    def _retire(self, entry: PooledBrowser, reason: str) -> PooledBrowser:
+        """Free an entry's slot. Caller holds the lock and closes it afterwards."""
+        self._live -= 1
+        self.recycled[reason] = self.recycled.get(reason, 0) + 1
+        logger.info(
+            f"♻️ Recycling browser ({reason}) after {entry.leases} leases / {entry.pages} pages"
+        )
+        return entry
+
+    async def _close_all(self, entries: list[PooledBrowser]):
+        """Stop retired browsers outside the pool lock."""
+        for entry in entries:
+            try:
+                await self._close(entry.scraper)
+            except Exception as e:
+                logger.warning(f"⚠️ Browser close failed: {e}")
+
+    # === Lifecycle ===
+
+    def start(self):
+        """Start the background health/idle maintenance loop."""
+        if self._maintenance_task is None:
+            self._maintenance_task = asyncio.create_task(self._maintenance_loop())
+
+    async def _maintenance_loop(self):
+        while not self._closed:
+            await asyncio.sleep(60)
+            try:
+                await self.check_idle()
+            except Exception as e:
+                logger.warning(f"⚠️ Browser pool maintenance error: {e}")
+
+    async def check_idle(self):
+        """Health-check idle browsers and close ones idle past idle_timeout."""
+        retired: list[PooledBrowser] = []
+        async with self._cond:
+            keep = deque()
+            now = time.time()
+            while self._idle:
+                entry = self._idle.popleft()
+                reason = self._recycle_reason(entry)
+                if reason is None and now - entry.last_used > self.idle_timeout:
+                    reason = "idle"
+                if reason is None:
+                    keep.append(entry)
+                else:
+                    retired.append(self._retire(entry, reason))
+            self._idle = keep
+            self._cond.notify_all()
+        await self._close_all(retired)
+
+    async def close(self):
+        """Close all idle browsers; leased ones are closed on release."""
+        async with self._cond:
+            self._closed = True
+            retired = [self._retire(entry, "shutdown") for entry in self._idle]
+            self._idle.clear()
+            self._cond.notify_all()
+        await self._close_all(retired)
+        if self._maintenance_task:
+            self._maintenance_task.cancel()
+
+    # === Metrics ===
+
+    def get_stats(self) -> dict:
+        """
+        Pool counters plus memory readings (psutil, so not for the request
+        path). Only copies shared state, so health refreshes may call it
+        from a worker thread.
+        """
+        waits = sorted(self._lease_waits.copy())
+        return {
+            "live": self._live,
+            "idle": len(self._idle),
+            "target_size": self.get_target_size(),
+            "leases": self.leases,
+            "reuses": self.reuses,
+            "cold_starts": self.cold_starts,
+            "recycled": dict(self.recycled),
+            "lease_wait_ms": {
+                "median": round(waits[len(waits) // 2], 1),
+                "p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 1),
+            } if waits else None,
+            "browser_rss_mb": get_browser_rss_mb(),
+        }
@@ -0,0 +1,436 @@
+"""
+Concurrency Primitives for the CLV Job Processor
+================================================
+
+Provides asyncio building blocks used by JobProcessor:
+- AdaptiveSemaphore: scrape slot limiter whose size can change at runtime
+- FairShareSemaphore: AdaptiveSemaphore granting slots by weighted fair
+  share across jobs, with aging so low-weight jobs still progress
+- AimdController: picks the scrape slot limit from observed scrape latency,
+  timeouts, browser RSS and host memory pressure
+- SingleFlight: coalesces concurrent calls for the same key onto one task
+
+All primitives are single event loop only (no thread safety).
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+try:
+    import psutil
+except ImportError:  # Optional: memory pressure signals are skipped without it
+    psutil = None
+
+
+class AdaptiveSemaphore:
+    """asyncio semaphore whose limit can be raised or lowered while in use."""
+
+    def __init__(self, limit: int):
+        self._limit = max(1, limit)
+        self._in_use = 0
+        self._waiters: deque = deque()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for fut in self._waiters if not fut.done())
+
+    def set_limit(self, limit: int):
+        """
+        Change the number of slots.
+
+        Lowering the limit never interrupts holders; it only delays new
+        grants until enough slots have been released.
+        """
+        self._limit = max(1, limit)
+        self._wake()
+
+    async def acquire(self):
+        """Wait for a free slot."""
+        if self._in_use < self._limit and not self._waiters:
+            self._in_use += 1
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Slot was granted just before cancellation - hand it back
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(fut)
+                except ValueError:
+                    pass
+            raise
+
+    def release(self):
+        """Release a slot and grant it to the next waiter."""
+        self._in_use -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self._in_use < self._limit:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                self._in_use += 1
+                fut.set_result(None)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class FairShareSemaphore(AdaptiveSemaphore):
+    """
+    AdaptiveSemaphore that grants free slots by weighted fair share.
+
+    Each flow (a job) accumulates virtual time 1/weight per slot granted;
+    the waiter whose flow has received the least weighted service goes
+    next. Waiting earns credit of one grant per `aging_seconds`, so a
+    low-weight flow is never starved by a stream of heavier ones.
+    """
+
+    def __init__(self, limit: int, weights: dict[str, float], aging_seconds: float = 30.0):
+        super().__init__(limit)
+        self.weights = weights
+        self.aging_seconds = aging_seconds
+        self._vtime: dict[Hashable, float] = {}
+        self._holders: dict[Hashable, int] = {}
+        self._clock = 0.0
+
+        # Metrics per class
+        self.contended_grants = 0  # Grants that had to wait for a slot
+        self.granted: dict[str, int] = {cls: 0 for cls in weights}
+        self._waits: dict[str, deque] = {cls: deque(maxlen=500) for cls in weights}
+
+    async def acquire(self, flow: Hashable = None, cls: str = None):
+        """Wait for a free slot on behalf of `flow` in priority class `cls`."""
+        cls = cls if cls in self.weights else next(iter(self.weights))
+        if flow not in self._vtime:
+            # New flows start at the current clock - no credit for being idle
+            self._vtime[flow] = self._clock
+
+        enqueued = time.monotonic()
+        if self._in_use < self._limit and not self._waiters:
+            self._grant(flow, cls, enqueued)
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        fut.flow, fut.cls, fut.enqueued = flow, cls, enqueued
+        self._waiters.append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Slot was granted just before cancellation - hand it back
+                self.release(flow)
+            else:
+                try:
+                    self._waiters.remove(fut)
+                except ValueError:
+                    pass
+                self._forget(flow)
+            raise
+
+    def release(self, flow: Hashable = None):
+        """Release a slot held by `flow` and grant it to the next waiter."""
+        self._in_use -= 1
+        self._holders[flow] = self._holders.get(flow, 1) - 1
+        self._forget(flow)
+        self._wake()
+
+    def _grant(self, flow: Hashable, cls: str, enqueued: float):
+        self._in_use += 1
+        self._holders[flow] = self._holders.get(flow, 0) + 1
+        self._vtime[flow] += 1.0 / self.weights[cls]
+        self.granted[cls] += 1
+        self._waits[cls].append((time.monotonic() - enqueued) * 1000)
+
+    def _forget(self, flow: Hashable):
+        """Drop bookkeeping of flows that neither hold nor wait for a slot."""
+        if self._holders.get(flow, 0) > 0:
+            return
+        if any(fut.flow == flow for fut in self._waiters if not fut.done()):
+            return
+        self._holders.pop(flow, None)
+        self._vtime.pop(flow, None)
+
+    def _wake(self):
+        self._waiters = deque(fut for fut in self._waiters if not fut.done())
+        if not self._waiters:
+            return
+        now = time.monotonic()
+        while self._waiters and self._in_use < self._limit:
+            fut = min(
+                self._waiters,
+                key=lambda f: self._vtime[f.flow] - (now - f.enqueued) / self.aging_seconds,
+            )
+            self._waiters.remove(fut)
+            self._clock = max(self._clock, self._vtime[fut.flow])
+            self.contended_grants += 1
+            self._grant(fut.flow, fut.cls, fut.enqueued)
+            fut.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, flow: Hashable, cls: str):
+        """Hold a slot for the duration of the block."""
+        await self.acquire(flow, cls)
+        try:
+            yield
+        finally:
+            self.release(flow)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    def get_stats(self) -> dict:
+        waiting: dict[str, int] = {cls: 0 for cls in self.weights}
+        for fut in self._waiters:
+            if not fut.done():
+                waiting[fut.cls] += 1
+        stats = {"limit": self._limit, "in_use": self._in_use, "classes": {}}
+        for cls, weight in self.weights.items():
+            waits = sorted(self._waits[cls])
+            stats["classes"][cls] = {
+                "weight": weight,
+                "waiting": waiting[cls],
+                "granted": self.granted[cls],
+                "slot_wait_ms": {
+                    "median": round(waits[len(waits) // 2], 1),
+                    "p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 1),
+                } if waits else None,
+            }
+        return stats
+
+
+class AimdController:
+    """
+    Additive-increase / multiplicative-decrease controller for scrape concurrency.
+
+    Scrape outcomes are recorded as they finish; update() is called once per
+    window and moves the limit:
+    - halve it on memory pressure, high browser RSS, timeouts, or scrape
+      latency well above the learned healthy baseline
+    - add one slot when the window was saturated (scrapes waited for slots)
+      and the host has memory for another browser
+    - otherwise hold
+    After a decrease the limit is not raised again for one window.
+    """
+
+    def __init__(
+        self,
+        min_limit: int = 1,
+        max_limit: int = 3,
+        initial: Optional[int] = None,
+        memory_per_worker_mb: int = 1024,
+        max_rss_mb: int = 1536,
+        min_free_mb: int = 512,
+        max_swap_growth_mb: int = 64,
+        timeout_rate_limit: float = 0.2,
+        latency_tolerance: float = 2.0,
+        decrease_factor: float = 0.5,
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(self.max_limit, max(self.min_limit, initial or self.max_limit))
+        self.memory_per_worker_mb = memory_per_worker_mb
+        self.max_rss_mb = max_rss_mb
+        self.min_free_mb = min_free_mb
+        self.max_swap_growth_mb = max_swap_growth_mb
+        self.timeout_rate_limit = timeout_rate_limit
+        self.latency_tolerance = latency_tolerance
+        self.decrease_factor = decrease_factor
+
+        # Current window
+        self._latencies: list[float] = []
+        self._timeouts = 0
+        self._errors = 0
+
+        self.baseline_latency: Optional[float] = None
+        self._last_swap_mb: Optional[float] = None
+        self._cooldown = False
+        self.decisions: deque = deque(maxlen=50)
+
+    def record(self, latency: float, outcome: str):
+        """Record one finished scrape ("success", "empty", "error" or "timeout")."""
+        self._latencies.append(latency)
+        if outcome == "timeout":
+            self._timeouts += 1
+        elif outcome == "error":
+            self._errors += 1
+
+    def _host_memory(self) -> tuple[Optional[float], Optional[float]]:
+        """Available host memory and used swap, in MB (None without psutil)."""
+        if psutil is None:
+            return None, None
+        try:
+            available = psutil.virtual_memory().available / (1024 * 1024)
+            swap = psutil.swap_memory().used / (1024 * 1024)
+            return available, swap
+        except Exception:
+            return None, None
+
+    def update(self, saturated: bool, browser_rss_mb: Optional[float] = None, browsers: int = 0) -> dict:
+        """
+        Close the current window and decide the new limit.
+
+        `saturated` is whether scrapes waited for a slot during the window.
+        Returns the decision record (also kept in `decisions`).
+        """
+        samples = len(self._latencies)
+        latencies = sorted(self._latencies)
+        median = latencies[samples // 2] if samples else None
+        timeout_rate = self._timeouts / samples if samples else 0.0
+        available_mb, swap_mb = self._host_memory()
+        swap_growth = (
+            swap_mb - self._last_swap_mb
+            if swap_mb is not None and self._last_swap_mb is not None else 0.0
+        )
+        self._last_swap_mb = swap_mb
+        rss_per_browser = browser_rss_mb / browsers if browser_rss_mb and browsers else None
+
+        reason = None
+        if available_mb is not None and available_mb < self.min_free_mb:
+            reason = "memory"
+        elif swap_growth > self.max_swap_growth_mb:
+            reason = "swap"
+        elif rss_per_browser is not None and rss_per_browser > self.max_rss_mb:
+            reason = "browser_rss"
+        elif samples >= 3 and timeout_rate > self.timeout_rate_limit:
+            reason = "timeouts"
+        elif (
+            median is not None and self.baseline_latency
+            and median > self.baseline_latency * self.latency_tolerance
+        ):
+            reason = "latency"
+
+        old = self.limit
+        if reason:
+            action = "decrease"
+            self.limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+            self._cooldown = True
+        elif self._cooldown:
+            action, reason = "hold", "cooldown"
+            self._cooldown = False
+        elif saturated and self.limit < self.max_limit and (
+            available_mb is None or available_mb - self.min_free_mb > self.memory_per_worker_mb
+        ):
+            action, reason = "increase", "headroom"
+            self.limit = min(self.max_limit, self.limit + 1)
+        else:
+            action, reason = "hold", "steady"
+
+        # Learn the healthy latency from windows that did not back off
+        if median is not None and action != "decrease":
+            self.baseline_latency = (
+                median if self.baseline_latency is None
+                else 0.8 * self.baseline_latency + 0.2 * median
+            )
+
+        decision = {
+            "at": time.time(),
+            "action": action,
+            "reason": reason,
+            "limit": self.limit,
+            "previous": old,
+            "samples": samples,
+            "median_latency_s": round(median, 2) if median is not None else None,
+            "timeout_rate": round(timeout_rate, 2),
+            "errors": self._errors,
+            "available_mb": round(available_mb) if available_mb is not None else None,
+            "swap_growth_mb": round(swap_growth, 1),
+            "rss_per_browser_mb": round(rss_per_browser, 1) if rss_per_browser else None,
+        }
+        self.decisions.append(decision)
+        self._latencies = []
+        self._timeouts = 0
+        self._errors = 0
+        return decision
+
+    def get_stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "baseline_latency_s": (
+                round(self.baseline_latency, 2) if self.baseline_latency is not None else None
+            ),
+            "psutil": psutil is not None,
+            "last_decisions": list(self.decisions)[-5:],
+        }
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key onto one in-flight task.
+
+    The first caller for a key starts the work as its own task; later
+    callers await that task instead of starting another. The task is
+    shielded so a cancelled caller never cancels the shared work.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def is_in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run factory() for key, or join the run already in flight."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            self.started += 1
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def cancel_all(self):
+        """Cancel every in-flight task and wait for them to unwind.
+
+        Cancelling callers leaves shielded tasks running, so owners call
+        this on shutdown before closing resources the tasks still use.
+        """
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved even if every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> dict:
+        return {
+            "started": self.started,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight,
+        }
@@ -0,0 +1,13 @@
+"""Shared pytest fixtures for the odds_harvester_api tests."""
+
+import pytest
+
+import league_mapper
+
+
+@pytest.fixture(autouse=True)
+def unmapped_log(tmp_path, monkeypatch):
+    """Log unmapped leagues to a temp file instead of the tracked unmapped_leagues.json."""
+    path = tmp_path / "unmapped_leagues.json"
+    monkeypatch.setattr(league_mapper, "UNMAPPED_LOG_PATH", path)
+    return path
@@ -12,25 +12,26 @@ Uses WAL mode for better concurrency and includes auto-cleanup.
 """
 
 import gzip
+import hashlib
 import json
 import os
 import sqlite3
 import threading
+import time
 from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 
+import metrics
 
-class Database:
-    """SQLite database wrapper with connection pooling and WAL mode."""
+
+class SQLiteStore:
+    """Thread-local SQLite connections in WAL mode with timed cursors."""
 
     def __init__(self, db_path: str):
         self.db_path = db_path
         self._local = threading.local()
-        self._init_schema()
-        self._run_migrations()
-        self._create_indices()
 
     def _get_connection(self) -> sqlite3.Connection:
         """Get thread-local database connection."""
@@ -48,8 +49,9 @@ class Database:
         return self._local.connection
 
     @contextmanager
-    def _cursor(self):
-        """Get a cursor with automatic commit/rollback."""
+    def _cursor(self, operation: str):
+        """Get a cursor with automatic commit/rollback, timed as operation (the calling method)."""
+        start = time.perf_counter()
         conn = self._get_connection()
         cursor = conn.cursor()
         try:
@@ -58,10 +60,39 @@ class Database:
         except Exception:
             conn.rollback()
             raise
+        finally:
+            metrics.DB_OPERATION.observe(time.perf_counter() - start, operation)
+
+    def _read_only_connection(self) -> sqlite3.Connection:
+        """Open a separate read-only connection (caller closes it)."""
+        conn = sqlite3.connect(
+            Path(self.db_path).resolve().as_uri() + "?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            timeout=30.0,
+        )
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def close(self):
+        """Close database connection."""
+        if hasattr(self._local, "connection"):
+            self._local.connection.close()
+            del self._local.connection
+
+
+class Database(SQLiteStore):
+    """SQLite database wrapper with connection pooling and WAL mode."""
+
+    def __init__(self, db_path: str):
+        super().__init__(db_path)
+        self._init_schema()
+        self._run_migrations()
+        self._create_indices()
 
     def _init_schema(self):
         """Initialize database schema."""
-        with self._cursor() as cursor:
+        with self._cursor("_init_schema") as cursor:
             # Jobs table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS jobs (
@@ -72,7 +103,8 @@ class Database:
                     total_bets INTEGER NOT NULL,
                     processed_bets INTEGER NOT NULL DEFAULT 0,
                     error_log TEXT,
-                    scraper_version TEXT
+                    scraper_version TEXT,
+                    priority TEXT NOT NULL DEFAULT 'routine'
                 )
             """)
 
@@ -94,6 +126,7 @@ class Database:
                     confidence REAL,
                     fallback_type TEXT,
                     match_score REAL,
+                    processed_at TEXT,
                     FOREIGN KEY (job_id) REFERENCES jobs(id)
                 )
             """)
@@ -129,6 +162,57 @@ class Database:
                 )
             """)
 
+            # Season cache: one row per scraped (sport, league, season) with
+            # the span of match dates and the markets (JSON list) it covers
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS season_cache (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sport TEXT NOT NULL,
+                    league TEXT NOT NULL,
+                    season TEXT NOT NULL,
+                    last_scraped INTEGER NOT NULL,
+                    covered_from TEXT,
+                    covered_to TEXT,
+                    day_count INTEGER NOT NULL DEFAULT 0,
+                    markets TEXT,
+                    UNIQUE(sport, league, season)
+                )
+            """)
+
+            # Season matches indexed by match date (one compressed row per day,
+            # an empty list for a day known to have no matches) and the
+            # markets (JSON list) the day was scraped for
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS season_matches (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sport TEXT NOT NULL,
+                    league TEXT NOT NULL,
+                    season TEXT NOT NULL,
+                    match_date TEXT NOT NULL,
+                    matches BLOB NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    updated_at INTEGER NOT NULL,
+                    markets TEXT,
+                    UNIQUE(sport, league, season, match_date)
+                )
+            """)
+
+            # Results page index of a season: the match dates each page spans
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS season_pages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sport TEXT NOT NULL,
+                    league TEXT NOT NULL,
+                    season TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    page_count INTEGER NOT NULL,
+                    oldest_date TEXT NOT NULL,
+                    newest_date TEXT NOT NULL,
+                    checked_at INTEGER NOT NULL,
+                    UNIQUE(sport, league, season, page)
+                )
+            """)
+
             # Metadata table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS metadata (
@@ -137,6 +221,50 @@ class Database:
                 )
             """)
 
+            # Per-group progress and timing within a job
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS job_groups (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id TEXT NOT NULL,
+                    sport TEXT NOT NULL,
+                    league TEXT NOT NULL,
+                    event_date TEXT NOT NULL,
+                    bet_count INTEGER NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    cache_hit INTEGER,
+                    started_at TEXT,
+                    completed_at TEXT,
+                    wait_ms REAL,
+                    scrape_ms REAL,
+                    elapsed_ms REAL,
+                    bet_ids TEXT,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    UNIQUE(job_id, sport, league, event_date),
+                    FOREIGN KEY (job_id) REFERENCES jobs(id)
+                )
+            """)
+
+            # Kickoff-anchored scrapes of registered upcoming (sport, league, date) windows
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS prefetch_schedule (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sport TEXT NOT NULL,
+                    league TEXT NOT NULL,
+                    event_date TEXT NOT NULL,
+                    due_at REAL NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    registrations INTEGER NOT NULL DEFAULT 0,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    matches INTEGER,
+                    last_error TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    UNIQUE(sport, league, event_date)
+                )
+            """)
+
             # Failure log for diagnostics
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS failure_log (
@@ -151,7 +279,7 @@ class Database:
 
     def _create_indices(self):
         """Create database indices for performance."""
-        with self._cursor() as cursor:
+        with self._cursor("_create_indices") as cursor:
             # Create indices for performance (with error handling for schema mismatches)
             try:
                 cursor.execute(
@@ -180,6 +308,34 @@ class Database:
                 )
             except sqlite3.OperationalError:
                 pass
+
+            try:
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_jobs_completed_at ON jobs(status, completed_at)"
+                )
+            except sqlite3.OperationalError:
+                pass
+
+            try:
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_failure_log_job_id ON failure_log(job_id)"
+                )
+            except sqlite3.OperationalError:
+                pass
+
+            try:
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_job_groups_job_id ON job_groups(job_id)"
+                )
+            except sqlite3.OperationalError:
+                pass
+
+            try:
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_job_groups_status ON job_groups(status)"
+                )
+            except sqlite3.OperationalError:
+                pass
             
             try:
                 cursor.execute(
@@ -188,6 +344,20 @@ class Database:
             except sqlite3.OperationalError:
                 pass
 
+            try:
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_prefetch_due ON prefetch_schedule(status, due_at)"
+                )
+            except sqlite3.OperationalError:
+                pass
+
+            try:
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_bet_requests_event_date ON bet_requests(event_date, sport)"
+                )
+            except sqlite3.OperationalError:
+                pass
+
     def _run_migrations(self):
         """Run database migrations for schema updates."""
         conn = self._get_connection()
@@ -217,45 +387,163 @@ class Database:
                     print("✅ Migration 1→2: Added tournament column to bet_requests")
                 
                 self.set_metadata("schema_version", 2)
+                schema_version = 2
             except Exception as e:
                 print(f"⚠️  Migration 1→2 failed: {e}")
                 conn.rollback()
 
-    def close(self):
-        """Close database connection."""
-        if hasattr(self._local, "connection"):
-            self._local.connection.close()
-            del self._local.connection
+        # Migration 2 -> 3: Add priority class column to jobs
+        if schema_version < 3:
+            try:
+                cursor.execute("PRAGMA table_info(jobs)")
+                columns = [row[1] for row in cursor.fetchall()]
+
+                if "priority" not in columns:
+                    cursor.execute(
+                        "ALTER TABLE jobs ADD COLUMN priority TEXT NOT NULL DEFAULT 'routine'"
+                    )
+                    conn.commit()
+                    print("✅ Migration 2→3: Added priority column to jobs")
+
+                self.set_metadata("schema_version", 3)
+                schema_version = 3
+            except Exception as e:
+                print(f"⚠️  Migration 2→3 failed: {e}")
+                conn.rollback()
+
+        # Migration 3 -> 4: Add per-bet checkpoint column to bet_requests
+        if schema_version < 4:
+            try:
+                cursor.execute("PRAGMA table_info(bet_requests)")
+                columns = [row[1] for row in cursor.fetchall()]
+
+                if "processed_at" not in columns:
+                    cursor.execute("ALTER TABLE bet_requests ADD COLUMN processed_at TEXT")
+                    conn.commit()
+                    print("✅ Migration 3→4: Added processed_at column to bet_requests")
+
+                self.set_metadata("schema_version", 4)
+                schema_version = 4
+            except Exception as e:
+                print(f"⚠️  Migration 3→4 failed: {e}")
+                conn.rollback()
+
+        # Migration 4 -> 5: Add task lease columns to job_groups (worker mode)
+        if schema_version < 5:
+            try:
+                cursor.execute("PRAGMA table_info(job_groups)")
+                columns = [row[1] for row in cursor.fetchall()]
+
+                added = []
+                for column, definition in (
+                    ("bet_ids", "TEXT"),
+                    ("lease_owner", "TEXT"),
+                    ("lease_expires", "REAL"),
+                    ("attempts", "INTEGER NOT NULL DEFAULT 0"),
+                ):
+                    if column not in columns:
+                        cursor.execute(f"ALTER TABLE job_groups ADD COLUMN {column} {definition}")
+                        added.append(column)
+                if added:
+                    conn.commit()
+                    print("✅ Migration 4→5: Added task lease columns to job_groups")
+
+                self.set_metadata("schema_version", 5)
+                schema_version = 5
+            except Exception as e:
+                print(f"⚠️  Migration 4→5 failed: {e}")
+                conn.rollback()
+
+        # Migration 5 -> 6: Record the markets a season scrape covered
+        if schema_version < 6:
+            try:
+                cursor.execute("PRAGMA table_info(season_cache)")
+                columns = [row[1] for row in cursor.fetchall()]
+
+                if "markets" not in columns:
+                    cursor.execute("ALTER TABLE season_cache ADD COLUMN markets TEXT")
+                    conn.commit()
+                    print("✅ Migration 5→6: Added markets column to season_cache")
+
+                self.set_metadata("schema_version", 6)
+                schema_version = 6
+            except Exception as e:
+                print(f"⚠️  Migration 5→6 failed: {e}")
+                conn.rollback()
+
+        # Migration 6 -> 7: Record the markets of each season day
+        if schema_version < 7:
+            try:
+                cursor.execute("PRAGMA table_info(season_matches)")
+                columns = [row[1] for row in cursor.fetchall()]
+
+                if "markets" not in columns:
+                    cursor.execute("ALTER TABLE season_matches ADD COLUMN markets TEXT")
+                    # Days so far were scraped for their season's markets
+                    cursor.execute("""
+                        UPDATE season_matches SET markets = (
+                            SELECT markets FROM season_cache
+                            WHERE season_cache.sport = season_matches.sport
+                              AND season_cache.league = season_matches.league
+                              AND season_cache.season = season_matches.season
+                        )
+                    """)
+                    conn.commit()
+                    print("✅ Migration 6→7: Added markets column to season_matches")
+
+                self.set_metadata("schema_version", 7)
+            except Exception as e:
+                print(f"⚠️  Migration 6→7 failed: {e}")
+                conn.rollback()
 
     # === Job Operations ===
 
-    def create_job(self, job_id: str, total_bets: int):
+    def create_job(self, job_id: str, total_bets: int, priority: str = "routine"):
         """Create a new job record."""
-        with self._cursor() as cursor:
+        with self._cursor("create_job") as cursor:
             cursor.execute(
                 """
-                INSERT INTO jobs (id, created_at, status, total_bets, scraper_version)
-                VALUES (?, ?, 'queued', ?, ?)
+                INSERT INTO jobs (id, created_at, status, total_bets, scraper_version, priority)
+                VALUES (?, ?, 'queued', ?, ?, ?)
             """,
-                (job_id, datetime.now().isoformat(), total_bets, self.get_metadata("scraper_version")),
+                (
+                    job_id,
+                    datetime.now().isoformat(),
+                    total_bets,
+                    self.get_metadata("scraper_version"),
+                    priority,
+                ),
             )
 
     def get_job(self, job_id: str) -> Optional[dict]:
         """Get job by ID."""
-        with self._cursor() as cursor:
+        with self._cursor("get_job") as cursor:
             cursor.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
             row = cursor.fetchone()
             return dict(row) if row else None
 
     def get_jobs_by_status(self, status: str) -> list[dict]:
         """Get all jobs with given status."""
-        with self._cursor() as cursor:
+        with self._cursor("get_jobs_by_status") as cursor:
             cursor.execute("SELECT * FROM jobs WHERE status = ?", (status,))
             return [dict(row) for row in cursor.fetchall()]
 
+    def get_queued_jobs(self, priority_order: list[str]) -> list[dict]:
+        """Get queued jobs, highest priority class first, oldest first within a class."""
+        ranks = " ".join(f"WHEN ? THEN {rank}" for rank in range(len(priority_order)))
+        with self._cursor("get_queued_jobs") as cursor:
+            cursor.execute(
+                f"""
+                SELECT * FROM jobs WHERE status = 'queued'
+                ORDER BY CASE priority {ranks} ELSE {len(priority_order)} END, created_at
+            """,
+                priority_order,
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
     def update_job_status(self, job_id: str, status: str, error: str = None):
         """Update job status."""
-        with self._cursor() as cursor:
+        with self._cursor("update_job_status") as cursor:
             if status in ("completed", "failed"):
                 cursor.execute(
                     """
@@ -271,9 +559,64 @@ class Database:
                     (status, job_id),
                 )
 
+    def claim_job(self, job_id: str) -> bool:
+        """Atomically move a job from 'queued' to 'processing'."""
+        with self._cursor("claim_job") as cursor:
+            cursor.execute(
+                "UPDATE jobs SET status = 'processing' WHERE id = ? AND status = 'queued'",
+                (job_id,),
+            )
+            return cursor.rowcount == 1
+
+    def get_archivable_jobs(self, completed_before: str, limit: int) -> list[dict]:
+        """Get finished jobs completed before the given ISO timestamp."""
+        with self._cursor("get_archivable_jobs") as cursor:
+            cursor.execute(
+                """
+                SELECT * FROM jobs
+                WHERE status IN ('completed', 'failed') AND completed_at < ?
+                ORDER BY completed_at
+                LIMIT ?
+            """,
+                (completed_before, limit),
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
+    def delete_jobs(self, job_ids: list[str]):
+        """Delete jobs with their bet requests and failure logs."""
+        if not job_ids:
+            return
+        placeholders = ",".join("?" * len(job_ids))
+        with self._cursor("delete_jobs") as cursor:
+            cursor.execute(
+                f"DELETE FROM bet_requests WHERE job_id IN ({placeholders})", job_ids
+            )
+            cursor.execute(
+                f"DELETE FROM failure_log WHERE job_id IN ({placeholders})", job_ids
+            )
+            cursor.execute(
+                f"DELETE FROM job_groups WHERE job_id IN ({placeholders})", job_ids
+            )
+            cursor.execute(
+                f"DELETE FROM jobs WHERE id IN ({placeholders})", job_ids
+            )
+
+    def requeue_interrupted_jobs(self) -> list[str]:
+        """
+        Move jobs left in 'processing' (e.g. by a crash) back to 'queued'.
+
+        Their finished groups and bets stay checkpointed, so reprocessing
+        resumes where they stopped.
+        """
+        with self._cursor("requeue_interrupted_jobs") as cursor:
+            cursor.execute("SELECT id FROM jobs WHERE status = 'processing'")
+            job_ids = [row["id"] for row in cursor.fetchall()]
+            cursor.execute("UPDATE jobs SET status = 'queued' WHERE status = 'processing'")
+            return job_ids
+
     def update_job_progress(self, job_id: str, processed: int):
         """Update job progress."""
-        with self._cursor() as cursor:
+        with self._cursor("update_job_progress") as cursor:
             cursor.execute(
                 "UPDATE jobs SET processed_bets = ? WHERE id = ?",
                 (processed, job_id),
@@ -294,7 +637,7 @@ class Database:
         bookmaker: str,
     ):
         """Create a bet request record."""
-        with self._cursor() as cursor:
+        with self._cursor("create_bet_request") as cursor:
             cursor.execute(
                 """
                 INSERT INTO bet_requests 
@@ -306,7 +649,7 @@ class Database:
 
     def get_bet_requests(self, job_id: str) -> list[dict]:
         """Get all bet requests for a job."""
-        with self._cursor() as cursor:
+        with self._cursor("get_bet_requests") as cursor:
             cursor.execute(
                 "SELECT * FROM bet_requests WHERE job_id = ?", (job_id,)
             )
@@ -314,12 +657,12 @@ class Database:
 
     def update_bet_result(self, request_id: int, result: dict):
         """Update bet request with CLV result."""
-        with self._cursor() as cursor:
+        with self._cursor("update_bet_result") as cursor:
             cursor.execute(
                 """
                 UPDATE bet_requests 
                 SET result_odds = ?, result_bookmaker = ?, confidence = ?, 
-                    fallback_type = ?, match_score = ?
+                    fallback_type = ?, match_score = ?, processed_at = ?
                 WHERE id = ?
             """,
                 (
@@ -328,13 +671,47 @@ class Database:
                     result.get("confidence"),
                     result.get("fallbackType"),
                     result.get("matchScore"),
+                    datetime.now().isoformat(),
+                    request_id,
+                ),
+            )
+
+    def record_bet_result(self, job_id: str, request_id: int, result: dict) -> bool:
+        """
+        Store a bet's result and count it towards job progress, exactly once.
+
+        Returns False if the bet was already processed (e.g. by a worker
+        whose lease expired), in which case nothing is changed.
+        """
+        with self._cursor("record_bet_result") as cursor:
+            cursor.execute(
+                """
+                UPDATE bet_requests
+                SET result_odds = ?, result_bookmaker = ?, confidence = ?,
+                    fallback_type = ?, match_score = ?, processed_at = ?
+                WHERE id = ? AND processed_at IS NULL
+            """,
+                (
+                    result.get("closingOdds"),
+                    result.get("bookmakerUsed"),
+                    result.get("confidence"),
+                    result.get("fallbackType"),
+                    result.get("matchScore"),
+                    datetime.now().isoformat(),
                     request_id,
                 ),
             )
+            if cursor.rowcount != 1:
+                return False
+            cursor.execute(
+                "UPDATE jobs SET processed_bets = processed_bets + 1 WHERE id = ?",
+                (job_id,),
+            )
+            return True
 
     def get_bet_results(self, job_id: str) -> list[dict]:
         """Get bet results for a job."""
-        with self._cursor() as cursor:
+        with self._cursor("get_bet_results") as cursor:
             cursor.execute(
                 """
                 SELECT bet_id, result_odds as closingOdds, result_bookmaker as bookmakerUsed,
@@ -346,13 +723,310 @@ class Database:
             )
             return [dict(row) for row in cursor.fetchall()]
 
+    def iter_bet_results(
+        self,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        sport: Optional[str] = None,
+        bookmaker: Optional[str] = None,
+        fallback_type: Optional[str] = None,
+        batch_size: int = 500,
+    ) -> Iterator[list[dict]]:
+        """
+        Yield matched bet results across all jobs in batches, by event date.
+
+        Reads through its own read-only connection with fetchmany, so memory
+        stays bounded and the batches may be consumed from any thread (e.g.
+        a streaming response). date_to is inclusive (YYYY-MM-DD).
+        """
+        conditions = ["result_odds IS NOT NULL"]
+        params: list[Any] = []
+        if date_from:
+            conditions.append("event_date >= ?")
+            params.append(date_from[:10])
+        if date_to:
+            next_day = (datetime.fromisoformat(date_to[:10]) + timedelta(days=1)).date()
+            conditions.append("event_date < ?")
+            params.append(next_day.isoformat())
+        if sport:
+            conditions.append("sport = ? COLLATE NOCASE")
+            params.append(sport)
+        if bookmaker:
+            conditions.append("bookmaker = ? COLLATE NOCASE")
+            params.append(bookmaker)
+        if fallback_type:
+            conditions.append("fallback_type = ?")
+            params.append(fallback_type)
+
+        conn = self._read_only_connection()
+        try:
+            cursor = conn.execute(
+                f"""
+                SELECT job_id, bet_id, sport, tournament, home_team, away_team, market,
+                       event_date, bookmaker, result_odds, result_bookmaker, confidence,
+                       fallback_type, match_score
+                FROM bet_requests
+                WHERE {" AND ".join(conditions)}
+                ORDER BY event_date, id
+            """,
+                params,
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    # === Job Group Operations ===
+
+    def create_job_groups(
+        self,
+        job_id: str,
+        groups: list[tuple[str, str, str, list[int]]],
+        status: str = "pending",
+    ):
+        """
+        Create (sport, league, event_date, bet request ids) group records for a job.
+
+        Existing groups keep their status, so re-creating is idempotent.
+        Status 'queued' makes the groups leasable tasks for worker processes.
+        """
+        with self._cursor("create_job_groups") as cursor:
+            cursor.executemany(
+                """
+                INSERT OR IGNORE INTO job_groups
+                (job_id, sport, league, event_date, bet_count, bet_ids, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+                [
+                    (job_id, sport, league, event_date, len(ids), json.dumps(ids), status)
+                    for sport, league, event_date, ids in groups
+                ],
+            )
+
+    def update_job_group(
+        self,
+        job_id: str,
+        sport: str,
+        league: str,
+        event_date: str,
+        owner: Optional[str] = None,
+        **fields,
+    ) -> bool:
+        """
+        Update status/timing columns of a job group.
+
+        With an owner (worker mode) the row is only updated while that
+        worker holds its lease. Returns False if no row was updated.
+        """
+        if not fields:
+            return False
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        params = [*fields.values(), job_id, sport, league, event_date]
+        owned = ""
+        if owner is not None:
+            owned = " AND lease_owner = ?"
+            params.append(owner)
+        with self._cursor("update_job_group") as cursor:
+            cursor.execute(
+                f"""
+                UPDATE job_groups SET {assignments}
+                WHERE job_id = ? AND sport = ? AND league = ? AND event_date = ?{owned}
+            """,
+                params,
+            )
+            return cursor.rowcount > 0
+
+    def get_job_groups(self, job_id: str) -> list[dict]:
+        """Get group progress and timing for a job."""
+        with self._cursor("get_job_groups") as cursor:
+            cursor.execute(
+                """
+                SELECT id, sport, league, event_date, bet_count, status, cache_hit,
+                       started_at, completed_at, wait_ms, scrape_ms, elapsed_ms,
+                       lease_owner, attempts
+                FROM job_groups WHERE job_id = ? ORDER BY id
+            """,
+                (job_id,),
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_group_bets(self, group_id: int) -> list[dict]:
+        """Get the bet requests of a job group."""
+        with self._cursor("get_group_bets") as cursor:
+            cursor.execute("SELECT bet_ids FROM job_groups WHERE id = ?", (group_id,))
+            row = cursor.fetchone()
+            if not row or not row["bet_ids"]:
+                return []
+            ids = json.loads(row["bet_ids"])
+            placeholders = ",".join("?" * len(ids))
+            cursor.execute(
+                f"SELECT * FROM bet_requests WHERE id IN ({placeholders}) ORDER BY id", ids
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
+    # === Group Task Queue (worker mode) ===
+
+    def lease_group_task(
+        self,
+        owner: str,
+        lease_seconds: float,
+        priority_order: list[str],
+        aging_seconds: float = 30.0,
+    ) -> Optional[dict]:
+        """
+        Lease the next queued group task, or take over one whose lease expired.
+
+        The oldest leasable task of each priority class is a candidate; the
+        class rank is reduced by one per `aging_seconds` the job has waited,
+        so backfills still get leased. The lease is taken with a conditional
+        UPDATE, so two workers can never hold the same task.
+        """
+        now = time.time()
+        leasable = (
+            "(status = 'queued' OR (status IN ('running', 'scraping', 'interrupted') "
+            "AND lease_owner IS NOT NULL AND lease_expires < ?))"
+        )
+        with self._cursor("lease_group_task") as cursor:
+            for _ in range(5):
+                candidates = []
+                for rank, priority in enumerate(priority_order):
+                    cursor.execute(
+                        f"""
+                        SELECT * FROM job_groups
+                        WHERE {leasable} AND job_id IN (
+                            SELECT id FROM jobs WHERE status = 'processing' AND priority = ?
+                        )
+                        ORDER BY id LIMIT 1
+                    """,
+                        (now, priority),
+                    )
+                    row = cursor.fetchone()
+                    if row:
+                        task = dict(row)
+                        task["priority"] = priority
+                        cursor.execute("SELECT created_at FROM jobs WHERE id = ?", (task["job_id"],))
+                        created_at = cursor.fetchone()["created_at"]
+                        waited = now - datetime.fromisoformat(created_at).timestamp()
+                        candidates.append((rank - waited / aging_seconds, task))
+                if not candidates:
+                    return None
+
+                task = min(candidates, key=lambda candidate: candidate[0])[1]
+                cursor.execute(
+                    f"""
+                    UPDATE job_groups
+                    SET status = 'running', lease_owner = ?, lease_expires = ?,
+                        attempts = attempts + 1, started_at = ?
+                    WHERE id = ? AND {leasable}
+                """,
+                    (owner, now + lease_seconds, datetime.now().isoformat(), task["id"], now),
+                )
+                if cursor.rowcount == 1:
+                    task["attempts"] += 1
+                    task["lease_owner"] = owner
+                    return task
+        return None
+
+    def renew_group_lease(self, group_id: int, owner: str, lease_seconds: float) -> bool:
+        """Extend a held lease (heartbeat). Returns False if the lease was lost."""
+        with self._cursor("renew_group_lease") as cursor:
+            cursor.execute(
+                """
+                UPDATE job_groups SET lease_expires = ?
+                WHERE id = ? AND lease_owner = ?
+            """,
+                (time.time() + lease_seconds, group_id, owner),
+            )
+            return cursor.rowcount == 1
+
+    def release_group_task(self, group_id: int, owner: str, status: str):
+        """
+        Give up a leased task.
+
+        Status 'queued' puts it back for another worker; 'completed' or
+        'failed' only clears the lease (the group row already has its status).
+        """
+        with self._cursor("release_group_task") as cursor:
+            if status == "queued":
+                cursor.execute(
+                    """
+                    UPDATE job_groups SET status = 'queued', lease_owner = NULL, lease_expires = NULL
+                    WHERE id = ? AND lease_owner = ?
+                """,
+                    (group_id, owner),
+                )
+            else:
+                cursor.execute(
+                    """
+                    UPDATE job_groups SET lease_owner = NULL, lease_expires = NULL
+                    WHERE id = ? AND lease_owner = ?
+                """,
+                    (group_id, owner),
+                )
+
+    def finish_job_if_done(self, job_id: str) -> Optional[str]:
+        """
+        Complete a queued-mode job once none of its groups are left.
+
+        The job fails only if every group failed; otherwise it completes
+        with the failed groups counted in its error log. Returns the final
+        status if this call finished the job, else None.
+        """
+        with self._cursor("finish_job_if_done") as cursor:
+            cursor.execute(
+                """
+                SELECT COUNT(*) AS total,
+                       SUM(status = 'completed') AS completed,
+                       SUM(status = 'failed') AS failed
+                FROM job_groups WHERE job_id = ?
+            """,
+                (job_id,),
+            )
+            row = cursor.fetchone()
+            done = (row["completed"] or 0) + (row["failed"] or 0)
+            if row["total"] and done < row["total"]:
+                return None
+
+            status = "failed" if row["failed"] and not row["completed"] else "completed"
+            error = f"{row['failed']} of {row['total']} groups failed" if row["failed"] else None
+            cursor.execute(
+                """
+                UPDATE jobs SET status = ?, completed_at = ?, error_log = ?
+                WHERE id = ? AND status = 'processing'
+            """,
+                (status, datetime.now().isoformat(), error, job_id),
+            )
+            return status if cursor.rowcount == 1 else None
+
+    def get_task_queue_stats(self) -> dict:
+        """Get counts of queued/leased group tasks and the workers holding leases."""
+        with self._cursor("get_task_queue_stats") as cursor:
+            cursor.execute(
+                """
+                SELECT SUM(status = 'queued') AS queued,
+                       SUM(status IN ('running', 'scraping') AND lease_owner IS NOT NULL) AS leased,
+                       COUNT(DISTINCT CASE WHEN status IN ('running', 'scraping')
+                                           THEN lease_owner END) AS workers
+                FROM job_groups WHERE status IN ('queued', 'running', 'scraping')
+            """
+            )
+            row = cursor.fetchone()
+            return {
+                "queued": row["queued"] or 0,
+                "leased": row["leased"] or 0,
+                "active_workers": row["workers"] or 0,
+            }
+
     # === Cache Operations ===
 
     def get_cached_league_data(
         self, sport: str, league: str, event_date: str
     ) -> Optional[dict]:
         """Get cached league data if fresh enough (within 7 days)."""
-        with self._cursor() as cursor:
+        with self._cursor("get_cached_league_data") as cursor:
             cutoff = int((datetime.now() - timedelta(days=7)).timestamp())
             cursor.execute(
                 """
@@ -376,20 +1050,35 @@ class Database:
                     return None
             return None
 
+    def get_league_cache_version(
+        self, sport: str, league: str, event_date: str
+    ) -> Optional[int]:
+        """
+        Get the row id of a fresh league cache entry without decoding it.
+
+        cache_league_data replaces the row, so the id changes on every write.
+        """
+        with self._cursor("get_league_cache_version") as cursor:
+            cutoff = int((datetime.now() - timedelta(days=7)).timestamp())
+            cursor.execute(
+                """
+                SELECT id FROM league_cache 
+                WHERE sport = ? AND league = ? AND event_date = ? AND last_scraped > ?
+            """,
+                (sport, league, event_date, cutoff),
+            )
+            row = cursor.fetchone()
+            return row["id"] if row else None
+
     def cache_league_data(
         self, sport: str, league: str, event_date: str, data: dict
     ):
         """Cache league data with compression."""
-        with self._cursor() as cursor:
+        with self._cursor("cache_league_data") as cursor:
             json_data = json.dumps(data)
             compressed = gzip.compress(json_data.encode())
 
-            # Determine season from event_date
-            date_obj = datetime.fromisoformat(event_date.replace("Z", "+00:00"))
-            if date_obj.month >= 7:
-                season = f"{date_obj.year}-{date_obj.year + 1}"
-            else:
-                season = f"{date_obj.year - 1}-{date_obj.year}"
+            season = season_for_date(event_date)
 
             cursor.execute(
                 """
@@ -408,18 +1097,337 @@ class Database:
                 ),
             )
 
+    # === Season Cache Operations ===
+
+    def get_season_cache_info(
+        self, sport: str, league: str, season: str
+    ) -> Optional[dict]:
+        """
+        Get last scrape time, covered date span and covered markets for a season.
+
+        markets is None for seasons scraped before market scoping.
+        """
+        with self._cursor("get_season_cache_info") as cursor:
+            cursor.execute(
+                """
+                SELECT last_scraped, covered_from, covered_to, day_count, markets
+                FROM season_cache WHERE sport = ? AND league = ? AND season = ?
+            """,
+                (sport, league, season),
+            )
+            row = cursor.fetchone()
+            if not row:
+                return None
+            info = dict(row)
+            info["markets"] = json.loads(info["markets"]) if info["markets"] else None
+            return info
+
+    def get_season_day(
+        self, sport: str, league: str, season: str, match_date: str
+    ) -> Optional[dict]:
+        """
+        Get the cached matches and markets of a season day (YYYY-MM-DD).
+
+        Returns None if the day is not cached; matches is empty for a day
+        known to have no matches. markets is None for days scraped before
+        market scoping.
+        """
+        days = self._select_season_days("get_season_day", sport, league, season, [match_date])
+        return days.get(match_date)
+
+    def get_season_days(
+        self, sport: str, league: str, season: str, match_dates: list[str]
+    ) -> dict[str, dict]:
+        """Get cached days of a season ({"matches", "markets"}), keyed by match date."""
+        return self._select_season_days("get_season_days", sport, league, season, match_dates)
+
+    def _select_season_days(
+        self, operation: str, sport: str, league: str, season: str, match_dates: list[str]
+    ) -> dict[str, dict]:
+        if not match_dates:
+            return {}
+        with self._cursor(operation) as cursor:
+            placeholders = ",".join("?" * len(match_dates))
+            cursor.execute(
+                f"""
+                SELECT match_date, matches, markets FROM season_matches
+                WHERE sport = ? AND league = ? AND season = ? AND match_date IN ({placeholders})
+            """,
+                (sport, league, season, *match_dates),
+            )
+            return {
+                row["match_date"]: {
+                    "matches": json.loads(gzip.decompress(row["matches"])),
+                    "markets": json.loads(row["markets"]) if row["markets"] else None,
+                }
+                for row in cursor.fetchall()
+            }
+
+    def store_season_matches(
+        self,
+        sport: str,
+        league: str,
+        season: str,
+        matches_by_date: dict[str, list[dict]],
+        markets: Optional[list[str]] = None,
+        day_markets: Optional[dict[str, list[str]]] = None,
+    ) -> int:
+        """
+        Merge a season scrape into the cache, rewriting only changed days.
+
+        An empty match list records a day without matches. day_markets
+        holds the markets each day was scraped for (default: markets). The
+        covered span is widened to include every date in the scrape;
+        markets replaces the season's covered markets. Returns the number of
+        days inserted or updated.
+        """
+        now = int(datetime.now().timestamp())
+        changed = 0
+        day_markets = day_markets or {}
+
+        with self._cursor("store_season_matches") as cursor:
+            cursor.execute(
+                """
+                SELECT match_date, content_hash FROM season_matches
+                WHERE sport = ? AND league = ? AND season = ?
+            """,
+                (sport, league, season),
+            )
+            existing = {row["match_date"]: row["content_hash"] for row in cursor.fetchall()}
+
+            for match_date, matches in matches_by_date.items():
+                json_data = json.dumps(matches, sort_keys=True)
+                day = day_markets.get(match_date, markets)
+                markets_json = json.dumps(sorted(day)) if day is not None else None
+                content_hash = hashlib.sha1(f"{markets_json}|{json_data}".encode()).hexdigest()
+                if existing.get(match_date) == content_hash:
+                    continue
+                cursor.execute(
+                    """
+                    INSERT OR REPLACE INTO season_matches
+                    (sport, league, season, match_date, matches, content_hash, updated_at, markets)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                    (
+                        sport,
+                        league,
+                        season,
+                        match_date,
+                        gzip.compress(json_data.encode()),
+                        content_hash,
+                        now,
+                        markets_json,
+                    ),
+                )
+                changed += 1
+
+            dates = set(existing) | set(matches_by_date)
+            cursor.execute(
+                """
+                INSERT OR REPLACE INTO season_cache
+                (sport, league, season, last_scraped, covered_from, covered_to, day_count, markets)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                (
+                    sport,
+                    league,
+                    season,
+                    now,
+                    min(dates) if dates else None,
+                    max(dates) if dates else None,
+                    len(dates),
+                    json.dumps(sorted(markets)) if markets is not None else None,
+                ),
+            )
+
+        return changed
+
+    def get_season_pages(
+        self, sport: str, league: str, season: str, max_age: Optional[int] = None
+    ) -> Optional[dict]:
+        """
+        Get the results page index of a season: page count and (oldest, newest) dates per page.
+
+        Only pages checked within max_age seconds (if given) and counted
+        with the latest page count are returned. None if nothing usable is cached.
+        """
+        with self._cursor("get_season_pages") as cursor:
+            query = """
+                SELECT page, page_count, oldest_date, newest_date, checked_at FROM season_pages
+                WHERE sport = ? AND league = ? AND season = ?
+            """
+            params: list[Any] = [sport, league, season]
+            if max_age is not None:
+                query += " AND checked_at >= ?"
+                params.append(int(time.time()) - max_age)
+            cursor.execute(query + " ORDER BY checked_at DESC", params)
+            rows = cursor.fetchall()
+        if not rows:
+            return None
+        page_count = rows[0]["page_count"]
+        return {
+            "page_count": page_count,
+            "pages": {
+                row["page"]: (row["oldest_date"], row["newest_date"])
+                for row in rows
+                if row["page_count"] == page_count
+            },
+        }
+
+    def save_season_pages(
+        self,
+        sport: str,
+        league: str,
+        season: str,
+        page_count: int,
+        pages: dict[int, tuple[str, str]],
+    ):
+        """Record the (oldest, newest) match dates of probed results pages."""
+        now = int(time.time())
+        with self._cursor("save_season_pages") as cursor:
+            cursor.executemany(
+                """
+                INSERT OR REPLACE INTO season_pages
+                (sport, league, season, page, page_count, oldest_date, newest_date, checked_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                [
+                    (sport, league, season, page, page_count, oldest, newest, now)
+                    for page, (oldest, newest) in pages.items()
+                ],
+            )
+
+    # === Prefetch Schedule ===
+
+    def schedule_prefetch(
+        self, sport: str, league: str, event_date: str, due_at: float, registrations: int
+    ):
+        """
+        Register bets for a (sport, league, date) window scraped at due_at.
+
+        A later kickoff pushes the window back (and re-opens a finished one),
+        so the single scrape covers every registered match.
+        """
+        now = datetime.now().isoformat()
+        with self._cursor("schedule_prefetch") as cursor:
+            # SET expressions all see the old row, so CASEs compare against the old due_at
+            cursor.execute(
+                """
+                INSERT INTO prefetch_schedule
+                    (sport, league, event_date, due_at, registrations, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(sport, league, event_date) DO UPDATE SET
+                    registrations = registrations + excluded.registrations,
+                    status = CASE WHEN excluded.due_at > due_at THEN 'pending' ELSE status END,
+                    attempts = CASE WHEN excluded.due_at > due_at THEN 0 ELSE attempts END,
+                    due_at = MAX(due_at, excluded.due_at),
+                    updated_at = excluded.updated_at
+            """,
+                (sport, league, event_date, due_at, registrations, now, now),
+            )
+
+    def claim_due_prefetches(self, now: float, limit: int) -> list[dict]:
+        """Mark up to limit due windows 'running' and return them."""
+        with self._cursor("claim_due_prefetches") as cursor:
+            cursor.execute(
+                """
+                SELECT * FROM prefetch_schedule
+                WHERE status = 'pending' AND due_at <= ?
+                ORDER BY due_at LIMIT ?
+            """,
+                (now, limit),
+            )
+            claimed = []
+            for row in cursor.fetchall():
+                cursor.execute(
+                    """
+                    UPDATE prefetch_schedule SET status = 'running', updated_at = ?
+                    WHERE id = ? AND status = 'pending'
+                """,
+                    (datetime.now().isoformat(), row["id"]),
+                )
+                if cursor.rowcount:
+                    claimed.append(dict(row))
+            return claimed
+
+    def finish_prefetch(
+        self,
+        prefetch_id: int,
+        status: str,
+        matches: Optional[int] = None,
+        error: Optional[str] = None,
+        retry_at: Optional[float] = None,
+    ) -> bool:
+        """
+        Record the outcome of a running window; with retry_at it is re-queued.
+
+        Returns False if the window was re-opened by a later registration
+        while running (it then stays pending for its new due time).
+        """
+        with self._cursor("finish_prefetch") as cursor:
+            cursor.execute(
+                """
+                UPDATE prefetch_schedule
+                SET status = ?, matches = ?, last_error = ?, attempts = attempts + 1,
+                    due_at = COALESCE(?, due_at), updated_at = ?
+                WHERE id = ? AND status = 'running'
+            """,
+                (
+                    "pending" if retry_at is not None else status,
+                    matches,
+                    error,
+                    retry_at,
+                    datetime.now().isoformat(),
+                    prefetch_id,
+                ),
+            )
+            return cursor.rowcount > 0
+
+    def reset_running_prefetches(self) -> int:
+        """Return windows left 'running' by a crash/restart to the schedule."""
+        with self._cursor("reset_running_prefetches") as cursor:
+            cursor.execute(
+                "UPDATE prefetch_schedule SET status = 'pending' WHERE status = 'running'"
+            )
+            return cursor.rowcount
+
+    def get_next_prefetch_due(self) -> Optional[float]:
+        """Earliest due time of a pending window."""
+        with self._cursor("get_next_prefetch_due") as cursor:
+            cursor.execute(
+                "SELECT MIN(due_at) AS due_at FROM prefetch_schedule WHERE status = 'pending'"
+            )
+            row = cursor.fetchone()
+            return row["due_at"] if row else None
+
+    def get_prefetch_schedule(
+        self, status: Optional[str] = None, limit: int = 200
+    ) -> list[dict]:
+        """List scheduled windows by due time, optionally filtered by status."""
+        with self._cursor("get_prefetch_schedule") as cursor:
+            if status:
+                cursor.execute(
+                    "SELECT * FROM prefetch_schedule WHERE status = ? ORDER BY due_at LIMIT ?",
+                    (status, limit),
+                )
+            else:
+                cursor.execute(
+                    "SELECT * FROM prefetch_schedule ORDER BY due_at LIMIT ?", (limit,)
+                )
+            return [dict(row) for row in cursor.fetchall()]
+
     # === Metadata Operations ===
 
     def get_metadata(self, key: str) -> Optional[str]:
         """Get metadata value."""
-        with self._cursor() as cursor:
+        with self._cursor("get_metadata") as cursor:
             cursor.execute("SELECT value FROM metadata WHERE key = ?", (key,))
             row = cursor.fetchone()
             return row["value"] if row else None
 
     def set_metadata(self, key: str, value: str):
         """Set metadata value."""
-        with self._cursor() as cursor:
+        with self._cursor("set_metadata") as cursor:
             cursor.execute(
                 "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
                 (key, value),
@@ -429,7 +1437,7 @@ class Database:
 
     def log_failure(self, job_id: str, error_type: str, error_message: str):
         """Log a failure for diagnostics."""
-        with self._cursor() as cursor:
+        with self._cursor("log_failure") as cursor:
             cursor.execute(
                 """
                 INSERT INTO failure_log (timestamp, job_id, error_type, error_message)
@@ -438,9 +1446,21 @@ class Database:
                 (int(datetime.now().timestamp()), job_id, error_type, error_message),
             )
 
+    def get_failures_for_job(self, job_id: str) -> list[dict]:
+        """Get logged failures for a job."""
+        with self._cursor("get_failures_for_job") as cursor:
+            cursor.execute(
+                """
+                SELECT timestamp, error_type, error_message FROM failure_log
+                WHERE job_id = ? ORDER BY timestamp
+            """,
+                (job_id,),
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
     def get_failure_count(self, hours: int = 24) -> int:
         """Get failure count in last N hours."""
-        with self._cursor() as cursor:
+        with self._cursor("get_failure_count") as cursor:
             cutoff = int((datetime.now() - timedelta(hours=hours)).timestamp())
             cursor.execute(
                 "SELECT COUNT(*) as count FROM failure_log WHERE timestamp > ?",
@@ -470,7 +1490,7 @@ def get_db_size(db: Database) -> float:
 
 def get_failure_rate(db: Database) -> float:
     """Calculate failure rate in last 24 hours."""
-    with db._cursor() as cursor:
+    with db._cursor("get_failure_rate") as cursor:
         cutoff = int((datetime.now() - timedelta(hours=24)).timestamp())
 
         # Get total jobs in period
@@ -494,11 +1514,11 @@ def get_failure_rate(db: Database) -> float:
 def cleanup_old_cache(db: Database, retention_days: int = 30) -> dict:
     """Clean up old cache entries."""
     cutoff = int((datetime.now() - timedelta(days=retention_days)).timestamp())
-    deleted = {"leagues": 0, "odds": 0, "failures": 0, "freed_mb": 0.0}
+    deleted = {"leagues": 0, "odds": 0, "seasons": 0, "prefetches": 0, "failures": 0, "freed_mb": 0.0}
 
     size_before = get_db_size(db)
 
-    with db._cursor() as cursor:
+    with db._cursor("cleanup_old_cache") as cursor:
         # Delete old league cache
         cursor.execute(
             "DELETE FROM league_cache WHERE last_scraped < ?", (cutoff,)
@@ -511,6 +1531,35 @@ def cleanup_old_cache(db: Database, retention_days: int = 30) -> dict:
         )
         deleted["odds"] = cursor.rowcount
 
+        # Delete old season cache
+        cursor.execute(
+            """
+            DELETE FROM season_matches WHERE (sport, league, season) IN (
+                SELECT sport, league, season FROM season_cache WHERE last_scraped < ?
+            )
+        """,
+            (cutoff,),
+        )
+        cursor.execute(
+            """
+            DELETE FROM season_pages WHERE (sport, league, season) IN (
+                SELECT sport, league, season FROM season_cache WHERE last_scraped < ?
+            )
+        """,
+            (cutoff,),
+        )
+        cursor.execute(
+            "DELETE FROM season_cache WHERE last_scraped < ?", (cutoff,)
+        )
+        deleted["seasons"] = cursor.rowcount
+
+        # Delete finished prefetch windows
+        cursor.execute(
+            "DELETE FROM prefetch_schedule WHERE status IN ('completed', 'failed') AND due_at < ?",
+            (cutoff,),
+        )
+        deleted["prefetches"] = cursor.rowcount
+
         # Delete old failure logs (keep 7 days)
         failure_cutoff = int((datetime.now() - timedelta(days=7)).timestamp())
         cursor.execute(
@@ -525,3 +1574,16 @@ def cleanup_old_cache(db: Database, retention_days: int = 30) -> dict:
     deleted["freed_mb"] = round(size_before - size_after, 2)
 
     return deleted
+
+
+def season_for_date(event_date: str) -> str:
+    """
+    Get the OddsPortal season slug (e.g. "2024-2025") for an ISO date.
+
+    Most football leagues run Aug-May, so August onwards starts a new season.
+    """
+    date_obj = datetime.fromisoformat(event_date[:10])
+    if date_obj.month >= 8:
+        return f"{date_obj.year}-{date_obj.year + 1}"
+    return f"{date_obj.year - 1}-{date_obj.year}"
+
@@ -0,0 +1,95 @@
+"""
+CLV Result Export
+=================
+
+Streaming encoders for the bulk export endpoint:
+- Rows arrive in batches from Database/JobArchive.iter_bet_results
+- Each batch is encoded to one NDJSON or CSV chunk
+- Chunks are optionally gzip'd incrementally with one compressor
+
+Nothing accumulates across batches, so memory use does not grow with the
+number of exported rows.
+"""
+
+import csv
+import io
+import json
+import zlib
+from typing import Iterable, Iterator
+
+# Exported columns, in CSV order
+EXPORT_FIELDS = (
+    "job_id",
+    "bet_id",
+    "sport",
+    "tournament",
+    "home_team",
+    "away_team",
+    "market",
+    "event_date",
+    "bookmaker",
+    "closing_odds",
+    "bookmaker_used",
+    "confidence",
+    "fallback_type",
+    "match_score",
+    "archived",
+)
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _export_row(bet: dict, archived: bool) -> dict:
+    """Map a bet_requests-shaped row to the exported field names."""
+    return {
+        "job_id": bet["job_id"],
+        "bet_id": bet["bet_id"],
+        "sport": bet["sport"],
+        "tournament": bet["tournament"],
+        "home_team": bet["home_team"],
+        "away_team": bet["away_team"],
+        "market": bet["market"],
+        "event_date": bet["event_date"],
+        "bookmaker": bet["bookmaker"],
+        "closing_odds": bet["result_odds"],
+        "bookmaker_used": bet["result_bookmaker"],
+        "confidence": bet["confidence"],
+        "fallback_type": bet["fallback_type"],
+        "match_score": bet["match_score"],
+        "archived": archived,
+    }
+
+
+def encode_batches(
+    batches: Iterable[tuple[list[dict], bool]], fmt: str
+) -> Iterator[bytes]:
+    """Encode (rows, archived) batches as NDJSON lines or CSV (with a header row)."""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, lineterminator="\n")
+        writer.writeheader()
+        yield buffer.getvalue().encode()
+        for rows, archived in batches:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(_export_row(row, archived) for row in rows)
+            yield buffer.getvalue().encode()
+    else:
+        for rows, archived in batches:
+            yield "".join(
+                json.dumps(_export_row(row, archived), separators=(",", ":")) + "\n"
+                for row in rows
+            ).encode()
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a chunk stream incrementally as a single gzip member."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
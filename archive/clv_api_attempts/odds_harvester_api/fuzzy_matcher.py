@@ -418,6 +418,27 @@ def similarity_score(s1: str, s2: str) -> float:
     return 1.0 - (distance / max_len)
 
 
+def match_score_normalized(target: str, candidate: str) -> float:
+    """
+    Score two already-normalized strings the way find_best_match does.
+    
+    Similarity plus a containment bonus for substring matches.
+    """
+    if target == candidate:
+        return 1.0 if target else 0.0
+    
+    # Calculate similarity score
+    score = similarity_score(target, candidate)
+    
+    # Also check if one contains the other (bonus for substring matches)
+    if target in candidate or candidate in target:
+        # Boost score for containment
+        containment_bonus = min(0.2, len(min(target, candidate)) / len(max(target, candidate)))
+        score = min(1.0, score + containment_bonus)
+    
+    return score
+
+
 # === Best Match Finding ===
 
 
@@ -461,14 +482,7 @@ def find_best_match(
                 "index": i,
             }
         
-        # Calculate similarity score
-        score = similarity_score(target_normalized, candidate_normalized)
-        
-        # Also check if one contains the other (bonus for substring matches)
-        if target_normalized in candidate_normalized or candidate_normalized in target_normalized:
-            # Boost score for containment
-            containment_bonus = min(0.2, len(min(target_normalized, candidate_normalized)) / len(max(target_normalized, candidate_normalized)))
-            score = min(1.0, score + containment_bonus)
+        score = match_score_normalized(target_normalized, candidate_normalized)
         
         if score > best_score:
             best_score = score
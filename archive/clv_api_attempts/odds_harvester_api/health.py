@@ -0,0 +1,238 @@
+"""
+Health Monitor for the CLV API
+==============================
+
+Keeps /health off the request path:
+- GitVersion reads the OddsHarvester commit straight from the .git files
+  and caches it until HEAD, the branch ref or packed-refs change (mtime)
+- HealthMonitor runs the OddsHarvester probe as an async subprocess and
+  collects DB-backed stats on a worker thread, on its own schedule
+- Each refresh publishes a new snapshot dict; /health only reads it
+
+A snapshot is never mutated after publishing, so readers need no locks.
+"""
+
+import asyncio
+import logging
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def health_state(probe_status: str, failure_rate: float) -> str:
+    """Combine the probe result and the 24h failure rate into one state."""
+    if probe_status == "critical" or failure_rate > 0.5:
+        return "critical"
+    elif probe_status == "degraded" or failure_rate > 0.1:
+        return "degraded"
+    else:
+        return "healthy"
+
+
+class GitVersion:
+    """Short commit hash of a git checkout, cached until its .git files change."""
+
+    def __init__(self, repo_path: str, length: int = 7):
+        self.repo_path = Path(repo_path)
+        self.length = length
+        self._key: Optional[tuple] = None
+        self._version = "unknown"
+
+    def _git_dirs(self) -> Optional[tuple[Path, Path]]:
+        """(git dir, common dir); they differ for linked worktrees."""
+        dot_git = self.repo_path / ".git"
+        if dot_git.is_dir():
+            git_dir = dot_git
+        elif dot_git.is_file():
+            # Submodules and worktrees: ".git" holds "gitdir: <path>"
+            content = dot_git.read_text().strip()
+            if not content.startswith("gitdir:"):
+                return None
+            git_dir = (self.repo_path / content[len("gitdir:"):].strip()).resolve()
+        else:
+            return None
+
+        common_dir = git_dir
+        commondir_file = git_dir / "commondir"
+        if commondir_file.is_file():
+            common_dir = (git_dir / commondir_file.read_text().strip()).resolve()
+        return git_dir, common_dir
+
+    @staticmethod
+    def _mtime(path: Path) -> Optional[int]:
+        try:
+            return path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _watched(self, git_dir: Path, common_dir: Path, ref: Optional[str]) -> tuple:
+        paths = [git_dir / "HEAD", common_dir / "packed-refs"]
+        if ref:
+            paths.append(common_dir / ref)
+        return tuple((str(path), self._mtime(path)) for path in paths)
+
+    def _read_ref(self, common_dir: Path, ref: str) -> Optional[str]:
+        ref_file = common_dir / ref
+        if ref_file.is_file():
+            return ref_file.read_text().strip()
+        packed = common_dir / "packed-refs"
+        if packed.is_file():
+            for line in packed.read_text().splitlines():
+                if line.startswith(("#", "^")):
+                    continue
+                sha, _, name = line.partition(" ")
+                if name.strip() == ref:
+                    return sha
+        return None
+
+    def get(self) -> str:
+        """Current short hash, or "unknown" if the path is not a git checkout."""
+        try:
+            dirs = self._git_dirs()
+            if dirs is None:
+                self._key, self._version = None, "unknown"
+                return self._version
+            git_dir, common_dir = dirs
+
+            head = (git_dir / "HEAD").read_text().strip()
+            ref = head[len("ref:"):].strip() if head.startswith("ref:") else None
+            key = self._watched(git_dir, common_dir, ref)
+            if key == self._key:
+                return self._version
+
+            sha = self._read_ref(common_dir, ref) if ref else head
+            self._version = sha[: self.length] if sha else "unknown"
+            self._key = key
+        except OSError:
+            self._key, self._version = None, "unknown"
+        return self._version
+
+
+class HealthMonitor:
+    """Runs health probes in the background and publishes snapshot dicts."""
+
+    def __init__(
+        self,
+        collect_stats: Callable[[], dict],
+        harvester_path: str,
+        refresh_seconds: float = 15,
+        probe_interval_seconds: float = 6 * 3600,
+        probe_timeout: float = 30,
+        initial_status: Optional[str] = None,
+        on_probe: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        collect_stats runs on a worker thread and returns the DB-backed
+        fields (must include failure_rate); on_probe persists a probe
+        status, also off the event loop.
+        """
+        self.collect_stats = collect_stats
+        self.harvester_path = harvester_path
+        self.refresh_seconds = refresh_seconds
+        self.probe_interval_seconds = probe_interval_seconds
+        self.probe_timeout = probe_timeout
+        self.on_probe = on_probe
+        self.version = GitVersion(harvester_path)
+
+        self.probe = {
+            "status": initial_status or "unknown",
+            "checked_at": None,
+            "duration_ms": None,
+            "error": None,
+        }
+        self.snapshot: Optional[dict] = None
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self):
+        """Publish the first snapshot, then keep refreshing in the background."""
+        await self.refresh()
+        self._tasks = [
+            asyncio.create_task(self._refresh_loop()),
+            asyncio.create_task(self._probe_loop()),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def refresh(self):
+        """Collect stats off the event loop and publish a new snapshot."""
+        started = time.perf_counter()
+        try:
+            stats = await asyncio.to_thread(self.collect_stats)
+        except Exception as e:
+            logger.error(f"Health stats collection failed: {e}")
+            if self.snapshot is not None:
+                return  # Keep serving the last good snapshot
+            stats = {"failure_rate": 0.0}
+
+        self.snapshot = {
+            **stats,
+            "odds_harvester_version": self.version.get(),
+            "health_state": health_state(self.probe["status"], stats.get("failure_rate", 0.0)),
+            "probe": dict(self.probe),
+            "refreshed_at": datetime.now().isoformat(),
+            "refresh_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    async def run_probe(self) -> str:
+        """Check that OddsHarvester's CLI starts, without blocking the loop."""
+        logger.info("Running health check...")
+        started = time.perf_counter()
+        error = None
+        try:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "src.main", "--help",
+                cwd=self.harvester_path,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            try:
+                returncode = await asyncio.wait_for(process.wait(), timeout=self.probe_timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                process.kill()
+                await process.wait()
+                raise
+            if returncode == 0:
+                status = "healthy"
+                logger.info("Health check passed")
+            else:
+                status = "degraded"
+                error = f"exit code {returncode}"
+                logger.warning("Health check failed: OddsHarvester not responding properly")
+        except asyncio.TimeoutError:
+            status, error = "critical", f"timed out after {self.probe_timeout}s"
+            logger.error(f"Health check error: {error}")
+        except Exception as e:
+            status, error = "critical", str(e)
+            logger.error(f"Health check error: {e}")
+
+        self.probe = {
+            "status": status,
+            "checked_at": datetime.now().isoformat(),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "error": error,
+        }
+        if self.on_probe:
+            try:
+                await asyncio.to_thread(self.on_probe, status)
+            except Exception as e:
+                logger.error(f"Failed to store health status: {e}")
+        await self.refresh()
+        return status
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            await self.refresh()
+
+    async def _probe_loop(self):
+        while True:
+            await self.run_probe()
+            await asyncio.sleep(self.probe_interval_seconds)
@@ -0,0 +1,241 @@
+"""
+Job Archive Module for CLV Cache
+================================
+
+Cold storage for finished jobs so the hot `clv_cache.db` only holds
+recent activity:
+- Completed/failed jobs older than N days are moved to `clv_archive.db`
+- Bet results are stored as one gzip'd compact row list per job
+- Archived jobs can still be looked up by job ID
+
+The archive is append-mostly and never vacuumed on the request path.
+"""
+
+import gzip
+import json
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+
+from database import Database, SQLiteStore
+
+# Column order of a compact archived result row
+ARCHIVED_RESULT_FIELDS = (
+    "bet_id",
+    "sport",
+    "tournament",
+    "home_team",
+    "away_team",
+    "market",
+    "event_date",
+    "bookmaker",
+    "result_odds",
+    "result_bookmaker",
+    "confidence",
+    "fallback_type",
+    "match_score",
+)
+
+# Column order of a compact archived failure row
+ARCHIVED_FAILURE_FIELDS = ("timestamp", "error_type", "error_message")
+
+
+def _pack(rows: list[dict], fields: tuple) -> bytes:
+    """Pack dict rows into gzip'd JSON list-of-lists."""
+    compact = [[row.get(field) for field in fields] for row in rows]
+    return gzip.compress(json.dumps(compact, separators=(",", ":")).encode())
+
+
+def _unpack(blob: Optional[bytes], fields: tuple) -> list[dict]:
+    """Unpack gzip'd JSON list-of-lists back into dict rows."""
+    if not blob:
+        return []
+    compact = json.loads(gzip.decompress(blob))
+    return [dict(zip(fields, row)) for row in compact]
+
+
+class JobArchive(SQLiteStore):
+    """SQLite cold store for archived jobs (separate file from the hot DB)."""
+
+    def __init__(self, db_path: str):
+        super().__init__(db_path)
+        self._init_schema()
+
+    def _init_schema(self):
+        """Initialize archive schema."""
+        with self._cursor("archive._init_schema") as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS archived_jobs (
+                    id TEXT PRIMARY KEY,
+                    created_at TEXT NOT NULL,
+                    completed_at TEXT,
+                    archived_at INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    total_bets INTEGER NOT NULL,
+                    processed_bets INTEGER NOT NULL,
+                    error_log TEXT,
+                    scraper_version TEXT,
+                    results BLOB,
+                    failures BLOB
+                )
+            """)
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_archived_jobs_completed ON archived_jobs(completed_at)"
+            )
+
+    def archive_jobs(self, entries: list[tuple[dict, list[dict], list[dict]]]):
+        """
+        Store (job, bet_requests, failures) entries in one transaction.
+
+        Uses INSERT OR REPLACE so re-archiving a job after an interrupted
+        run is harmless.
+        """
+        archived_at = int(datetime.now().timestamp())
+        with self._cursor("archive.archive_jobs") as cursor:
+            cursor.executemany(
+                """
+                INSERT OR REPLACE INTO archived_jobs
+                (id, created_at, completed_at, archived_at, status, total_bets,
+                 processed_bets, error_log, scraper_version, results, failures)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                [
+                    (
+                        job["id"],
+                        job["created_at"],
+                        job.get("completed_at"),
+                        archived_at,
+                        job["status"],
+                        job["total_bets"],
+                        job["processed_bets"],
+                        job.get("error_log"),
+                        job.get("scraper_version"),
+                        _pack(bets, ARCHIVED_RESULT_FIELDS),
+                        _pack(failures, ARCHIVED_FAILURE_FIELDS),
+                    )
+                    for job, bets, failures in entries
+                ],
+            )
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        """Get archived job by ID (without results)."""
+        with self._cursor("archive.get_job") as cursor:
+            cursor.execute(
+                """
+                SELECT id, created_at, completed_at, archived_at, status, total_bets,
+                       processed_bets, error_log, scraper_version
+                FROM archived_jobs WHERE id = ?
+            """,
+                (job_id,),
+            )
+            row = cursor.fetchone()
+            return dict(row) if row else None
+
+    def get_bet_requests(self, job_id: str) -> list[dict]:
+        """Get the compact bet rows stored for an archived job."""
+        with self._cursor("archive.get_bet_requests") as cursor:
+            cursor.execute("SELECT results FROM archived_jobs WHERE id = ?", (job_id,))
+            row = cursor.fetchone()
+            return _unpack(row["results"], ARCHIVED_RESULT_FIELDS) if row else []
+
+    def get_bet_results(self, job_id: str) -> list[dict]:
+        """Get bet results in the same shape as Database.get_bet_results."""
+        return [
+            {
+                "bet_id": bet["bet_id"],
+                "closingOdds": bet["result_odds"],
+                "bookmakerUsed": bet["result_bookmaker"],
+                "confidence": bet["confidence"],
+                "fallbackType": bet["fallback_type"],
+                "matchScore": bet["match_score"],
+            }
+            for bet in self.get_bet_requests(job_id)
+            if bet["result_odds"] is not None
+        ]
+
+    def iter_bet_results(
+        self,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        sport: Optional[str] = None,
+        bookmaker: Optional[str] = None,
+        fallback_type: Optional[str] = None,
+    ) -> Iterator[list[dict]]:
+        """
+        Yield matched archived bet results one job at a time.
+
+        Results are packed per job, so filters are applied after unpacking;
+        memory is bounded by the largest single job. Uses its own read-only
+        connection, like Database.iter_bet_results.
+        """
+        date_to_key = date_to[:10] if date_to else None
+        conn = self._read_only_connection()
+        try:
+            cursor = conn.execute("SELECT id, results FROM archived_jobs ORDER BY completed_at")
+            for job_id, blob in cursor:
+                rows = []
+                for bet in _unpack(blob, ARCHIVED_RESULT_FIELDS):
+                    if bet["result_odds"] is None:
+                        continue
+                    event_day = (bet["event_date"] or "")[:10]
+                    if date_from and event_day < date_from[:10]:
+                        continue
+                    if date_to_key and event_day > date_to_key:
+                        continue
+                    if sport and (bet["sport"] or "").lower() != sport.lower():
+                        continue
+                    if bookmaker and (bet["bookmaker"] or "").lower() != bookmaker.lower():
+                        continue
+                    if fallback_type and bet["fallback_type"] != fallback_type:
+                        continue
+                    rows.append({"job_id": job_id, **bet})
+                if rows:
+                    yield rows
+        finally:
+            conn.close()
+
+    def get_job_count(self) -> int:
+        """Get number of archived jobs."""
+        with self._cursor("archive.get_job_count") as cursor:
+            cursor.execute("SELECT COUNT(*) as count FROM archived_jobs")
+            return cursor.fetchone()["count"]
+
+
+# === Module-level Helper Functions ===
+
+
+def archive_completed_jobs(
+    db: Database,
+    archive: JobArchive,
+    retention_days: int = 14,
+    batch_size: int = 200,
+) -> dict:
+    """
+    Move completed/failed jobs older than retention_days to the archive.
+
+    Each batch is written to the archive before it is deleted from the hot
+    database, so an interruption can only leave a job in both stores.
+    """
+    cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat()
+    moved = {"jobs": 0, "bets": 0, "failures": 0}
+
+    while True:
+        jobs = db.get_archivable_jobs(cutoff, batch_size)
+        if not jobs:
+            break
+
+        entries = []
+        for job in jobs:
+            bets = db.get_bet_requests(job["id"])
+            failures = db.get_failures_for_job(job["id"])
+            entries.append((job, bets, failures))
+            moved["bets"] += len(bets)
+            moved["failures"] += len(failures)
+
+        archive.archive_jobs(entries)
+        db.delete_jobs([job["id"] for job in jobs])
+        moved["jobs"] += len(jobs)
+
+        if len(jobs) < batch_size:
+            break
+
+    return moved
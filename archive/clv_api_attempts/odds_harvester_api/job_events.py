@@ -0,0 +1,159 @@
+"""
+Job Event Bus for CLV Progress Streaming
+========================================
+
+In-memory, per-job append-only event logs that back the SSE and WebSocket
+progress endpoints:
+- JobProcessor publishes job/group/bet events as they happen
+- Every event has a per-job sequence number used as the resume cursor
+- Consumers wait on the log instead of polling the database
+
+Logs of recent jobs are kept in memory only, and sequence numbers restart
+when a job is resumed by another process. Cursors handed to clients are
+"<epoch>-<seq>", where the epoch is unique to the process, so a cursor from
+before a restart is told apart from one into the current log. A consumer
+whose cursor is stale or no longer retained gets a snapshot from the database.
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+# Event types that end a job's stream
+TERMINAL_EVENTS = {"job_completed", "job_failed"}
+
+
+def parse_cursor(value: Optional[str]) -> tuple[Optional[str], int]:
+    """Split an "<epoch>-<seq>" cursor; a bare seq has no epoch, anything else is (None, 0)."""
+    epoch, _, seq = (value or "").rpartition("-")
+    if not seq.isdigit():
+        return None, 0
+    return epoch or None, int(seq)
+
+
+class JobEventLog:
+    """Append-only event log of one job."""
+
+    def __init__(self, max_events: int):
+        self.max_events = max_events
+        self.events: list[dict] = []
+        self.next_seq = 1
+        self.finished = False
+        self._changed = asyncio.Event()
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest retained event."""
+        return self.events[0]["seq"] if self.events else self.next_seq
+
+    def append(self, event_type: str, data: dict) -> int:
+        seq = self.next_seq
+        self.next_seq += 1
+        self.events.append({"seq": seq, "type": event_type, "ts": time.time(), "data": data})
+        if len(self.events) > self.max_events:
+            del self.events[: len(self.events) - self.max_events]
+        if event_type in TERMINAL_EVENTS:
+            self.finished = True
+
+        # Wake current waiters; later waiters get a fresh event
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+        return seq
+
+    def after(self, cursor: int) -> list[dict]:
+        """Events with seq > cursor (seqs are contiguous, so index directly)."""
+        if not self.events or cursor >= self.events[-1]["seq"]:
+            return []
+        start = max(0, cursor - self.first_seq + 1)
+        return self.events[start:]
+
+
+class JobEventBus:
+    """Registry of job event logs with cursor-based waiting."""
+
+    def __init__(self, max_jobs: int = 200, max_events_per_job: int = 50000):
+        self.max_jobs = max_jobs
+        self.max_events_per_job = max_events_per_job
+        self.epoch = uuid.uuid4().hex[:8]
+        self._logs: OrderedDict[str, JobEventLog] = OrderedDict()
+        self._created = asyncio.Event()
+
+    def _get_or_create(self, job_id: str) -> JobEventLog:
+        log = self._logs.get(job_id)
+        if log is None:
+            log = JobEventLog(self.max_events_per_job)
+            self._logs[job_id] = log
+            self._evict()
+            created, self._created = self._created, asyncio.Event()
+            created.set()
+        return log
+
+    def _evict(self):
+        """Drop the oldest finished logs beyond max_jobs."""
+        excess = len(self._logs) - self.max_jobs
+        if excess <= 0:
+            return
+        for job_id in [jid for jid, log in self._logs.items() if log.finished][:excess]:
+            del self._logs[job_id]
+
+    def publish(self, job_id: str, event_type: str, **data) -> int:
+        """Append an event to a job's log and wake waiters. Returns its seq."""
+        return self._get_or_create(job_id).append(event_type, data)
+
+    def discard(self, job_id: str):
+        """Drop a job's log (e.g. in worker processes, where nobody consumes it)."""
+        self._logs.pop(job_id, None)
+
+    def get_log(self, job_id: str) -> Optional[JobEventLog]:
+        return self._logs.get(job_id)
+
+    def format_cursor(self, seq: int) -> str:
+        """Cursor for clients: seq tagged with this process's epoch."""
+        return f"{self.epoch}-{seq}"
+
+    def can_resume(self, job_id: str, cursor: int, epoch: Optional[str] = None) -> bool:
+        """True if cursor belongs to this process and every event after it is still retained."""
+        if epoch is not None and epoch != self.epoch:
+            return False
+        log = self._logs.get(job_id)
+        return log is not None and cursor >= log.first_seq - 1
+
+    def is_exhausted(self, job_id: str, cursor: int) -> bool:
+        """True if the job's log is finished and cursor is at or past its last event."""
+        log = self._logs.get(job_id)
+        return log is not None and log.finished and cursor >= log.next_seq - 1
+
+    async def wait(self, job_id: str, cursor: int, timeout: float) -> list[dict]:
+        """
+        Return events after cursor, waiting up to timeout for new ones.
+
+        Returns an empty list on timeout, and at once if the log is
+        finished and has nothing after cursor (see is_exhausted). Waiting
+        on a job without a log does not create one; the wait ends when
+        its first event is published.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        log = self._logs.get(job_id)
+        while log is None:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return []
+            try:
+                await asyncio.wait_for(self._created.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return []
+            log = self._logs.get(job_id)
+
+        events = log.after(cursor)
+        if events or log.finished:
+            return events
+
+        changed = log._changed
+        try:
+            await asyncio.wait_for(changed.wait(), timeout=max(deadline - loop.time(), 0))
+        except asyncio.TimeoutError:
+            return []
+        return log.after(cursor)
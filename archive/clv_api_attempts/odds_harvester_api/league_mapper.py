@@ -14,6 +14,7 @@ Includes:
 
 import json
 import logging
+import os
 import re
 from datetime import datetime
 from pathlib import Path
@@ -25,7 +26,9 @@ logger = logging.getLogger("LeagueMapper")
 
 # Path to custom mappings file (user-editable)
 CUSTOM_MAPPINGS_PATH = Path(__file__).parent / "custom_league_mappings.json"
-UNMAPPED_LOG_PATH = Path(__file__).parent / "unmapped_leagues.json"
+UNMAPPED_LOG_PATH = Path(
+    os.getenv("UNMAPPED_LEAGUES_PATH", Path(__file__).parent / "unmapped_leagues.json")
+)
 
 
 # === Static League Aliases ===
@@ -0,0 +1,136 @@
+"""
+Logging Pipeline for the CLV API
+================================
+
+Keeps log formatting and stream I/O off the event loop:
+- The root logger only has a QueueHandler; records whose arguments are
+  immutable are enqueued unformatted
+- A QueueListener thread formats them (text or JSON lines) and writes them
+- Levels can be changed at runtime (see /api/log-level)
+
+Call sites should pass %-style arguments (logger.debug("x %s", y)) on hot
+paths, so disabled levels cost one level check and enabled ones are
+formatted on the listener thread.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+TEXT_DATEFMT = "%Y-%m-%d %H:%M:%S"
+
+# Attributes every LogRecord has; anything else was passed via extra=
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+# Argument types that cannot change between the log call and formatting
+_IMMUTABLE_TYPES = (str, int, float, bool, bytes, type(None))
+
+
+def _stop_listener():
+    """Flush queued records and stop the writer thread (also runs at exit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with extra= fields as top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def _is_immutable(value) -> bool:
+    if isinstance(value, (tuple, frozenset)):
+        return all(_is_immutable(item) for item in value)
+    return isinstance(value, _IMMUTABLE_TYPES)
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that defers formatting when it is safe to.
+
+    The stock prepare() formats the message in the calling thread. The
+    listener shares this process, so records whose args are immutable
+    travel unformatted; others (e.g. a bet dict the caller keeps changing)
+    get their message rendered now. exc_info is kept for the formatter.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Mapping args are the caller's own (mutable) dict
+        if not record.args or (isinstance(record.args, tuple) and _is_immutable(record.args)):
+            return record
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configure_logging(level: str = "INFO", fmt: str = "text") -> logging.handlers.QueueListener:
+    """
+    Route all logging through a queue to a background writer thread.
+
+    fmt is "text" (the classic console format) or "json". Safe to call more
+    than once; the previous listener is stopped first.
+    """
+    global _listener
+
+    _stop_listener()
+
+    stream = logging.StreamHandler(sys.stderr)
+    if fmt == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter(TEXT_FORMAT, datefmt=TEXT_DATEFMT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_LazyQueueHandler(log_queue))
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.unregister(_stop_listener)
+    atexit.register(_stop_listener)
+    return _listener
+
+
+def get_log_levels() -> dict:
+    """Effective level of the root logger and of every logger with its own level."""
+    levels = {"root": logging.getLevelName(logging.getLogger().level)}
+    for name, entry in sorted(logging.root.manager.loggerDict.items()):
+        if isinstance(entry, logging.Logger) and entry.level != logging.NOTSET:
+            levels[name] = logging.getLevelName(entry.level)
+    return levels
+
+
+def set_log_level(level: str, name: Optional[str] = None) -> str:
+    """Set the level of one logger (root if name is None); returns the level name."""
+    numeric = logging.getLevelName(level.upper())
+    if not isinstance(numeric, int):
+        raise ValueError(f"Unknown log level: {level}")
+    logging.getLogger(name).setLevel(numeric)
+    return logging.getLevelName(numeric)
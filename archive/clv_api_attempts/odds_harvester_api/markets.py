@@ -0,0 +1,157 @@
+"""
+Market Scoping
+==============
+
+Works out what a group of bets needs from each odds source, so scrapes
+and API calls request only that:
+- Bet market names (the keys of a payload's match "odds") mapped to
+  OddsHarvester market ids and The Odds API market keys
+- The Odds API bookmaker keys to request instead of whole regions
+- Coverage of cached payloads, and merging of top-up fetches into them
+
+Payloads record the markets they were fetched for in "markets", and the
+The Odds API bookmakers each market was requested from in "bookmakers"
+(markets from other sources hold every bookmaker). A later group only
+fetches markets that are missing or lack one of its bookmakers.
+"""
+
+from typing import Callable, Iterable, Optional
+
+from match_index import parse_match_date
+
+# Bet market -> (OddsHarvester market, The Odds API market); None if the source lacks it
+MARKETS = {
+    "1X2": ("1x2", "h2h"),
+    "Over/Under 2.5": ("over_under_2_5", "totals"),
+    "Both Teams to Score": ("btts", None),
+    "Spread": (None, "spreads"),
+}
+
+# Requested when no bet of a group names a known market, and by prefetches
+DEFAULT_MARKETS = frozenset({"1X2", "Over/Under 2.5"})
+
+# normalize_bookmaker() name -> The Odds API bookmaker key
+ODDS_API_BOOKMAKERS = {
+    "pinnacle": "pinnacle",
+    "betfair": "betfair_ex_eu",
+    "smarkets": "smarkets",
+    "matchbook": "matchbook",
+    "williamhill": "williamhill",
+    "ladbrokes": "ladbrokes_uk",
+    "coral": "coral",
+    "paddypower": "paddypower",
+    "unibet": "unibet_eu",
+}
+
+# Always requested: the Pinnacle fallback and the weighted-average reference books
+REFERENCE_BOOKMAKERS = ("pinnacle", "betfair", "smarkets", "matchbook")
+
+_FROM_ODDSHARVESTER = {oh: name for name, (oh, _) in MARKETS.items() if oh}
+_FROM_ODDS_API = {key: name for name, (_, key) in MARKETS.items() if key}
+_FROM_ODDS_API_BOOKMAKER = {key: name for name, key in ODDS_API_BOOKMAKERS.items()}
+
+
+def bet_markets(bets: Iterable[dict]) -> frozenset:
+    """Known markets named by the bets; DEFAULT_MARKETS if there are none."""
+    markets = frozenset(bet.get("market") for bet in bets if bet.get("market") in MARKETS)
+    return markets or DEFAULT_MARKETS
+
+
+def oddsharvester_markets(markets: Iterable[str]) -> list[str]:
+    """OddsHarvester market ids for the markets it can scrape."""
+    return sorted(MARKETS[name][0] for name in markets if name in MARKETS and MARKETS[name][0])
+
+
+def odds_api_markets(markets: Iterable[str]) -> list[str]:
+    """The Odds API market keys for the markets it offers."""
+    return sorted(MARKETS[name][1] for name in markets if name in MARKETS and MARKETS[name][1])
+
+
+def from_oddsharvester(market: str) -> str:
+    """Bet market name of an OddsHarvester market id (unknown ids pass through)."""
+    return _FROM_ODDSHARVESTER.get(market, market)
+
+
+def from_odds_api(market: str) -> str:
+    """Bet market name of The Odds API market key (unknown keys pass through)."""
+    return _FROM_ODDS_API.get(market, market)
+
+
+def odds_api_bookmakers(bets: Iterable[dict], normalize: Callable[[str], str]) -> list[str]:
+    """The Odds API bookmaker keys for the bets' bookmakers plus the reference books."""
+    names = set(REFERENCE_BOOKMAKERS)
+    names.update(normalize(bet.get("bookmaker", "")) for bet in bets)
+    return sorted(ODDS_API_BOOKMAKERS[name] for name in names if name in ODDS_API_BOOKMAKERS)
+
+
+def from_odds_api_bookmaker(key: str) -> str:
+    """normalize_bookmaker() name of The Odds API bookmaker key."""
+    return _FROM_ODDS_API_BOOKMAKER.get(key, key)
+
+
+def payload_markets(payload: Optional[dict]) -> frozenset:
+    """
+    Markets a cached payload was fetched for.
+
+    Payloads cached before market scoping report the markets they hold.
+    """
+    if not payload:
+        return frozenset()
+    if "markets" in payload:
+        return frozenset(payload["markets"])
+    return frozenset(
+        market for match in payload.get("matches", []) for market in match.get("odds", {})
+    )
+
+
+def payload_bookmakers(payload: Optional[dict], markets: Iterable[str]) -> frozenset:
+    """The Odds API bookmakers the payload's given markets were fetched from."""
+    if not payload:
+        return frozenset()
+    restricted = payload.get("bookmakers", {})
+    return frozenset(key for market in markets for key in restricted.get(market, ()))
+
+
+def missing_markets(
+    payload: Optional[dict], markets: Iterable[str], bookmakers: Iterable[str]
+) -> frozenset:
+    """
+    Markets a payload cannot answer for the given The Odds API bookmakers.
+
+    A market is missing if the payload was not fetched for it, or fetched
+    it from The Odds API without one of the bookmakers.
+    """
+    covered = payload_markets(payload)
+    restricted = payload.get("bookmakers", {}) if payload else {}
+    wanted = frozenset(bookmakers)
+    return frozenset(
+        market
+        for market in markets
+        if market not in covered or (market in restricted and not wanted <= set(restricted[market]))
+    )
+
+
+def merge_matches(
+    matches: list[dict], extra: list[dict], normalize: Callable[[str], str]
+) -> list[dict]:
+    """
+    Add the odds of extra to the same matches in matches (same teams and day).
+
+    Matches only in extra are appended; the inputs are not modified.
+    """
+
+    def key(match: dict) -> tuple:
+        return (
+            normalize(match.get("home_team", "")),
+            normalize(match.get("away_team", "")),
+            parse_match_date(match.get("date")),
+        )
+
+    merged = {key(match): {**match, "odds": dict(match.get("odds", {}))} for match in matches}
+    for match in extra:
+        existing = merged.get(key(match))
+        if existing is None:
+            merged[key(match)] = match
+        else:
+            existing["odds"].update(match.get("odds", {}))
+    return list(merged.values())
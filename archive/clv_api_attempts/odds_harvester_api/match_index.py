@@ -0,0 +1,122 @@
+"""
+Match Index for Scraped Odds Payloads
+=====================================
+
+Turns a scraped payload's match list into an indexed table once, so every
+bet in a group is scored against it without re-normalizing team names:
+- Pre-normalized home/away names per match
+- Token blocking keys (3-char token prefixes) for candidate pruning
+- Date bucket per match (candidates more than a day away are skipped)
+
+Each candidate scores as find_best_match would score it, but only matches
+within a day of the bet are candidates (matches without a date always are),
+so a fixture repeated days apart resolves to the nearer date. Token blocking
+skips matches sharing no token prefix with the bet whenever some other match
+does share one; when none does, every in-window match is scored.
+test_match_index.py checks the results against a full find_best_match scan
+over the same window.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Callable, Optional
+
+from fuzzy_matcher import match_score_normalized, normalize_string
+
+# Minimum per-team score, as in find_best_match's default
+TEAM_MIN_SCORE = 0.75
+
+# Matches whose date differs from the bet's by more than this are skipped
+MAX_DAY_DISTANCE = 1
+
+
+def parse_match_date(match_date_str: Any) -> Optional[str]:
+    """Parse a match date ("2025-12-01", "2025-12-01T15:00:00Z", "01.12.2025") to YYYY-MM-DD."""
+    if not match_date_str or not isinstance(match_date_str, str):
+        return None
+    try:
+        if '-' in match_date_str:
+            return datetime.fromisoformat(match_date_str.split('T')[0]).date().isoformat()
+        elif '.' in match_date_str:
+            # DD.MM.YYYY format
+            parts = match_date_str.split('.')
+            return datetime(int(parts[2]), int(parts[1]), int(parts[0])).date().isoformat()
+    except (ValueError, IndexError):
+        pass
+    return None
+
+
+def blocking_keys(name: str) -> set[str]:
+    """Blocking keys of a normalized name: 3-char prefix of each token."""
+    return {token[:3] for token in name.split() if token}
+
+
+class MatchIndex:
+    """Indexed, pre-normalized view of a payload's matches."""
+
+    def __init__(self, matches: list[dict], normalize_team: Callable[[str], str]):
+        self._normalize_team = normalize_team
+        self.matches = matches
+        self._homes: list[str] = []
+        self._aways: list[str] = []
+        self._days: list[Optional[date]] = []
+        self._blocks: dict[str, list[int]] = defaultdict(list)
+
+        for i, match in enumerate(matches):
+            home = self.normalize(match.get("home_team", ""))
+            away = self.normalize(match.get("away_team", ""))
+            day = parse_match_date(match.get("date"))
+            self._homes.append(home)
+            self._aways.append(away)
+            self._days.append(date.fromisoformat(day) if day else None)
+            for key in blocking_keys(home) | blocking_keys(away):
+                self._blocks[key].append(i)
+
+    def normalize(self, team: str) -> str:
+        """Normalize a team name exactly as the matcher compares it."""
+        return normalize_string(self._normalize_team(team))
+
+    def _candidates(self, home: str, away: str, day: Optional[date]) -> list[int]:
+        """Indices of matches sharing a blocking key and within the date bucket."""
+        ids: set[int] = set()
+        for key in blocking_keys(home) | blocking_keys(away):
+            ids.update(self._blocks.get(key, ()))
+        if not ids:
+            # Nothing shares a token prefix - fall back to a full scan
+            ids = set(range(len(self.matches)))
+
+        if day is None:
+            return sorted(ids)
+        return sorted(
+            i for i in ids
+            if self._days[i] is None or abs((self._days[i] - day).days) <= MAX_DAY_DISTANCE
+        )
+
+    def best_match(
+        self, home_team: str, away_team: str, event_date: str = ""
+    ) -> tuple[Optional[dict], float]:
+        """Find the best-scoring match for a bet's teams; returns (match, score)."""
+        home = self.normalize(home_team)
+        away = self.normalize(away_team)
+        if not home or not away:
+            return None, 0.0
+
+        day_str = parse_match_date(event_date)
+        day = date.fromisoformat(day_str) if day_str else None
+
+        best_match = None
+        best_score = 0.0
+        for i in self._candidates(home, away, day):
+            home_score = match_score_normalized(home, self._homes[i])
+            if home_score < TEAM_MIN_SCORE:
+                continue
+            away_score = match_score_normalized(away, self._aways[i])
+            if away_score < TEAM_MIN_SCORE:
+                continue
+
+            score = (round(home_score, 4) + round(away_score, 4)) / 2
+            if score > best_score:
+                best_score = score
+                best_match = self.matches[i]
+
+        return best_match, best_score
@@ -0,0 +1,259 @@
+"""
+Metrics for the CLV Pipeline
+============================
+
+Minimal in-process metrics rendered in the Prometheus text format
+(version 0.0.4) by the /metrics endpoint:
+- Counter: monotonically increasing totals per label set
+- Histogram: fixed-bucket latency distributions per label set
+- Gauges: read from callbacks at scrape time, so they cost nothing between scrapes
+
+Recording is a dict lookup plus a bisect under a per-metric lock: most
+updates come from the event loop, but Database timings are recorded in
+to_thread workers while /metrics renders. Rendering copies each metric's
+series under its lock and formats the copy outside it.
+"""
+
+import asyncio
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Union
+
+# Latency buckets in seconds
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+SLOW_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with positional label values."""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def get(self, *labels) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = list(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(values):
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            )
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram with positional label values."""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple = (),
+        buckets: tuple = SLOW_BUCKETS,
+    ):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bucket] += 1
+            series[1] += value
+            series[2] += 1
+
+    def get_count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def render(self) -> list[str]:
+        with self._lock:
+            series = [
+                (labels, (list(counts), total, count))
+                for labels, (counts, total, count) in self._series.items()
+            ]
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(series):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_str} {count}")
+        return lines
+
+
+class GaugeFunc:
+    """
+    Gauge whose value is read from a callback at scrape time.
+
+    The callback returns a number, or a dict of label-value tuples to
+    numbers; None means the value is currently unknown and is skipped.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        func: Callable[[], Union[None, float, dict]],
+        labelnames: tuple = (),
+    ):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.func = func
+
+    def render(self) -> list[str]:
+        try:
+            value = self.func()
+        except Exception:
+            value = None
+        if value is None:
+            return []
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        samples = value if isinstance(value, dict) else {(): value}
+        for labels, sample in sorted(samples.items()):
+            if sample is None:
+                continue
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(sample)}"
+            )
+        return lines
+
+
+# === Registry ===
+
+_registry: dict[str, Union[Counter, Histogram, GaugeFunc]] = {}
+
+
+def _register(metric):
+    _registry[metric.name] = metric
+    return metric
+
+
+def register_gauge(
+    name: str,
+    help_text: str,
+    func: Callable[[], Union[None, float, dict]],
+    labelnames: tuple = (),
+) -> GaugeFunc:
+    """Register (or replace) a callback gauge."""
+    return _register(GaugeFunc(name, help_text, func, labelnames))
+
+
+def render() -> str:
+    """Render every registered metric in the Prometheus text format."""
+    lines: list[str] = []
+    for metric in list(_registry.values()):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# === Pipeline metrics ===
+
+JOB_QUEUE_WAIT = _register(Histogram(
+    "clv_job_queue_wait_seconds",
+    "Time from job submission to processing start",
+    ("priority",),
+))
+JOBS_TOTAL = _register(Counter(
+    "clv_jobs_total",
+    "Finished jobs by priority class and final status",
+    ("priority", "status"),
+))
+GROUP_DURATION = _register(Histogram(
+    "clv_group_duration_seconds",
+    "Processing time of one (sport, league, date) group",
+    ("status", "cache"),
+))
+SCRAPE_DURATION = _register(Histogram(
+    "clv_scrape_duration_seconds",
+    "Latency of scrapes and API fetches by source and outcome",
+    ("source", "outcome"),
+))
+CACHE_REQUESTS = _register(Counter(
+    "clv_cache_requests_total",
+    "Cache lookups by tier and result",
+    ("tier", "result"),
+))
+MATCH_DURATION = _register(Histogram(
+    "clv_match_duration_seconds",
+    "Time to match one bet against a scraped payload",
+    buckets=FAST_BUCKETS,
+))
+DB_OPERATION = _register(Histogram(
+    "clv_db_operation_seconds",
+    "Latency of Database operations",
+    ("operation",),
+    buckets=FAST_BUCKETS,
+))
+CONCURRENCY_DECISIONS = _register(Counter(
+    "clv_concurrency_decisions_total",
+    "Scrape concurrency controller decisions by action and reason",
+    ("action", "reason"),
+))
+PREFETCH_RUNS = _register(Counter(
+    "clv_prefetch_runs_total",
+    "Kickoff-anchored prefetch scrapes by outcome",
+    ("outcome",),
+))
+JOB_STATUS_REQUESTS = _register(Counter(
+    "clv_job_status_requests_total",
+    "Job status polls by response (full body or 304) and whether they long-polled",
+    ("response", "long_poll"),
+))
+EVENT_LOOP_LAG = _register(Histogram(
+    "clv_event_loop_lag_seconds",
+    "Delay of event loop wakeups beyond their scheduled time",
+    buckets=FAST_BUCKETS,
+))
+
+
+async def monitor_event_loop_lag(interval: float = 0.5):
+    """Sample event loop lag by measuring how late a timed sleep wakes up."""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, time.perf_counter() - start - interval))
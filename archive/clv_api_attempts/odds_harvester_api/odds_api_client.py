@@ -0,0 +1,368 @@
+"""
+The Odds API Client
+===================
+
+App-lifetime client for The Odds API fallback:
+- One pooled httpx.AsyncClient (keep-alive, HTTP/2 when `h2` is installed)
+- Token-bucket limiter whose refill rate spreads the remaining monthly
+  quota (from the x-requests-* headers) over the rest of the month
+- Quota ledger persisted in the `metadata` table so it survives restarts
+- Low-priority requests are deferred, then refused, when budget runs low;
+  high-priority requests may use the reserve
+- Short-TTL response cache keyed on (sport_key, markets), so every group
+  mapping to the same sport key shares one fetch; a group wanting a
+  bookmaker the cached payload lacks refetches the union of bookmakers
+"""
+
+import asyncio
+import importlib.util
+import logging
+import math
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Optional
+
+import metrics
+import tracing
+from concurrency import SingleFlight
+from database import Database
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+ODDS_API_BASE_URL = "https://api.the-odds-api.com/v4"
+
+# httpx (and h2) are imported on first use, not at server startup
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Every 10 bookmakers named in a request are billed as one region
+BOOKMAKERS_PER_REGION = 10
+
+
+class QuotaDeferred(Exception):
+    """Raised when a request is refused to protect the remaining quota."""
+
+
+def seconds_until_quota_reset(now: Optional[datetime] = None) -> float:
+    """Seconds until the start of next month (UTC), when the quota resets."""
+    now = now or datetime.now(timezone.utc)
+    if now.month == 12:
+        reset = datetime(now.year + 1, 1, 1, tzinfo=timezone.utc)
+    else:
+        reset = datetime(now.year, now.month + 1, 1, tzinfo=timezone.utc)
+    return max(1.0, (reset - now).total_seconds())
+
+
+def _covers(source, bookmakers: Optional[frozenset], regions: Optional[str]) -> bool:
+    """True if a payload fetched from source holds the requested bookmakers (or regions)."""
+    if bookmakers is not None:
+        return isinstance(source, frozenset) and bookmakers <= source
+    return source == regions
+
+
+class TokenBucket:
+    """Token bucket with an adjustable refill rate (tokens per second)."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate: float):
+        self._refill()
+        self.rate = max(0.0, rate)
+
+    def try_take(self, cost: float = 1.0) -> bool:
+        self._refill()
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+    def force_take(self, cost: float = 1.0):
+        """Take tokens even if it drives the bucket negative (high priority)."""
+        self._refill()
+        self.tokens -= cost
+
+    def wait_time(self, cost: float = 1.0) -> float:
+        """Seconds until `cost` tokens are available."""
+        self._refill()
+        if self.tokens >= cost:
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (cost - self.tokens) / self.rate
+
+
+class OddsApiClient:
+    """Pooled, quota-aware client for The Odds API."""
+
+    # metadata keys of the persisted quota ledger
+    LEDGER_KEYS = {
+        "remaining": "odds_api_requests_remaining",
+        "used": "odds_api_requests_used",
+        "updated_at": "odds_api_quota_updated_at",
+        "period": "odds_api_quota_period",
+    }
+
+    def __init__(
+        self,
+        database: Database,
+        api_key: str,
+        reserve: int = 50,
+        burst: int = 10,
+        defer_seconds: float = 30.0,
+        cache_ttl: float = 300.0,
+    ):
+        self.db = database
+        self.api_key = api_key
+        self.reserve = reserve
+        self.defer_seconds = defer_seconds
+        self._client: Optional["httpx.AsyncClient"] = None
+
+        self.remaining: Optional[int] = None
+        self.used: Optional[int] = None
+        self._load_ledger()
+
+        self.bucket = TokenBucket(rate=self._budget_rate(), capacity=burst)
+
+        # (sport_key, markets) -> (expires_at, events, cost, source), where
+        # source is the frozenset of bookmakers fetched, or the regions string
+        self.cache_ttl = cache_ttl
+        self._responses: dict[tuple, tuple[float, list, int, object]] = {}
+        self._fetches = SingleFlight()
+
+        # Metrics
+        self.requests = 0
+        self.refused = 0
+        self.deferred = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.quota_saved = 0
+
+    # === Quota ledger ===
+
+    def _load_ledger(self):
+        """Restore the last known quota for the current month from metadata."""
+        period = datetime.now(timezone.utc).strftime("%Y-%m")
+        if self.db.get_metadata(self.LEDGER_KEYS["period"]) != period:
+            return
+        try:
+            remaining = self.db.get_metadata(self.LEDGER_KEYS["remaining"])
+            used = self.db.get_metadata(self.LEDGER_KEYS["used"])
+            self.remaining = int(float(remaining)) if remaining is not None else None
+            self.used = int(float(used)) if used is not None else None
+        except (TypeError, ValueError):
+            self.remaining = self.used = None
+
+    def _save_ledger(self):
+        self.db.set_metadata(self.LEDGER_KEYS["remaining"], self.remaining)
+        self.db.set_metadata(self.LEDGER_KEYS["used"], self.used)
+        self.db.set_metadata(self.LEDGER_KEYS["updated_at"], datetime.now().isoformat())
+        self.db.set_metadata(
+            self.LEDGER_KEYS["period"], datetime.now(timezone.utc).strftime("%Y-%m")
+        )
+
+    def _budget_rate(self) -> float:
+        """Refill rate that spreads the spendable quota over the rest of the month."""
+        if self.remaining is None:
+            return 1.0  # Unknown quota: allow ~1 request/second until headers arrive
+        spendable = max(0, self.remaining - self.reserve)
+        return spendable / seconds_until_quota_reset()
+
+    def _record_quota(self, response: "httpx.Response"):
+        """Update the ledger and limiter from x-requests-* headers."""
+        try:
+            remaining = response.headers.get("x-requests-remaining")
+            used = response.headers.get("x-requests-used")
+            if remaining is None:
+                return
+            self.remaining = int(float(remaining))
+            self.used = int(float(used)) if used is not None else self.used
+        except ValueError:
+            return
+
+        self.bucket.set_rate(self._budget_rate())
+        self._save_ledger()
+        logger.info(f"📊 API Quota: {self.remaining} remaining ({self.used} used)")
+
+    # === Requests ===
+
+    def _get_client(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                base_url=ODDS_API_BASE_URL,
+                timeout=15.0,
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+            )
+        return self._client
+
+    async def _admit(self, cost: int, priority: str):
+        """Apply the quota policy; raises QuotaDeferred if the request is refused."""
+        if self.remaining is not None and self.remaining < cost:
+            self.refused += 1
+            raise QuotaDeferred(f"quota exhausted ({self.remaining} remaining)")
+
+        if priority == "high":
+            self.bucket.force_take(cost)
+            return
+
+        if self.remaining is not None and self.remaining - cost < self.reserve:
+            self.refused += 1
+            raise QuotaDeferred(
+                f"{self.remaining} requests left, keeping {self.reserve} for interactive lookups"
+            )
+
+        wait = self.bucket.wait_time(cost)
+        if wait > self.defer_seconds:
+            self.refused += 1
+            raise QuotaDeferred(f"rate budget exhausted (next token in {wait:.0f}s)")
+        if wait > 0:
+            self.deferred += 1
+            await asyncio.sleep(wait)
+        self.bucket.force_take(cost)
+
+    async def get_odds(
+        self,
+        sport_key: str,
+        regions: Optional[str],
+        markets: str,
+        priority: str = "low",
+        bookmakers: Optional[str] = None,
+    ) -> list[dict]:
+        """
+        Get /v4/sports/{sport_key}/odds, served from the response cache when fresh.
+
+        The payload covers every event for the sport key, so callers filter
+        by date locally. Concurrent misses for the same key share one fetch.
+        bookmakers (comma-separated keys) replaces regions when given; a
+        payload fetched for a superset of them is served as is, otherwise
+        the union with the cached bookmakers is fetched (as missing_markets
+        tops up league payloads), so groups keep sharing one entry.
+        """
+        key = (sport_key, markets)
+        wanted = frozenset(bookmakers.split(",")) if bookmakers else None
+        while True:
+            cached = self._responses.get(key)
+            fresh = cached is not None and cached[0] > time.monotonic()
+            if fresh and _covers(cached[3], wanted, regions):
+                self.cache_hits += 1
+                self.quota_saved += cached[2]
+                metrics.CACHE_REQUESTS.inc("odds_api", "hit")
+                return cached[1]
+
+            if wanted is not None and fresh and isinstance(cached[3], frozenset):
+                fetch_books = ",".join(sorted(wanted | cached[3]))
+            else:
+                fetch_books = bookmakers
+            joined = self._fetches.is_in_flight(key)
+            events, cost, source = await self._fetches.do(
+                key, lambda: self._fetch_odds(sport_key, regions, markets, priority, fetch_books)
+            )
+            if not joined:
+                self.cache_misses += 1
+                metrics.CACHE_REQUESTS.inc("odds_api", "miss")
+                return events
+            if _covers(source, wanted, regions):
+                # Served by a fetch another group started
+                self.cache_hits += 1
+                self.quota_saved += cost
+                metrics.CACHE_REQUESTS.inc("odds_api", "hit")
+                return events
+            # The joined fetch lacked some of our bookmakers: top it up
+
+    async def _fetch_odds(
+        self,
+        sport_key: str,
+        regions: Optional[str],
+        markets: str,
+        priority: str,
+        bookmakers: Optional[str] = None,
+    ) -> tuple[list[dict], int, object]:
+        """
+        Fetch odds from the API and cache the payload with its source.
+
+        Quota cost is markets x regions, as billed by The Odds API; a
+        bookmaker list counts as one region per BOOKMAKERS_PER_REGION books.
+        """
+        if bookmakers:
+            region_count = math.ceil(len(bookmakers.split(",")) / BOOKMAKERS_PER_REGION)
+        else:
+            region_count = len(regions.split(","))
+        cost = max(1, len(markets.split(",")) * region_count)
+        start = time.perf_counter()
+        try:
+            with tracing.span("odds_api.admit", cost=cost, priority=priority):
+                await self._admit(cost, priority)
+        except QuotaDeferred:
+            metrics.SCRAPE_DURATION.observe(time.perf_counter() - start, "odds_api", "deferred")
+            raise
+
+        params = {
+            "apiKey": self.api_key,
+            "markets": markets,
+            "oddsFormat": "decimal",
+            "dateFormat": "iso",
+        }
+        if bookmakers:
+            params["bookmakers"] = bookmakers
+        else:
+            params["regions"] = regions
+        start = time.perf_counter()
+        try:
+            with tracing.span("odds_api.fetch", sport_key=sport_key) as span:
+                response = await self._get_client().get(f"/sports/{sport_key}/odds", params=params)
+                self.requests += 1
+                span.set(status=response.status_code, http_version=response.http_version)
+                self._record_quota(response)
+                response.raise_for_status()
+                events = response.json()
+        except Exception:
+            metrics.SCRAPE_DURATION.observe(time.perf_counter() - start, "odds_api", "error")
+            raise
+        metrics.SCRAPE_DURATION.observe(
+            time.perf_counter() - start, "odds_api", "success" if events else "empty"
+        )
+
+        try:
+            cost = int(response.headers.get("x-requests-last", cost))
+        except ValueError:
+            pass
+
+        source = frozenset(bookmakers.split(",")) if bookmakers else regions
+        now = time.monotonic()
+        self._responses = {k: v for k, v in self._responses.items() if v[0] > now}
+        self._responses[(sport_key, markets)] = (now + self.cache_ttl, events, cost, source)
+        return events, cost, source
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def get_stats(self) -> dict:
+        return {
+            "remaining": self.remaining,
+            "used": self.used,
+            "reserve": self.reserve,
+            "refill_per_hour": round(self.bucket.rate * 3600, 2),
+            "tokens": round(self.bucket.tokens, 2),
+            "requests": self.requests,
+            "deferred": self.deferred,
+            "refused": self.refused,
+            "http2": HTTP2_AVAILABLE,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "quota_saved": self.quota_saved,
+        }
@@ -0,0 +1,207 @@
+"""
+Date-Seeking Pagination for Historic Results
+============================================
+
+OddsPortal lists a season's results newest first, ~50 matches per page.
+Instead of scraping pages from the start until a date turns up:
+- Each probed page is reduced to its (oldest, newest) match dates, read
+  off the date headers of the results list
+- locate_pages() binary-searches those boundaries for the page(s) holding
+  a target date, so any date is found in O(log pages) page loads
+- Boundaries are cached per league season (season_pages table), so a warm
+  lookup needs no probes at all
+- ResultsPages then scrapes only the located pages' matches
+
+ResultsPages drives OddsHarvester's page-level scraper methods; if the
+installed OddsHarvester lacks them, PageSeekUnsupported is raised and the
+caller falls back to scrape_historic().
+"""
+
+import re
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+# Results page loads (probes) use a shorter timeout than match scraping
+PAGE_LOAD_TIMEOUT_MS = 30000
+
+_MONTHS = {
+    month: index
+    for index, month in enumerate(
+        ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1
+    )
+}
+# Date headers: "18 May 2025", or "Today, 18 May" / "Yesterday, 17 May" for recent days
+_DATE_HEADER = re.compile(r"\b(\d{1,2}) (Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* (\d{4})\b")
+_RELATIVE_HEADER = re.compile(r"\b(Today|Yesterday)\b")
+
+PageRange = tuple[str, str]  # (oldest, newest) match date on a page, YYYY-MM-DD
+
+
+class PageSeekUnsupported(Exception):
+    """Raised when results pages cannot be probed with the installed scraper."""
+
+
+def parse_page_dates(text: str, today: Optional[date] = None) -> Optional[PageRange]:
+    """(oldest, newest) date among the date headers of a results page's text."""
+    today = today or datetime.now().date()
+    dates = set()
+    for day, month, year in _DATE_HEADER.findall(text):
+        try:
+            dates.add(date(int(year), _MONTHS[month.lower()], int(day)).isoformat())
+        except ValueError:
+            continue
+    for word in _RELATIVE_HEADER.findall(text):
+        dates.add((today if word == "Today" else today - timedelta(days=1)).isoformat())
+    if not dates:
+        return None
+    return min(dates), max(dates)
+
+
+async def locate_pages(
+    target: str,
+    page_count: int,
+    probe: Callable[[int], Awaitable[PageRange]],
+) -> list[int]:
+    """
+    Pages (ascending) whose matches include target, or [] if none do.
+
+    Pages run newest to oldest, so the search moves to lower page numbers
+    for newer dates. A date at a page boundary may continue on the
+    neighbouring page, which is probed and included if it does. probe
+    should serve cached boundaries itself; each uncached call is a page load.
+    """
+    low, high = 1, page_count
+    found = None
+    while low <= high:
+        middle = (low + high) // 2
+        oldest, newest = await probe(middle)
+        if target > newest:
+            high = middle - 1
+        elif target < oldest:
+            low = middle + 1
+        else:
+            found = middle
+            break
+    if found is None:
+        return []  # Newer than every result, older than the season, or a day without matches
+
+    pages = [found]
+    page = found
+    while page > 1 and (await probe(page))[1] == target:
+        if (await probe(page - 1))[0] > target:
+            break
+        page -= 1
+        pages.insert(0, page)
+    page = found
+    while page < page_count and (await probe(page))[0] == target:
+        if (await probe(page + 1))[1] < target:
+            break
+        page += 1
+        pages.append(page)
+    return pages
+
+
+def complete_dates(
+    pages: list[int],
+    page_count: int,
+    ranges: dict[int, PageRange],
+) -> Optional[PageRange]:
+    """
+    Date span whose matches are all on the given contiguous pages.
+
+    The newest day of the first page and the oldest day of the last page
+    may continue on the neighbouring (unscraped) page; they only count if
+    the neighbour is known to start on another day or there is none.
+    Returns None if no full day is covered.
+    """
+    first, last = pages[0], pages[-1]
+    oldest, newest = ranges[last][0], ranges[first][1]
+
+    if first > 1 and (first - 1 not in ranges or ranges[first - 1][0] <= newest):
+        newest = (date.fromisoformat(newest) - timedelta(days=1)).isoformat()
+    if last < page_count and (last + 1 not in ranges or ranges[last + 1][1] >= oldest):
+        oldest = (date.fromisoformat(oldest) + timedelta(days=1)).isoformat()
+    return (oldest, newest) if oldest <= newest else None
+
+
+def dates_between(oldest: str, newest: str) -> list[str]:
+    """Every date from oldest to newest (YYYY-MM-DD), inclusive."""
+    start, end = date.fromisoformat(oldest), date.fromisoformat(newest)
+    return [(start + timedelta(days=offset)).isoformat() for offset in range((end - start).days + 1)]
+
+
+class ResultsPages:
+    """Results pages of one league season, loaded through an OddsHarvester scraper."""
+
+    REQUIRED = ("_prepare_page_for_scraping", "_get_pagination_info", "extract_match_links", "extract_match_odds")
+
+    def __init__(self, scraper, sport: str, league: str, season: str):
+        missing = [name for name in self.REQUIRED if not hasattr(scraper, name)]
+        if missing:
+            raise PageSeekUnsupported(f"scraper lacks {', '.join(missing)}")
+        try:
+            from core.url_builder import URLBuilder
+        except ImportError as e:
+            raise PageSeekUnsupported(f"URL builder unavailable: {e}") from e
+
+        self.scraper = scraper
+        self.sport = sport
+        self.base_url = URLBuilder.get_historic_matches_url(sport=sport, league=league, season=season)
+        self.loads = 0
+
+    def page_url(self, page: int) -> str:
+        return self.base_url if page == 1 else f"{self.base_url}#/page/{page}/"
+
+    async def _open(self, page: int):
+        tab = await self.scraper.playwright_manager.context.new_page()
+        try:
+            await tab.goto(self.page_url(page), timeout=PAGE_LOAD_TIMEOUT_MS, wait_until="domcontentloaded")
+            await self.scraper._prepare_page_for_scraping(page=tab)
+        except BaseException:
+            await tab.close()
+            raise
+        self.loads += 1
+        return tab
+
+    async def first_page(self) -> tuple[int, PageRange]:
+        """Page count and the date range of page 1 (the newest results)."""
+        tab = await self._open(1)
+        try:
+            numbers = await self.scraper._get_pagination_info(page=tab, max_pages=None)
+            dates = parse_page_dates(await tab.inner_text("body"))
+        finally:
+            await tab.close()
+        if dates is None:
+            raise PageSeekUnsupported("no date headers found on the results page")
+        return max(numbers or [1]), dates
+
+    async def page_dates(self, page: int) -> PageRange:
+        """Date range of one results page."""
+        tab = await self._open(page)
+        try:
+            dates = parse_page_dates(await tab.inner_text("body"))
+        finally:
+            await tab.close()
+        if dates is None:
+            raise PageSeekUnsupported(f"no date headers found on results page {page}")
+        return dates
+
+    async def scrape(self, pages: list[int], markets: list[str], target_bookmaker: str) -> list[dict]:
+        """Scrape the matches listed on the given results pages."""
+        links: dict[str, None] = {}
+        for page in pages:
+            tab = await self._open(page)
+            try:
+                links.update(dict.fromkeys(await self.scraper.extract_match_links(page=tab)))
+            finally:
+                await tab.close()
+        if not links:
+            return []
+        self.loads += len(links)
+        return await self.scraper.extract_match_odds(
+            sport=self.sport,
+            match_links=list(links),
+            markets=markets,
+            scrape_odds_history=False,
+            target_bookmaker=target_bookmaker,
+        )
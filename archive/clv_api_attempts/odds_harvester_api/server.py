@@ -7,13 +7,23 @@ data for the Surebet Helper browser extension.
 
 Endpoints:
 - GET  /health                    - Server status, version, database info
-- POST /api/batch-closing-odds    - Submit batch of bets for CLV lookup
-- GET  /api/job-status/{job_id}   - Get job progress and results
+- GET  /metrics                   - Prometheus metrics (latencies, cache tiers, scrapes)
+- POST /api/batch-closing-odds    - Submit batch of bets for CLV lookup (optional deadlineMs)
+- GET  /api/job-status/{job_id}   - Get job progress and results (ETag, ?wait= long-poll)
+- GET  /api/jobs/{job_id}/trace   - Stage timings of a recent job (span tree or Chrome trace)
+- GET  /api/traces                - List jobs with a retained trace
+- POST /api/register-upcoming     - Register upcoming bets for post-kickoff prefetch
+- GET  /api/prefetch-schedule     - List prefetch windows and their status
+- GET  /api/export-results        - Stream all CLV results as NDJSON/CSV (filters, gzip)
+- GET  /api/job-events/{job_id}   - Server-sent event stream of job progress/results
+- WS   /ws/job-events/{job_id}    - WebSocket stream of the same events
 - DELETE /api/clear-cache         - Clear old cached data
+- POST /api/archive-jobs          - Move old finished jobs to the archive DB
 - GET  /api/check-updates         - Check for OddsHarvester updates
 - POST /api/update-harvester      - Pull latest OddsHarvester code
 - GET  /api/cache-stats           - Get cache statistics
 - GET  /api/league-mappings       - Get current league mappings
+- GET/POST /api/log-level         - Inspect or change log levels at runtime
 - POST /api/league-mappings       - Update custom league mappings
 """
 
@@ -21,27 +31,57 @@ import asyncio
 import json
 import logging
 import os
-import requests
 import subprocess
 import sys
 import threading
 import time
 import uuid
-from collections import defaultdict
+import weakref
+from collections import Counter, OrderedDict, defaultdict, deque
 from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
-from datetime import datetime, timedelta
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-from apscheduler.schedulers.background import BackgroundScheduler
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
-from database import Database
-from fuzzy_matcher import find_best_match
+from browser_pool import BrowserPool
+from concurrency import AimdController, FairShareSemaphore, SingleFlight
+from database import Database, cleanup_old_cache, season_for_date
+from export import EXPORT_FORMATS, encode_batches, gzip_chunks
+from health import HealthMonitor
+from job_archive import JobArchive, archive_completed_jobs
+from job_events import TERMINAL_EVENTS, JobEventBus, parse_cursor
+from log_setup import configure_logging, get_log_levels, set_log_level
+from markets import (
+    DEFAULT_MARKETS,
+    bet_markets,
+    from_odds_api,
+    from_odds_api_bookmaker,
+    from_oddsharvester,
+    merge_matches,
+    missing_markets,
+    odds_api_bookmakers,
+    odds_api_markets,
+    oddsharvester_markets,
+    payload_bookmakers,
+    payload_markets,
+)
 from league_mapper import detect_league, get_league_mappings, log_unmapped_league
+from match_index import MatchIndex, parse_match_date
+import metrics
+from season_pages import PageSeekUnsupported, ResultsPages, complete_dates, dates_between, locate_pages
+import tracing
+from odds_api_client import OddsApiClient, QuotaDeferred
+
+if TYPE_CHECKING:
+    from apscheduler.schedulers.background import BackgroundScheduler
 
 # Configuration from environment variables
 ODDS_HARVESTER_PATH = os.getenv(
@@ -49,8 +89,55 @@ ODDS_HARVESTER_PATH = os.getenv(
 )
 MAX_CONCURRENCY = int(os.getenv("MAX_CONCURRENCY", "3"))
 CACHE_RETENTION_DAYS = int(os.getenv("CACHE_RETENTION_DAYS", "30"))
+JOB_ARCHIVE_DAYS = int(os.getenv("JOB_ARCHIVE_DAYS", "14"))
+JOB_RECOVERY_SWEEP_SECONDS = int(os.getenv("JOB_RECOVERY_SWEEP_SECONDS", "300"))
+SEASON_REFRESH_MINUTES = int(os.getenv("SEASON_REFRESH_MINUTES", "60"))
+# Time allowed to load one results page while seeking a date
+PAGE_PROBE_TIMEOUT_SECONDS = int(os.getenv("PAGE_PROBE_TIMEOUT_SECONDS", "30"))
+BROWSER_MEMORY_MB = int(os.getenv("BROWSER_MEMORY_MB", "1024"))
+BROWSER_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", "200"))
+BROWSER_MAX_RSS_MB = int(os.getenv("BROWSER_MAX_RSS_MB", "1536"))
+ODDS_API_RESERVE = int(os.getenv("ODDS_API_RESERVE", "50"))
+ODDS_API_CACHE_TTL = int(os.getenv("ODDS_API_CACHE_TTL", "300"))
+PAYLOAD_CACHE_SIZE = 128  # Decoded league payloads kept in memory
+JOB_EVENTS_KEEPALIVE_SECONDS = 15
+JOB_STATUS_MAX_WAIT_SECONDS = 60  # Upper bound for ?wait= long-polls
 API_HOST = os.getenv("API_HOST", "127.0.0.1")
 API_PORT = int(os.getenv("API_PORT", "8765"))
+SMALL_BATCH_SIZE = 20  # Batches up to this size are answered synchronously
+# Scrape slot weights per job priority class (set at submission)
+PRIORITY_WEIGHTS = {"interactive": 8.0, "routine": 3.0, "backfill": 1.0}
+# Seconds of waiting that earn a queued scrape one slot's worth of credit
+PRIORITY_AGING_SECONDS = int(os.getenv("PRIORITY_AGING_SECONDS", "30"))
+# Observation window of the scrape concurrency controller
+CONCURRENCY_WINDOW_SECONDS = int(os.getenv("CONCURRENCY_WINDOW_SECONDS", "30"))
+# How long shutdown waits for in-flight groups before cancelling them
+SHUTDOWN_DRAIN_SECONDS = int(os.getenv("SHUTDOWN_DRAIN_SECONDS", "30"))
+# Result store; may point at a store shared with worker processes/hosts
+DB_PATH = os.getenv("CLV_DB_PATH", str(Path(__file__).parent / "clv_cache.db"))
+ARCHIVE_DB_PATH = os.getenv(
+    "CLV_ARCHIVE_DB_PATH", str(Path(DB_PATH).with_name("clv_archive.db"))
+)
+# "inline": this process scrapes and matches; "queue": worker.py processes do
+WORKER_MODE = os.getenv("CLV_WORKER_MODE", "inline")
+# Health snapshot refresh, and OddsHarvester probe interval
+HEALTH_REFRESH_SECONDS = int(os.getenv("HEALTH_REFRESH_SECONDS", "15"))
+HEALTH_PROBE_HOURS = float(os.getenv("HEALTH_PROBE_HOURS", "6"))
+# Registered upcoming windows are scraped this long after their last kickoff
+PREFETCH_DELAY_MINUTES = int(os.getenv("PREFETCH_DELAY_MINUTES", "120"))
+PREFETCH_RETRY_MINUTES = int(os.getenv("PREFETCH_RETRY_MINUTES", "30"))
+PREFETCH_MAX_ATTEMPTS = int(os.getenv("PREFETCH_MAX_ATTEMPTS", "3"))
+PREFETCH_POLL_SECONDS = 60  # Longest sleep of the prefetch loop
+WORKER_LEASE_SECONDS = int(os.getenv("WORKER_LEASE_SECONDS", "60"))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # "text" or "json"
+# Unmatched bets quoted in each group's summary line (per-bet lines are DEBUG)
+LOG_SAMPLE_PER_GROUP = int(os.getenv("LOG_SAMPLE_PER_GROUP", "3"))
+# Span trees kept in memory for /api/jobs/{id}/trace
+TRACE_RETAIN_JOBS = int(os.getenv("TRACE_RETAIN_JOBS", "100"))
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "5000"))
+WORKER_POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", "1.0"))
+WORKER_MAX_ATTEMPTS = int(os.getenv("WORKER_MAX_ATTEMPTS", "3"))
 
 # Shared config directory (accessible by both extension and server)
 if os.name == 'nt':  # Windows
@@ -58,58 +145,54 @@ if os.name == 'nt':  # Windows
 else:  # macOS/Linux
     SHARED_CONFIG_DIR = Path.home() / '.surebethelper'
 
-SHARED_CONFIG_DIR.mkdir(parents=True, exist_ok=True)
 SHARED_CONFIG_PATH = SHARED_CONFIG_DIR / 'config.json'
 
-# Try to get The Odds API key from multiple sources (PRIORITY ORDER)
-# 1. Shared config.json (preferred - used by extension)
-# 2. Local config.json (legacy support)
-# 3. Environment variable (fallback)
-THE_ODDS_API_KEY = ""
-config_source = None
 
-# Priority 1: Shared config directory
-if SHARED_CONFIG_PATH.exists():
-    try:
-        with open(SHARED_CONFIG_PATH) as f:
-            config = json.load(f)
-            THE_ODDS_API_KEY = config.get("THE_ODDS_API_KEY", "")
-            if THE_ODDS_API_KEY:
-                config_source = f"shared config ({SHARED_CONFIG_PATH})"
-    except Exception as e:
-        pass  # Will try next source
+@lru_cache(maxsize=1)
+def load_odds_api_key() -> tuple[str, Optional[str]]:
+    """
+    Find The Odds API key on first use. Returns (key, source).
 
-# Priority 2: Local config.json (legacy)
-if not THE_ODDS_API_KEY:
+    Sources in PRIORITY ORDER:
+    1. Shared config.json (preferred - used by extension)
+    2. Local config.json (legacy support)
+    3. Environment variable (fallback)
+    """
+    SHARED_CONFIG_DIR.mkdir(parents=True, exist_ok=True)
     local_config_path = Path(__file__).parent / "config.json"
-    if local_config_path.exists():
+
+    for config_path, source in (
+        (SHARED_CONFIG_PATH, f"shared config ({SHARED_CONFIG_PATH})"),
+        (local_config_path, f"local config ({local_config_path})"),
+    ):
+        if not config_path.exists():
+            continue
         try:
-            with open(local_config_path) as f:
-                config = json.load(f)
-                THE_ODDS_API_KEY = config.get("THE_ODDS_API_KEY", "")
-                if THE_ODDS_API_KEY:
-                    config_source = f"local config ({local_config_path})"
-        except Exception as e:
+            with open(config_path) as f:
+                key = json.load(f).get("THE_ODDS_API_KEY", "")
+            if key:
+                return key, source
+        except Exception:
             pass  # Will try next source
 
-# Priority 3: Environment variable
-if not THE_ODDS_API_KEY:
-    THE_ODDS_API_KEY = os.getenv("THE_ODDS_API_KEY", "")
-    if THE_ODDS_API_KEY:
-        config_source = "environment variable"
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S"
-)
+    key = os.getenv("THE_ODDS_API_KEY", "")
+    return key, ("environment variable" if key else None)
+
+# Configure logging: records are formatted and written on a background thread
+configure_logging(LOG_LEVEL, LOG_FORMAT)
+tracing.configure(TRACE_RETAIN_JOBS, TRACE_MAX_SPANS)
 logger = logging.getLogger(__name__)
 
 # Global state
 db: Optional[Database] = None
+job_archive: Optional[JobArchive] = None
 job_processor: Optional["JobProcessor"] = None
-scheduler: Optional[BackgroundScheduler] = None
+health_monitor: Optional[HealthMonitor] = None
+scheduler: Optional["BackgroundScheduler"] = None
+background_tasks: set[asyncio.Task] = set()
+
+# Priority and timing of the (sport, league, date) group the current task is working for
+_group_context: ContextVar[Optional[dict]] = ContextVar("group_context", default=None)
 
 
 # === Helper Functions ===
@@ -148,6 +231,56 @@ def map_to_odds_api_sport(sport: str, league: str) -> Optional[str]:
     return None
 
 
+@lru_cache(maxsize=1)
+def load_oddsharvester() -> tuple:
+    """
+    Import the OddsHarvester scraper classes once, on first use.
+
+    Raises ImportError if OddsHarvester is not installed; the failure is
+    not cached, so installing it does not require a restart.
+    """
+    harvester_src = str(Path(ODDS_HARVESTER_PATH) / "src")
+    if harvester_src not in sys.path:
+        sys.path.insert(0, harvester_src)
+    from core.odds_portal_scraper import OddsPortalScraper
+    from core.playwright_manager import PlaywrightManager
+    from core.browser_helper import BrowserHelper
+    from core.odds_portal_market_extractor import OddsPortalMarketExtractor
+
+    return OddsPortalScraper, PlaywrightManager, BrowserHelper, OddsPortalMarketExtractor
+
+
+async def start_oddsharvester_scraper():
+    """Create an OddsHarvester scraper with a started headless browser."""
+    OddsPortalScraper, PlaywrightManager, BrowserHelper, OddsPortalMarketExtractor = (
+        load_oddsharvester()
+    )
+
+    # Initialize components
+    playwright_manager = PlaywrightManager()
+    browser_helper = BrowserHelper()
+    market_extractor = OddsPortalMarketExtractor(browser_helper)
+
+    scraper = OddsPortalScraper(
+        playwright_manager=playwright_manager,
+        browser_helper=browser_helper,
+        market_extractor=market_extractor,
+        preview_submarkets_only=False
+    )
+
+    # Start browser with timeout
+    await asyncio.wait_for(
+        scraper.start_playwright(headless=True),
+        timeout=30
+    )
+    return scraper
+
+
+async def stop_oddsharvester_scraper(scraper):
+    """Stop the browser of an OddsHarvester scraper."""
+    await scraper.stop_playwright()
+
+
 def map_to_oddsharvester_params(sport: str, league: str) -> Optional[tuple]:
     """Map sport/league to OddsHarvester format (sport, league)."""
     sport_map = {
@@ -203,6 +336,26 @@ class BatchRequest(BaseModel):
     fallbackStrategy: str = Field(
         default="pinnacle", pattern="^(exact|pinnacle|weighted_avg)$"
     )
+    # Small batches only: respond after this many ms with whatever has
+    # finished and keep processing the rest in the background
+    deadlineMs: Optional[int] = Field(default=None, ge=0, le=300000)
+    # Scheduling class; defaults to interactive for small batches, else routine
+    priority: Optional[str] = Field(
+        default=None, pattern="^(interactive|routine|backfill)$"
+    )
+
+
+class RegisterUpcomingRequest(BaseModel):
+    """Upcoming bets whose closing odds should be prefetched after kickoff."""
+
+    bets: list[BetRequest]
+
+
+class LogLevelRequest(BaseModel):
+    """Runtime log level change."""
+
+    level: str = Field(pattern="^(?i:debug|info|warning|error|critical)$")
+    logger: Optional[str] = None  # Logger name; root if omitted
 
 
 class JobResponse(BaseModel):
@@ -221,6 +374,8 @@ class JobStatusResponse(BaseModel):
     progress: dict
     results: list[dict]
     error: Optional[str] = None
+    archived: bool = False
+    priority: Optional[str] = None
 
 
 class HealthResponse(BaseModel):
@@ -236,6 +391,16 @@ class HealthResponse(BaseModel):
     active_concurrency: int
     recommended_concurrency: int
     health_state: str
+    health_probe: Optional[dict] = None
+    snapshot_at: Optional[str] = None
+    concurrency_controller: Optional[dict] = None
+    worker_mode: str = "inline"
+    task_queue: Optional[dict] = None
+    dispatch_latency_ms: Optional[dict] = None
+    scheduler: Optional[dict] = None
+    scrape_dedup: Optional[dict] = None
+    browser_pool: Optional[dict] = None
+    odds_api_quota: Optional[dict] = None
 
 
 class CacheStatsResponse(BaseModel):
@@ -263,146 +428,444 @@ class UpdateCheckResponse(BaseModel):
 class JobProcessor:
     """Background processor for CLV jobs."""
 
-    def __init__(self, database: Database, max_workers: int = 3):
+    def __init__(self, database: Database, max_workers: int = 3, mode: str = "inline"):
         self.db = database
         self.max_workers = max_workers
-        self.current_workers = max_workers
+        # In "queue" mode groups are enqueued for worker.py processes
+        self.mode = mode
+        self._watched_jobs: dict[str, set] = {}
+        # AIMD controller for the scrape slot limit, starting at half capacity
+        self.concurrency = AimdController(
+            min_limit=1,
+            max_limit=max_workers,
+            initial=max(1, max_workers // 2),
+            memory_per_worker_mb=BROWSER_MEMORY_MB,
+            max_rss_mb=BROWSER_MAX_RSS_MB,
+        )
+        self.current_workers = self.concurrency.limit
+        self._contended_grants = 0
         self.running = False
         self._lock = asyncio.Lock()
         self._active_jobs: dict[str, dict] = {}
         self._background_tasks: set = set()
+        # Scrape slots shared by all groups of all jobs, weighted by priority class
+        self._scrape_slots = FairShareSemaphore(
+            self.current_workers, PRIORITY_WEIGHTS, PRIORITY_AGING_SECONDS
+        )
+        # In-flight scrapes keyed on scrape target, shared across jobs
+        self._scrape_flights = SingleFlight()
+        # Per-season locks serialising results page seeks and scrapes
+        self._season_locks: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+        # Progress events streamed to SSE/WebSocket clients
+        self.events = JobEventBus()
+        # Decoded league payloads with their match index, keyed on cache row version
+        self._payload_cache: OrderedDict = OrderedDict()
+        # App-lifetime Odds API client with quota ledger
+        self.odds_api = OddsApiClient(
+            database,
+            load_odds_api_key()[0],
+            reserve=ODDS_API_RESERVE,
+            cache_ttl=ODDS_API_CACHE_TTL,
+        )
+        # Long-lived headless browsers reused across scrapes
+        self.browser_pool = BrowserPool(
+            create=start_oddsharvester_scraper,
+            close=stop_oddsharvester_scraper,
+            max_size=max_workers,
+            memory_per_browser_mb=BROWSER_MEMORY_MB,
+            max_pages=BROWSER_MAX_PAGES,
+            max_rss_mb=BROWSER_MAX_RSS_MB,
+        )
+        # Wakeup queue of (job_id, queued_at, priority) signalled by create_batch_job
+        self._wakeup: asyncio.Queue = asyncio.Queue()
+        # Recent queue-to-start latencies in milliseconds, per priority class
+        self._dispatch_latencies: dict[str, deque] = {
+            priority: deque(maxlen=500) for priority in PRIORITY_WEIGHTS
+        }
+        self._lag_monitor: Optional[asyncio.Task] = None
+        # Kickoff-anchored prefetch scrapes, woken early by new registrations
+        self._prefetch_wakeup = asyncio.Event()
+        self._prefetch_tasks: set = set()
+        self._register_gauges()
+
+    def _register_gauges(self):
+        """Expose live processor state as /metrics gauges (read at scrape time)."""
+        slots = self._scrape_slots
+        metrics.register_gauge(
+            "clv_active_jobs", "Jobs currently being processed", lambda: len(self._active_jobs)
+        )
+        metrics.register_gauge(
+            "clv_scrape_slots_limit", "Current scrape concurrency limit", lambda: slots.limit
+        )
+        metrics.register_gauge(
+            "clv_scrape_slots_in_use", "Scrape slots currently held", lambda: slots.in_use
+        )
+        metrics.register_gauge(
+            "clv_scrape_slots_waiting",
+            "Scrapes waiting for a slot by priority class",
+            lambda: {
+                (cls,): stats["waiting"] for cls, stats in slots.get_stats()["classes"].items()
+            },
+            ("priority",),
+        )
+        metrics.register_gauge(
+            "clv_concurrency_baseline_latency_seconds",
+            "Healthy scrape latency learned by the concurrency controller",
+            lambda: self.concurrency.baseline_latency,
+        )
+        metrics.register_gauge(
+            "clv_browser_pool_live", "Started headless browsers", lambda: self.browser_pool.live
+        )
+        metrics.register_gauge(
+            "clv_odds_api_quota_remaining",
+            "Remaining monthly The Odds API requests (last known)",
+            lambda: self.odds_api.remaining,
+        )
 
-    async def start(self):
-        """Start the job processor."""
+    async def start(self, dispatch: bool = True):
+        """
+        Start the job processor.
+
+        With dispatch=False (worker processes) only the scrape machinery is
+        started; jobs are not picked up from the queue.
+        """
         self.running = True
-        # Start background processing loop
-        asyncio.create_task(self._process_loop())
+        if dispatch:
+            # Jobs interrupted by a crash/restart resume from their checkpoints
+            interrupted = self.db.requeue_interrupted_jobs()
+            if interrupted:
+                logger.info(f"♻️ Resuming {len(interrupted)} interrupted jobs from checkpoints")
+            # Start background processing loop
+            asyncio.create_task(self._process_loop())
+            # Prefetch windows cut short by a restart are scraped again
+            self.db.reset_running_prefetches()
+            asyncio.create_task(self._prefetch_loop())
+            if self.mode == "queue":
+                asyncio.create_task(self._watch_loop())
+        asyncio.create_task(self._concurrency_loop())
+        self.browser_pool.start()
+        self._lag_monitor = asyncio.create_task(metrics.monitor_event_loop_lag())
         logger.info(f"Job processor started with max {self.max_workers} workers")
 
     async def stop(self):
         """Stop the job processor."""
         self.running = False
-        # Wait for all background tasks to complete
+        # Wake the process loop so it can exit
+        self._wakeup.put_nowait((None, time.time(), None))
+        # Let in-flight groups finish (no new groups start), then cancel.
+        # Cancelled jobs stay 'processing' and resume on the next start.
         if self._background_tasks:
-            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+            _, pending = await asyncio.wait(
+                set(self._background_tasks), timeout=SHUTDOWN_DRAIN_SECONDS
+            )
+            if pending:
+                logger.warning(
+                    f"⏸️ Drain deadline reached, interrupting {len(pending)} jobs "
+                    f"(they resume on next start)"
+                )
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+        # Running prefetches are re-run on the next start
+        for task in list(self._prefetch_tasks):
+            task.cancel()
+        await asyncio.gather(*self._prefetch_tasks, return_exceptions=True)
+        # Shielded scrapes outlive their cancelled callers; stop them before
+        # their browsers are closed underneath them
+        await self._scrape_flights.cancel_all()
+        await self.browser_pool.close()
+        await self.odds_api.close()
+        if self._lag_monitor:
+            self._lag_monitor.cancel()
         logger.info("Job processor stopped")
 
+    def notify_job_queued(self, job_id: str, priority: str = "routine"):
+        """Signal that a job was inserted with status 'queued'."""
+        self._wakeup.put_nowait((job_id, time.time(), priority))
+
+    def get_dispatch_stats(self) -> Optional[dict]:
+        """Get queue-to-start latency percentiles over recent jobs, per priority class."""
+        by_class = {}
+        for priority, latencies in self._dispatch_latencies.items():
+            if not latencies:
+                continue
+            samples = sorted(latencies)
+            by_class[priority] = {
+                "median": round(samples[len(samples) // 2], 1),
+                "p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 1),
+                "samples": len(samples),
+            }
+        return by_class or None
+
+    def get_scheduler_stats(self) -> dict:
+        """Get fair-share scrape slot usage and slot wait per priority class."""
+        return self._scrape_slots.get_stats()
+
+    def _claim_job(self, job_id: str, queued_at: float, priority: str = "routine") -> bool:
+        """
+        Mark a queued job as processing and register it as active.
+
+        Returns False if the job is already active or no longer queued.
+        No awaits here, so the check-and-insert cannot interleave.
+        """
+        if job_id in self._active_jobs:
+            return False
+        if not self.db.claim_job(job_id):
+            return False
+
+        if priority not in PRIORITY_WEIGHTS:
+            priority = "routine"
+        latency_ms = (time.time() - queued_at) * 1000
+        self._dispatch_latencies[priority].append(latency_ms)
+        metrics.JOB_QUEUE_WAIT.observe(latency_ms / 1000, priority)
+        self._active_jobs[job_id] = {
+            "started": time.time(),
+            "priority": priority,
+            "dispatch_latency_ms": round(latency_ms, 1),
+        }
+        logger.info(f"Dispatched {priority} job {job_id} after {latency_ms:.0f}ms in queue")
+        return True
+
+    def _dispatch_job(
+        self, job_id: str, queued_at: float, priority: str = "routine"
+    ) -> Optional[asyncio.Task]:
+        """Claim a queued job and start processing it in the background."""
+        if not self._claim_job(job_id, queued_at, priority):
+            return None
+
+        task = asyncio.create_task(self._process_job(job_id))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def run_job_now(
+        self, job_id: str, timeout: Optional[float] = None, priority: str = "interactive"
+    ) -> bool:
+        """
+        Claim a queued job, process it in the background and wait for it.
+
+        Waits at most `timeout` seconds (None = until done). The job keeps
+        running if the wait times out or the caller is cancelled.
+        Returns True if the job finished within the wait.
+        """
+        task = self._dispatch_job(job_id, time.time(), priority)
+        if task is None:
+            return False
+        if self.mode == "queue":
+            return await self._wait_for_job_events(job_id, timeout)
+        done, _ = await asyncio.wait({task}, timeout=timeout)
+        return bool(done)
+
+    async def _wait_for_job_events(self, job_id: str, timeout: Optional[float]) -> bool:
+        """Wait for a job's terminal event (queue mode, reported by _watch_loop)."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout is not None else None
+        cursor = 0
+        while True:
+            remaining = deadline - loop.time() if deadline is not None else 60.0
+            if remaining <= 0:
+                return False
+            for event in await self.events.wait(job_id, cursor, timeout=remaining):
+                cursor = event["seq"]
+                if event["type"] in TERMINAL_EVENTS:
+                    return True
+
     def get_active_concurrency(self) -> int:
         """Get current active concurrency level."""
         return self.current_workers
 
     def get_recommended_concurrency(self) -> int:
-        """Calculate recommended concurrency based on available RAM."""
-        try:
-            mem = psutil.virtual_memory()
-            available_gb = mem.available / (1024 ** 3)
-            # Each OddsHarvester process can use ~1-2GB
-            recommended = max(1, min(self.max_workers, int(available_gb / 2)))
-            return recommended
-        except Exception:
-            return self.max_workers
+        """Get the concurrency limit chosen by the AIMD controller."""
+        return self.concurrency.limit
+
+    def get_concurrency_stats(self) -> dict:
+        """Get the controller state and its recent decisions."""
+        return self.concurrency.get_stats()
 
     def _adjust_concurrency(self):
-        """Adjust concurrency based on system resources."""
-        recommended = self.get_recommended_concurrency()
-        if recommended != self.current_workers:
+        """Close a controller window and apply its decision to the scrape slots."""
+        grants = self._scrape_slots.contended_grants
+        saturated = grants > self._contended_grants or self._scrape_slots.waiting > 0
+        self._contended_grants = grants
+        pool = self.browser_pool.get_stats()
+
+        decision = self.concurrency.update(
+            saturated=saturated,
+            browser_rss_mb=pool["browser_rss_mb"],
+            browsers=pool["live"],
+        )
+        metrics.CONCURRENCY_DECISIONS.inc(decision["action"], decision["reason"])
+        if decision["limit"] != self.current_workers:
             logger.info(
-                f"Adjusting concurrency: {self.current_workers} -> {recommended}"
+                f"Adjusting concurrency: {self.current_workers} -> {decision['limit']} "
+                f"({decision['action']}: {decision['reason']})"
             )
-            self.current_workers = recommended
+            self.current_workers = decision["limit"]
+            self._scrape_slots.set_limit(decision["limit"])
 
-    async def _process_loop(self):
-        """Main processing loop."""
+    async def _concurrency_loop(self):
+        """Run the concurrency controller once per window."""
         while self.running:
+            await asyncio.sleep(CONCURRENCY_WINDOW_SECONDS)
             try:
-                # Adjust concurrency every iteration
                 self._adjust_concurrency()
+            except Exception as e:
+                logger.error(f"Error adjusting concurrency: {e}")
 
-                # Get queued jobs
-                queued_jobs = self.db.get_jobs_by_status("queued")
-
-                for job in queued_jobs:
-                    if not self.running:
-                        break
-
-                    job_id = job["id"]
-                    if job_id in self._active_jobs:
-                        continue
+    async def _process_loop(self):
+        """
+        Main processing loop.
 
-                    # Mark as processing
-                    self.db.update_job_status(job_id, "processing")
-                    async with self._lock:
-                        self._active_jobs[job_id] = {"started": time.time()}
+        Jobs are dispatched as soon as create_batch_job signals the wakeup
+        queue. The database poll only runs as a slow recovery sweep for jobs
+        that were queued without a signal (e.g. before a restart).
+        """
+        # Pick up anything left queued from a previous run
+        sweep_due = 0.0
 
-                    # Create async task for job processing
-                    task = asyncio.create_task(self._process_job(job_id))
-                    self._background_tasks.add(task)
-                    task.add_done_callback(self._background_tasks.discard)
+        while self.running:
+            try:
+                if time.time() >= sweep_due:
+                    for job in self.db.get_queued_jobs(list(PRIORITY_WEIGHTS)):
+                        if not self.running:
+                            break
+                        queued_at = datetime.fromisoformat(job["created_at"]).timestamp()
+                        self._dispatch_job(job["id"], queued_at, job["priority"])
+                    sweep_due = time.time() + JOB_RECOVERY_SWEEP_SECONDS
+
+                try:
+                    job_id, queued_at, priority = await asyncio.wait_for(
+                        self._wakeup.get(),
+                        timeout=max(0.0, sweep_due - time.time()),
+                    )
+                except asyncio.TimeoutError:
+                    continue
 
-                # Sleep before next poll
-                await asyncio.sleep(30)
+                if job_id and self.running:
+                    self._dispatch_job(job_id, queued_at, priority)
 
             except Exception as e:
                 logger.error(f"Error in process loop: {e}")
-                await asyncio.sleep(60)
+                await asyncio.sleep(5)
 
     async def _process_job(self, job_id: str):
         """Process a single job."""
+        priority = self._active_jobs.get(job_id, {}).get("priority", "routine")
+        trace_token = tracing.start_job(job_id, priority=priority, mode=self.mode)
         try:
-            logger.info(f"🚀 Starting _process_job for {job_id}")
-            logger.info(f"Processing job {job_id}")
-            bet_requests = self.db.get_bet_requests(job_id)
-            logger.info(f"📦 Retrieved {len(bet_requests)} bet requests from database")
+            with tracing.span("db.load_bets") as span:
+                bet_requests = self.db.get_bet_requests(job_id)
+                span.set(bets=len(bet_requests))
+            logger.info(f"🚀 Processing job {job_id} ({len(bet_requests)} bets)")
 
             if not bet_requests:
                 logger.warning(f"⚠️ No bet requests found for job {job_id}")
                 self.db.update_job_status(job_id, "completed")
+                self.events.publish(job_id, "job_completed", processed=0, total=0)
+                metrics.JOBS_TOTAL.inc(priority, "completed")
                 return
             
-            logger.info(f"🔄 About to call _group_bets with {len(bet_requests)} bets")
             # Group bets by league/date for efficient scraping
-            groups = self._group_bets(bet_requests)
-            logger.info(f"📊 Grouping returned {len(groups)} groups")
-            total_processed = 0
+            with tracing.span("group_bets") as span:
+                groups = self._group_bets(bet_requests)
+                span.set(groups=len(groups))
+            with tracing.span("db.create_job_groups"):
+                self.db.create_job_groups(
+                    job_id,
+                    [
+                        (*group_key, [bet["id"] for bet in group_bets])
+                        for group_key, group_bets in groups.items()
+                    ],
+                    status="queued" if self.mode == "queue" else "pending",
+                )
 
-            for group_key, group_bets in groups.items():
-                if not self.running:
-                    break
+            if self.mode == "queue":
+                # Worker processes lease the groups; _watch_loop reports progress
+                self._watched_jobs.setdefault(job_id, set())
+                self.events.publish(
+                    job_id, "job_started", total=len(bet_requests), groups=len(groups),
+                )
+                logger.info(f"📤 Job {job_id}: {len(groups)} groups queued for workers")
+                self.db.finish_job_if_done(job_id)
+                return
 
-                sport, league, event_date = group_key
-                
-                logger.info(f"🔍 Processing group: {sport}/{league} on {event_date} ({len(group_bets)} bets)")
-
-                # Check cache first
-                cached_data = self.db.get_cached_league_data(sport, league, event_date)
-
-                if not cached_data:
-                    logger.info(f"💾 No cache found, scraping {sport}/{league}...")
-                    # Scrape from OddsHarvester (now async)
-                    scraped_data = await self._scrape_league(sport, league, event_date)
-                    if scraped_data:
-                        logger.info(f"✅ Scraped {len(scraped_data.get('matches', []))} matches")
-                        self.db.cache_league_data(
-                            sport, league, event_date, scraped_data
-                        )
-                        cached_data = scraped_data
-                    else:
-                        logger.warning(f"⚠️ No data from scraping")
-                else:
-                    logger.info(f"📦 Using cached data for {sport}/{league}")
+            # Resume from checkpoints: skip finished groups and already matched bets
+            finished_groups = {
+                (group["sport"], group["league"], group["event_date"])
+                for group in self.db.get_job_groups(job_id)
+                if group["status"] == "completed"
+            }
+            already_processed = sum(1 for bet in bet_requests if bet.get("processed_at"))
+            groups = {
+                group_key: [bet for bet in group_bets if not bet.get("processed_at")]
+                for group_key, group_bets in groups.items()
+                if group_key not in finished_groups
+            }
+            groups = {group_key: group_bets for group_key, group_bets in groups.items() if group_bets}
+            if already_processed:
+                logger.info(
+                    f"♻️ Resuming job {job_id}: {already_processed} bets already processed, "
+                    f"{len(groups)} groups left"
+                )
+            self.events.publish(
+                job_id, "job_started",
+                total=len(bet_requests), groups=len(groups), resumed=already_processed,
+            )
 
-                # Match bets to scraped data
-                logger.info(f"🎯 Matching {len(group_bets)} bets to odds data...")
-                for bet in group_bets:
-                    logger.info(f"   Processing: {bet.get('home_team')} vs {bet.get('away_team')}")
-                    result = self._match_bet_to_odds(bet, cached_data)
-                    logger.info(f"   Result: closingOdds={result.get('closingOdds')}, score={result.get('matchScore')}")
-                    self.db.update_bet_result(bet["id"], result)
-                    total_processed += 1
-                    self.db.update_job_progress(job_id, total_processed)
+            # Run all groups concurrently; scrapes are bounded by the shared
+            # scrape slots, cache hits never wait for a slot
+            progress = {"processed": already_processed, "total": len(bet_requests)}
+            outcomes = await asyncio.gather(
+                *(
+                    self._process_group(job_id, group_key, group_bets, progress, priority)
+                    for group_key, group_bets in groups.items()
+                ),
+                return_exceptions=True,
+            )
+            total_processed = progress["processed"]
+
+            for outcome in outcomes:
+                if isinstance(outcome, asyncio.CancelledError):
+                    raise outcome  # Interrupted groups resume on next start
+
+            if total_processed < len(bet_requests) and not self.running:
+                # Shutdown skipped some groups - leave the job to resume on next start
+                logger.info(
+                    f"⏸️ Job {job_id} paused by shutdown at {total_processed}/{len(bet_requests)} bets"
+                )
+                return
 
-            self.db.update_job_status(job_id, "completed")
-            logger.info(f"Job {job_id} completed: {total_processed} bets processed")
+            # Failed groups are already marked in job_groups; their bets stay
+            # unprocessed while the other groups' results are kept
+            failures = []
+            for (sport, league, event_date), outcome in zip(groups, outcomes):
+                if isinstance(outcome, Exception):
+                    logger.error(
+                        f"❌ Group {sport}/{league} on {event_date} failed in job {job_id}: {outcome}",
+                        exc_info=outcome,
+                    )
+                    failures.append(f"{sport}/{league} on {event_date}: {outcome}")
+                    self.db.log_failure(job_id, "group_error", failures[-1])
+            if failures and len(failures) == len(groups) and not already_processed:
+                error = f"All {len(groups)} groups failed: " + "; ".join(failures)
+                self.db.update_job_status(job_id, "failed", error)
+                self.events.publish(job_id, "job_failed", error=error)
+                metrics.JOBS_TOTAL.inc(priority, "failed")
+                return
+
+            error = None
+            if failures:
+                error = f"{len(failures)} of {len(groups)} groups failed: " + "; ".join(failures)
+            self.db.update_job_status(job_id, "completed", error)
+            self.events.publish(
+                job_id, "job_completed",
+                processed=total_processed, total=len(bet_requests), failed_groups=len(failures),
+            )
+            metrics.JOBS_TOTAL.inc(priority, "completed")
+            logger.info(
+                f"Job {job_id} completed: {total_processed} bets processed"
+                + (f", {len(failures)} groups failed" if failures else "")
+            )
 
         except Exception as e:
             logger.error(f"❌ Error processing job {job_id}: {e}")
@@ -410,18 +873,456 @@ class JobProcessor:
             logger.error(f"❌ Traceback:", exc_info=True)
             self.db.update_job_status(job_id, "failed", str(e))
             self.db.log_failure(job_id, "processing_error", str(e))
+            self.events.publish(job_id, "job_failed", error=str(e))
+            metrics.JOBS_TOTAL.inc(priority, "failed")
 
         finally:
+            tracing.finish_job(trace_token)
             async with self._lock:
                 self._active_jobs.pop(job_id, None)
 
+    @tracing.traced("group")
+    async def _process_group(
+        self,
+        job_id: str,
+        group_key: tuple[str, str, str],
+        group_bets: list[dict],
+        progress: dict,
+        priority: str = "routine",
+        lease_owner: Optional[str] = None,
+    ):
+        """
+        Fetch odds for one (sport, league, date) group and match its bets.
+
+        Workers pass the lease_owner they hold the group under; its row is
+        then only written while the lease is still theirs.
+        """
+        if not self.running:
+            return
+
+        sport, league, event_date = group_key
+        # Only the markets these bets are priced in are fetched
+        markets = bet_markets(group_bets)
+        tracing.annotate(
+            sport=sport, league=league, event_date=event_date, bets=len(group_bets),
+            markets=",".join(sorted(markets)),
+        )
+        group_start = time.perf_counter()
+        # Slot wait is accumulated by _scrape_slot via the context variable
+        timing = {"wait_ms": 0.0, "priority": priority, "job_id": job_id}
+        _group_context.set(timing)
+        scrape_ms = 0.0
+        cache_hit = None
+        status = "failed"
+
+        logger.info(f"🔍 Processing group: {sport}/{league} on {event_date} ({len(group_bets)} bets)")
+        self.db.update_job_group(
+            job_id, sport, league, event_date, lease_owner,
+            status="running", started_at=datetime.now().isoformat(),
+        )
+        self.events.publish(
+            job_id, "group_started",
+            sport=sport, league=league, event_date=event_date, bets=len(group_bets),
+        )
+
+        try:
+            # Check cache first - cache hits take the fast lane
+            bookmakers = tuple(odds_api_bookmakers(group_bets, normalize_bookmaker))
+            with tracing.span("cache.lookup") as span:
+                cached_data, match_index = self._get_cached_payload(sport, league, event_date)
+                missing = missing_markets(cached_data, markets, bookmakers)
+                cache_hit = cached_data is not None and not missing
+                span.set(hit=cache_hit, missing=",".join(sorted(missing)))
+
+            if missing:
+                if cached_data:
+                    logger.info(f"💾 Cache for {sport}/{league} lacks {', '.join(sorted(missing))}, fetching...")
+                else:
+                    logger.info(f"💾 No cache found, fetching {sport}/{league}...")
+                self.db.update_job_group(
+                    job_id, sport, league, event_date, lease_owner, status="scraping",
+                )
+                # Identical targets from other groups/jobs join the same scrape
+                flight_key = (sport, league, event_date, missing, bookmakers)
+                fetch_start = time.perf_counter()
+                with tracing.span("scrape") as span:
+                    # A joined scrape's stages are traced under the job that started it
+                    span.set(joined=self._scrape_flights.is_in_flight(flight_key))
+                    cached_data = await self._scrape_flights.do(
+                        flight_key,
+                        lambda: self._scrape_and_cache(
+                            sport, league, event_date, missing, list(bookmakers)
+                        ),
+                    )
+                    span.set(matches=len(cached_data.get("matches", [])) if cached_data else 0)
+                scrape_ms = (time.perf_counter() - fetch_start) * 1000 - timing["wait_ms"]
+                if cached_data:
+                    with tracing.span("index_matches"):
+                        match_index = MatchIndex(cached_data.get("matches", []), normalize_team_name)
+            else:
+                logger.info(f"📦 Using cached data for {sport}/{league}")
+
+            # Match bets to scraped data; per-bet lines are DEBUG, the group logs one summary
+            outcomes = Counter()
+            unmatched = []
+            debug = logger.isEnabledFor(logging.DEBUG)
+            # One span for the loop; per-bet costs are summed into its attributes
+            with tracing.span("match_bets", bets=len(group_bets)) as span:
+                match_s = db_s = 0.0
+                for bet in group_bets:
+                    match_start = time.perf_counter()
+                    result = self._match_bet_to_odds(bet, cached_data, match_index)
+                    match_end = time.perf_counter()
+                    match_s += match_end - match_start
+                    metrics.MATCH_DURATION.observe(match_end - match_start)
+                    outcomes[result["fallbackType"]] += 1
+                    if result["closingOdds"] is None and len(unmatched) < LOG_SAMPLE_PER_GROUP:
+                        unmatched.append(f"{bet.get('home_team')} vs {bet.get('away_team')}")
+                    if debug:
+                        logger.debug(
+                            "   %s vs %s -> closingOdds=%s (%s, score %.2f)",
+                            bet.get("home_team"), bet.get("away_team"),
+                            result["closingOdds"], result["fallbackType"], result["matchScore"],
+                        )
+                    db_start = time.perf_counter()
+                    recorded = self.db.record_bet_result(job_id, bet["id"], result)
+                    db_s += time.perf_counter() - db_start
+                    if not recorded:
+                        continue  # Already processed under an expired lease
+                    progress["processed"] += 1
+                    self.events.publish(
+                        job_id, "bet_result",
+                        bet_id=bet["bet_id"],
+                        closingOdds=result.get("closingOdds"),
+                        bookmakerUsed=result.get("bookmakerUsed"),
+                        confidence=result.get("confidence"),
+                        fallbackType=result.get("fallbackType"),
+                        matchScore=result.get("matchScore"),
+                        processed=progress["processed"],
+                        total=progress["total"],
+                    )
+                span.set(match_ms=round(match_s * 1000, 3), db_ms=round(db_s * 1000, 3))
+
+            failed = outcomes.pop("failed", 0)
+            logger.info(
+                f"🎯 {sport}/{league} on {event_date}: {len(group_bets) - failed}/{len(group_bets)} matched"
+                + (f" ({', '.join(f'{kind} {count}' for kind, count in outcomes.most_common())})" if outcomes else "")
+                + (f", {failed} unmatched, e.g. {'; '.join(unmatched)}" if failed else ""),
+                extra={
+                    "job_id": job_id, "sport": sport, "league": league, "event_date": event_date,
+                    "bets": len(group_bets), "unmatched": failed, "fallbacks": dict(outcomes),
+                },
+            )
+            status = "completed"
+        except asyncio.CancelledError:
+            # Shutdown drain deadline - matched bets are already checkpointed
+            status = "interrupted"
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - group_start) * 1000
+            wait_ms = timing["wait_ms"]
+            metrics.GROUP_DURATION.observe(
+                elapsed_ms / 1000, status,
+                "none" if cache_hit is None else "hit" if cache_hit else "miss",
+            )
+            self.db.update_job_group(
+                job_id, sport, league, event_date, lease_owner,
+                status=status,
+                cache_hit=None if cache_hit is None else int(cache_hit),
+                completed_at=datetime.now().isoformat(),
+                wait_ms=round(wait_ms, 1),
+                scrape_ms=round(scrape_ms, 1),
+                elapsed_ms=round(elapsed_ms, 1),
+            )
+            self.events.publish(
+                job_id, "group_completed",
+                sport=sport, league=league, event_date=event_date, status=status,
+                cache_hit=cache_hit, elapsed_ms=round(elapsed_ms, 1),
+            )
+            logger.info(
+                f"⏱️ Group {sport}/{league} on {event_date}: {elapsed_ms:.0f}ms "
+                f"(slot wait {wait_ms:.0f}ms, scrape {scrape_ms:.0f}ms)"
+            )
+
+    def register_upcoming(self, bets: list[dict]) -> list[dict]:
+        """
+        Schedule one prefetch scrape per (sport, league, date) window of bets.
+
+        Each window is due PREFETCH_DELAY_MINUTES after its latest kickoff,
+        so a single scrape fills the cache for every registered bet.
+        """
+        windows = []
+        for (sport, league, event_date), group_bets in self._group_bets(bets).items():
+            last_kickoff = max(kickoff_timestamp(bet["event_date"]) for bet in group_bets)
+            due_at = last_kickoff + PREFETCH_DELAY_MINUTES * 60
+            self.db.schedule_prefetch(sport, league, event_date, due_at, len(group_bets))
+            windows.append({
+                "sport": sport,
+                "league": league,
+                "eventDate": event_date,
+                "bets": len(group_bets),
+                "dueAt": datetime.fromtimestamp(due_at).isoformat(),
+            })
+        self._prefetch_wakeup.set()
+        return windows
+
+    async def _prefetch_loop(self):
+        """Start due prefetch windows; sleep until the next one is due or a registration arrives."""
+        while self.running:
+            try:
+                free = self.max_workers - len(self._prefetch_tasks)
+                if free > 0:
+                    for entry in self.db.claim_due_prefetches(time.time(), free):
+                        task = asyncio.create_task(self._run_prefetch(entry))
+                        self._prefetch_tasks.add(task)
+                        task.add_done_callback(self._prefetch_tasks.discard)
+
+                next_due = self.db.get_next_prefetch_due()
+                delay = PREFETCH_POLL_SECONDS
+                if next_due is not None:
+                    delay = min(delay, max(1.0, next_due - time.time()))
+
+                self._prefetch_wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._prefetch_wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+
+            except Exception as e:
+                logger.error(f"Error in prefetch loop: {e}")
+                await asyncio.sleep(5)
+
+    async def _run_prefetch(self, entry: dict):
+        """Scrape one due window into the caches, retrying empty or failed scrapes."""
+        sport, league, event_date = entry["sport"], entry["league"], entry["event_date"]
+        # Prefetches share one fair-share flow at routine priority
+        _group_context.set({"wait_ms": 0.0, "priority": "routine", "job_id": "prefetch"})
+        logger.info(f"🗓️ Prefetching {sport}/{league} on {event_date} ({entry['registrations']} bets)")
+
+        error = None
+        matches = 0
+        try:
+            bookmakers = tuple(odds_api_bookmakers([], normalize_bookmaker))
+            scraped = await self._scrape_flights.do(
+                (sport, league, event_date, DEFAULT_MARKETS, bookmakers),
+                lambda: self._scrape_and_cache(sport, league, event_date, refresh=True),
+            )
+            matches = len(scraped.get("matches", [])) if scraped else 0
+        except Exception as e:
+            error = str(e)
+
+        if matches:
+            self.db.finish_prefetch(entry["id"], "completed", matches=matches)
+            metrics.PREFETCH_RUNS.inc("completed")
+            logger.info(f"🗓️ Prefetched {matches} matches for {sport}/{league} on {event_date}")
+            return
+
+        error = error or "no matches scraped"
+        if entry["attempts"] + 1 < PREFETCH_MAX_ATTEMPTS:
+            retry_at = time.time() + PREFETCH_RETRY_MINUTES * 60
+            self.db.finish_prefetch(entry["id"], "pending", error=error, retry_at=retry_at)
+            metrics.PREFETCH_RUNS.inc("retry")
+            logger.warning(
+                f"⚠️ Prefetch {sport}/{league} on {event_date} failed ({error}), "
+                f"retrying in {PREFETCH_RETRY_MINUTES} min"
+            )
+        else:
+            self.db.finish_prefetch(entry["id"], "failed", error=error)
+            metrics.PREFETCH_RUNS.inc("failed")
+            logger.error(f"❌ Prefetch {sport}/{league} on {event_date} failed: {error}")
+
+    async def _watch_loop(self):
+        """
+        Report progress of jobs processed by worker processes (queue mode).
+
+        Polls job_groups of watched jobs and publishes the same events the
+        inline path emits, so SSE/WebSocket clients and deadlines work.
+        """
+        while self.running:
+            await asyncio.sleep(WORKER_POLL_SECONDS)
+            for job_id, reported in list(self._watched_jobs.items()):
+                try:
+                    self._report_job(job_id, reported)
+                except Exception as e:
+                    logger.error(f"Error reporting job {job_id}: {e}")
+
+    def _report_job(self, job_id: str, reported: set):
+        """Publish events for newly finished groups and the job's end."""
+        job = self.db.get_job(job_id)
+        if not job:
+            self._watched_jobs.pop(job_id, None)
+            return
+
+        for group in self.db.get_job_groups(job_id):
+            if group["id"] in reported or group["status"] not in ("completed", "failed"):
+                continue
+            reported.add(group["id"])
+            for bet in self.db.get_group_bets(group["id"]):
+                if bet.get("processed_at"):
+                    self.events.publish(
+                        job_id, "bet_result",
+                        bet_id=bet["bet_id"],
+                        closingOdds=bet.get("result_odds"),
+                        bookmakerUsed=bet.get("result_bookmaker"),
+                        confidence=bet.get("confidence"),
+                        fallbackType=bet.get("fallback_type"),
+                        matchScore=bet.get("match_score"),
+                    )
+            self.events.publish(
+                job_id, "group_completed",
+                sport=group["sport"], league=group["league"], event_date=group["event_date"],
+                status=group["status"], cache_hit=group["cache_hit"],
+                elapsed_ms=group["elapsed_ms"], worker=group["lease_owner"],
+            )
+
+        if job["status"] == "completed":
+            self.events.publish(
+                job_id, "job_completed", processed=job["processed_bets"], total=job["total_bets"],
+            )
+            self._watched_jobs.pop(job_id, None)
+        elif job["status"] == "failed":
+            self.events.publish(job_id, "job_failed", error=job.get("error_log"))
+            self._watched_jobs.pop(job_id, None)
+
+    def _get_cached_payload(
+        self, sport: str, league: str, event_date: str
+    ) -> tuple[Optional[dict], Optional[MatchIndex]]:
+        """
+        Get a cached league payload and its match index.
+
+        Decoded payloads are kept in a small LRU keyed on the cache row
+        version, so repeated groups skip decompression and indexing.
+        """
+        key = (sport, league, event_date)
+        version = self.db.get_league_cache_version(sport, league, event_date)
+        if version is None:
+            metrics.CACHE_REQUESTS.inc("league", "miss")
+            return None, None
+        metrics.CACHE_REQUESTS.inc("league", "hit")
+
+        entry = self._payload_cache.get(key)
+        if entry and entry[0] == version:
+            self._payload_cache.move_to_end(key)
+            metrics.CACHE_REQUESTS.inc("payload", "hit")
+            return entry[1], entry[2]
+        metrics.CACHE_REQUESTS.inc("payload", "miss")
+
+        with tracing.span("cache.decode"):
+            payload = self.db.get_cached_league_data(sport, league, event_date)
+        if not payload:
+            return None, None
+
+        with tracing.span("index_matches"):
+            index = MatchIndex(payload.get("matches", []), normalize_team_name)
+        self._payload_cache[key] = (version, payload, index)
+        if len(self._payload_cache) > PAYLOAD_CACHE_SIZE:
+            self._payload_cache.popitem(last=False)
+        return payload, index
+
+    @asynccontextmanager
+    async def _scrape_slot(self):
+        """
+        Hold a scrape slot, recording the wait against the current group.
+
+        Slots are shared fairly between jobs, weighted by the job's priority class.
+        Once shutdown has begun no new scrape starts: the caller is cancelled
+        instead, before or after the wait, so its group is interrupted and
+        resumes on the next start.
+        """
+        if not self.running:
+            raise asyncio.CancelledError("shutting down")
+        timing = _group_context.get()
+        flow, priority = (timing["job_id"], timing["priority"]) if timing else (None, "routine")
+        wait_start = time.perf_counter()
+        with tracing.span("slot_wait", priority=priority):
+            await self._scrape_slots.acquire(flow, priority)
+        if not self.running:
+            self._scrape_slots.release(flow)
+            raise asyncio.CancelledError("shutting down")
+        try:
+            if timing is not None:
+                timing["wait_ms"] += (time.perf_counter() - wait_start) * 1000
+            yield
+        finally:
+            self._scrape_slots.release(flow)
+
+    async def _scrape_and_cache(
+        self,
+        sport: str,
+        league: str,
+        event_date: str,
+        markets: frozenset = DEFAULT_MARKETS,
+        bookmakers: Optional[list[str]] = None,
+        refresh: bool = False,
+    ) -> Optional[dict]:
+        """
+        Fetch a league/date and cache the result.
+
+        Runs once per in-flight target (see SingleFlight), so the cache is
+        written exactly once per scrape. Scrape slots are taken only around
+        network work, so answers from the season cache never wait.
+
+        Only markets the cached payload lacks, or holds without one of the
+        bookmakers, are fetched and merged into it; refresh=True refetches
+        every market the payload covers. The Odds API is asked for the
+        bookmakers the refetched markets already had too, so none are lost.
+        """
+        cached = self.db.get_cached_league_data(sport, league, event_date)
+        covered = payload_markets(cached)
+        bookmakers = bookmakers or odds_api_bookmakers([], normalize_bookmaker)
+        if refresh:
+            markets = markets | covered
+        else:
+            markets = missing_markets(cached, markets, bookmakers)
+            if not markets:
+                return cached  # Filled by a fetch that finished while this one waited
+        bookmakers = sorted(set(bookmakers) | payload_bookmakers(cached, markets))
+
+        scraped_data = await self._scrape_league(
+            sport, league, event_date, markets, bookmakers, refresh
+        )
+
+        if cached and not refresh:
+            # Top-up: markets are recorded as fetched even if the source had none
+            restricted = dict(cached.get("bookmakers", {}))
+            if scraped_data:
+                fetched = scraped_data.get("bookmakers", {})
+                for market in markets:
+                    if market in fetched:
+                        restricted[market] = fetched[market]
+                    else:
+                        restricted.pop(market, None)  # Source with every bookmaker
+            scraped_data = {
+                **cached,
+                "matches": merge_matches(
+                    cached.get("matches", []),
+                    scraped_data.get("matches", []) if scraped_data else [],
+                    normalize_team_name,
+                ),
+                "markets": sorted(covered | markets),
+                "bookmakers": restricted,
+            }
+
+        if scraped_data:
+            logger.info(f"✅ Scraped {len(scraped_data.get('matches', []))} matches")
+            with tracing.span("db.cache_league"):
+                self.db.cache_league_data(sport, league, event_date, scraped_data)
+        else:
+            logger.warning(f"⚠️ No data from scraping")
+
+        return scraped_data
+
+    def get_scrape_stats(self) -> dict:
+        """Get scrape deduplication counters."""
+        return self._scrape_flights.get_stats()
+
     def _group_bets(
         self, bets: list[dict]
     ) -> dict[tuple[str, str, str], list[dict]]:
         """Group bets by sport, league, and date for batch scraping."""
         groups: dict[tuple[str, str, str], list[dict]] = {}
-
-        logger.info(f"📊 Grouping {len(bets)} bets by sport/league/date...")
+        unknown = 0
+        debug = logger.isEnabledFor(logging.DEBUG)
 
         for bet in bets:
             # Detect league from team names
@@ -435,34 +1336,46 @@ class JobProcessor:
             if league_info:
                 league = league_info["league"]
                 inferred_sport = league_info.get("sport", bet["sport"])  # Use inferred sport if available
-                logger.info(f"   ✅ {bet['home_team']} vs {bet['away_team']} -> {inferred_sport}/{league}")
             else:
                 league = "unknown"
                 inferred_sport = bet["sport"]
-                logger.warning(f"   ⚠️ {bet['home_team']} vs {bet['away_team']} -> UNKNOWN league")
+                unknown += 1
+            if debug:
+                logger.debug(
+                    "   %s vs %s -> %s/%s", bet["home_team"], bet["away_team"], inferred_sport, league
+                )
 
-            key = (inferred_sport, league, bet["event_date"])  # Use inferred_sport instead of bet["sport"]
+            # Group per calendar day: kickoff times on the same day share one scrape
+            key = (inferred_sport, league, bet["event_date"][:10])  # Use inferred_sport instead of bet["sport"]
 
             if key not in groups:
                 groups[key] = []
             groups[key].append(bet)
 
-        logger.info(f"✅ Created {len(groups)} groups: {list(groups.keys())}")
+        logger.info(f"📊 Grouped {len(bets)} bets into {len(groups)} groups")
+        if unknown:
+            logger.warning(f"⚠️ {unknown} bets with UNKNOWN league (Odds API only)")
         return groups
 
-    async def _scrape_league_with_oddsharvester(self, sport: str, league: str, event_date: str) -> Optional[dict]:
+    async def _scrape_season_with_oddsharvester(
+        self,
+        sport: str,
+        league: str,
+        season: str,
+        match_date: str,
+        markets: frozenset = DEFAULT_MARKETS,
+    ) -> Optional[dict[str, list[dict]]]:
         """
-        Try to fetch odds using OddsHarvester (async).
-        Returns None if OddsHarvester fails or is blocked.
+        Scrape the historic results page(s) of a season holding match_date (async).
+
+        The pages are found by binary search over the page date boundaries
+        (see season_pages), so only they are scraped, and only the given bet
+        markets are requested. Returns transformed matches grouped by match
+        date (YYYY-MM-DD) for every day the scrape fully covers, days without
+        matches as empty lists; None if no day was covered. Timeouts and
+        scraper errors are raised.
         """
         try:
-            # Import OddsHarvester components
-            sys.path.insert(0, str(Path(ODDS_HARVESTER_PATH) / "src"))
-            from core.odds_portal_scraper import OddsPortalScraper
-            from core.playwright_manager import PlaywrightManager
-            from core.browser_helper import BrowserHelper
-            from core.odds_portal_market_extractor import OddsPortalMarketExtractor
-            
             logger.info(f"🕷️ Attempting OddsHarvester scrape for {sport}/{league}")
             
             # Map to OddsHarvester format
@@ -472,173 +1385,445 @@ class JobProcessor:
                 return None
             
             oh_sport, oh_league = oh_params
-            date_obj = datetime.fromisoformat(event_date.replace("Z", "+00:00"))
-            oh_date = date_obj.strftime("%Y%m%d")
-            
-            # Determine season for historic scraping
-            # Most football leagues run Aug-May, so season spans two years
-            # E.g., Dec 2024 is in 2024-2025 season, Aug 2025 is in 2025-2026 season
-            year = date_obj.year
-            month = date_obj.month
-            
-            if month >= 8:  # August onwards = new season starting
-                season = f"{year}-{year+1}"
-            else:  # Jan-July = second half of season that started previous year
-                season = f"{year-1}-{year}"
-            
-            logger.info(f"🔑 OddsHarvester: {oh_sport}/{oh_league} season {season}")
-            
-            # Initialize components
-            playwright_manager = PlaywrightManager()
-            browser_helper = BrowserHelper()
-            market_extractor = OddsPortalMarketExtractor(browser_helper)
-            
-            scraper = OddsPortalScraper(
-                playwright_manager=playwright_manager,
-                browser_helper=browser_helper,
-                market_extractor=market_extractor,
-                preview_submarkets_only=False
+            oh_markets = oddsharvester_markets(markets)
+            if not oh_markets:
+                logger.info(f"⚠️ OddsHarvester offers none of {', '.join(sorted(markets))}")
+                return None
+            logger.info(
+                f"🔑 OddsHarvester: {oh_sport}/{oh_league} season {season} ({', '.join(oh_markets)})"
             )
             
-            # Start browser with timeout
-            await asyncio.wait_for(
-                scraper.start_playwright(headless=True),
-                timeout=30
+            # Lease a started browser; a cold start only happens when the pool is empty
+            async with self.browser_pool.lease() as browser:
+                try:
+                    results, days = await self._scrape_located_pages(
+                        browser, oh_sport, oh_league, sport, league, season, match_date, oh_markets
+                    )
+                except PageSeekUnsupported as e:
+                    logger.warning(f"⚠️ Results page seeking unavailable ({e}) - scraping the first page only")
+                    results, days = await self._scrape_first_results_page(
+                        browser, oh_sport, oh_league, season, match_date, oh_markets
+                    )
+
+            if not days:
+                return None
+
+            with tracing.span("transform", results=len(results)):
+                scraped = self._transform_oddsharvester_results(results)
+                matches_by_date = {day: scraped.get(day, []) for day in days}
+
+            logger.info(
+                f"✅ OddsHarvester: {sum(len(m) for m in matches_by_date.values())} matches "
+                f"on {len(matches_by_date)} days scraped"
             )
-            
-            try:
-                # Scrape HISTORIC matches (not upcoming) to get closing odds
-                logger.info(f"🕒 Scraping historic matches for season {season}...")
-                results = await asyncio.wait_for(
-                    scraper.scrape_historic(
-                        sport=oh_sport,
-                        league=oh_league,
-                        season=season,
-                        markets=['home_away_draw', 'over_under_goals_2_5'],  # OddsHarvester market names
-                        scrape_odds_history=False,
-                        target_bookmaker='pinnacle',  # Focus on Pinnacle for CLV
-                        max_pages=1  # Only scrape first page for performance
-                    ),
-                    timeout=120  # 2 minute timeout per scrape
-                )
-                
-                if not results:
-                    logger.warning(f"⚠️ OddsHarvester returned no results for {season}")
-                    return None
-                
-                logger.info(f"📊 OddsHarvester found {len(results)} matches in season, filtering by date {event_date}...")
-                
-                # Filter results to only include matches from the target date
-                target_date = date_obj.date()
-                filtered_results = []
-                
-                for match_data in results:
-                    match_date_str = match_data.get('start_date', '')
-                    if match_date_str:
-                        try:
-                            # Parse match date (format varies: "2025-12-01" or "01.12.2025" or timestamp)
-                            if isinstance(match_date_str, str):
-                                if '-' in match_date_str:
-                                    match_date = datetime.fromisoformat(match_date_str.split('T')[0]).date()
-                                elif '.' in match_date_str:
-                                    # DD.MM.YYYY format
-                                    parts = match_date_str.split('.')
-                                    match_date = datetime(int(parts[2]), int(parts[1]), int(parts[0])).date()
-                                else:
-                                    continue
-                                
-                                if match_date == target_date:
-                                    filtered_results.append(match_data)
-                        except Exception as e:
-                            logger.debug(f"Failed to parse date '{match_date_str}': {e}")
-                            continue
-                
-                if not filtered_results:
-                    logger.warning(f"⚠️ No matches found for date {target_date} (checked {len(results)} season matches)")
-                    return None
-                
-                logger.info(f"✅ Found {len(filtered_results)} matches for {target_date}")
-                results = filtered_results
-                
-                # Transform to expected format
-                matches = []
-                for match_data in results:
-                    match = {
-                        'home_team': match_data.get('home_team', ''),
-                        'away_team': match_data.get('away_team', ''),
-                        'date': match_data.get('start_date', event_date),
-                        'odds': {}
-                    }
-                    
-                    markets_data = match_data.get('markets', {})
-                    for market_name, market_data in markets_data.items():
-                        if not isinstance(market_data, dict):
-                            continue
-                        
-                        formatted_market = {
-                            '1x2': '1X2',
-                            'over_under_2_5': 'Over/Under 2.5',
-                            'btts': 'Both Teams to Score'
-                        }.get(market_name, market_name)
-                        
-                        match['odds'][formatted_market] = {'bookmakers': {}}
-                        
-                        # Extract bookmaker odds from market data
-                        for key, value in market_data.items():
-                            if isinstance(value, list):
-                                for entry in value:
-                                    if isinstance(entry, dict):
-                                        bookie = entry.get('bookmaker_name', '').lower()
-                                        
-                                        # Get odds value
-                                        odds_val = None
-                                        if '1' in entry:
-                                            odds_val = float(entry['1'])
-                                        elif 'odds_over' in entry:
-                                            odds_val = float(entry['odds_over'])
-                                        else:
-                                            for k, v in entry.items():
-                                                if k not in ['bookmaker_name', 'period'] and isinstance(v, (int, float, str)):
-                                                    try:
-                                                        odds_val = float(v)
-                                                        break
-                                                    except:
-                                                        pass
-                                        
-                                        if odds_val and bookie:
-                                            match['odds'][formatted_market]['bookmakers'][bookie] = odds_val
-                    
-                    if match['odds']:
-                        matches.append(match)
-                
-                logger.info(f"✅ OddsHarvester: {len(matches)} matches scraped")
-                
-                return {
-                    'matches': matches,
-                    'sport': sport,
-                    'league': league,
-                    'season': f"{date_obj.year}-{date_obj.year + 1}",
-                    'scraped_at': datetime.now().isoformat(),
-                    'source': 'oddsharvester'
-                } if matches else None
-            
-            finally:
-                await scraper.stop_playwright()
+            return matches_by_date
         
-        except asyncio.TimeoutError:
-            logger.warning("⏱️ OddsHarvester timeout - trying fallback")
-            return None
         except ImportError as e:
             logger.warning(f"⚠️ OddsHarvester import failed: {e}")
             return None
-        except Exception as e:
-            logger.warning(f"⚠️ OddsHarvester error: {e}")
+
+    async def _scrape_located_pages(
+        self,
+        browser,
+        oh_sport: str,
+        oh_league: str,
+        sport: str,
+        league: str,
+        season: str,
+        match_date: str,
+        oh_markets: list[str],
+    ) -> tuple[list[dict], list[str]]:
+        """
+        Seek and scrape the results page(s) holding match_date.
+
+        Returns the scraped matches and the dates they fully cover. A date
+        on no page (no matches that day) is returned as covered with no
+        matches, unless it may still be played (after the current season's
+        newest result).
+        """
+        pages = ResultsPages(browser.scraper, oh_sport, oh_league, season)
+        try:
+            located, page_count, ranges = await self._seek_season_pages(
+                pages, sport, league, season, match_date
+            )
+            if not located:
+                newest = ranges[1][1] if 1 in ranges else None
+                if newest and match_date > newest and season == season_for_date(datetime.now().date().isoformat()):
+                    logger.info(f"⚠️ No results after {newest} yet in season {season}")
+                    return [], []
+                logger.info(f"📭 No matches on {match_date} in season {season}")
+                return [], [match_date]
+
+            logger.info(
+                f"🕒 Scraping results page(s) {', '.join(map(str, located))} of {page_count} "
+                f"for {match_date}..."
+            )
+            with tracing.span(
+                "scrape.page", season=season, pages=",".join(map(str, located)), markets=",".join(oh_markets)
+            ) as span:
+                results = await asyncio.wait_for(
+                    pages.scrape(located, oh_markets, target_bookmaker='pinnacle'),  # Focus on Pinnacle for CLV
+                    timeout=120 * len(located),  # 2 minute timeout per page
+                )
+                span.set(matches=len(results))
+        finally:
+            browser.record_pages(pages.loads)
+
+        logger.info(f"📊 OddsHarvester found {len(results)} matches in season {season}")
+        complete = complete_dates(located, page_count, ranges)
+        return results, (dates_between(*complete) if complete else [])
+
+    async def _seek_season_pages(
+        self, pages: ResultsPages, sport: str, league: str, season: str, match_date: str
+    ) -> tuple[list[int], int, dict[int, tuple[str, str]]]:
+        """
+        Find the results pages holding match_date, probing only pages the index lacks.
+
+        The page index of past seasons is kept; the current season's pages
+        shift as results come in, so its index is reused for
+        SEASON_REFRESH_MINUTES. Returns the located pages, the page count
+        and every known page date range.
+        """
+        current = season == season_for_date(datetime.now().date().isoformat())
+        index = self.db.get_season_pages(
+            sport, league, season, SEASON_REFRESH_MINUTES * 60 if current else None
+        )
+        ranges = dict(index["pages"]) if index else {}
+        probed: dict[int, tuple[str, str]] = {}
+
+        async def probe(page: int) -> tuple[str, str]:
+            if page not in ranges:
+                with tracing.span("seek.probe", page=page):
+                    ranges[page] = probed[page] = await asyncio.wait_for(
+                        pages.page_dates(page), timeout=PAGE_PROBE_TIMEOUT_SECONDS
+                    )
+            return ranges[page]
+
+        with tracing.span("seek", target=match_date) as span:
+            try:
+                if index:
+                    page_count = index["page_count"]
+                else:
+                    with tracing.span("seek.probe", page=1):
+                        page_count, ranges[1] = await asyncio.wait_for(
+                            pages.first_page(), timeout=PAGE_PROBE_TIMEOUT_SECONDS
+                        )
+                    probed[1] = ranges[1]
+                located = await locate_pages(match_date, page_count, probe)
+            finally:
+                if probed:
+                    self.db.save_season_pages(sport, league, season, page_count, probed)
+            span.set(page_count=page_count, probes=len(probed), pages=",".join(map(str, located)))
+
+        logger.info(
+            f"🔎 {match_date}: page(s) {', '.join(map(str, located)) or 'none'} of {page_count} "
+            f"({len(probed)} probed, {len(ranges) - len(probed)} from index)"
+        )
+        return located, page_count, ranges
+
+    async def _scrape_first_results_page(
+        self,
+        browser,
+        oh_sport: str,
+        oh_league: str,
+        season: str,
+        match_date: str,
+        oh_markets: list[str],
+    ) -> tuple[list[dict], list[str]]:
+        """
+        Scrape the newest results page of a season (scrapers without page seeking).
+
+        Older dates cannot be reached, so match_date is reported covered
+        unless it may still be played; it is not scraped again.
+        """
+        logger.info(f"🕒 Scraping historic matches for season {season}...")
+        with tracing.span("scrape.page", season=season, pages="1", markets=",".join(oh_markets)) as span:
+            results = await asyncio.wait_for(
+                browser.scraper.scrape_historic(
+                    sport=oh_sport,
+                    league=oh_league,
+                    season=season,
+                    markets=oh_markets,
+                    scrape_odds_history=False,
+                    target_bookmaker='pinnacle',  # Focus on Pinnacle for CLV
+                    max_pages=1
+                ),
+                timeout=120  # 2 minute timeout per scrape
+            )
+            span.set(matches=len(results or []))
+        # Results page plus one page per match
+        browser.record_pages(1 + len(results or []))
+        results = results or []
+
+        days = {day for day in map(parse_match_date, (r.get('start_date', '') for r in results)) if day}
+        current = season == season_for_date(datetime.now().date().isoformat())
+        if not (current and (not days or match_date > max(days))):
+            days.add(match_date)
+        return results, sorted(days)
+
+    @staticmethod
+    def _transform_oddsharvester_results(results: list[dict]) -> dict[str, list[dict]]:
+        """Convert OddsHarvester match results to payload matches grouped by match date."""
+        matches_by_date: dict[str, list[dict]] = defaultdict(list)
+        for match_data in results:
+            match_date = parse_match_date(match_data.get('start_date', ''))
+            if not match_date:
+                continue
+
+            match = {
+                'home_team': match_data.get('home_team', ''),
+                'away_team': match_data.get('away_team', ''),
+                'date': match_data.get('start_date', match_date),
+                'odds': {}
+            }
+
+            markets_data = match_data.get('markets', {})
+            for market_name, market_data in markets_data.items():
+                if not isinstance(market_data, dict):
+                    continue
+
+                formatted_market = from_oddsharvester(market_name)
+
+                match['odds'][formatted_market] = {'bookmakers': {}}
+
+                # Extract bookmaker odds from market data
+                for key, value in market_data.items():
+                    if isinstance(value, list):
+                        for entry in value:
+                            if isinstance(entry, dict):
+                                bookie = entry.get('bookmaker_name', '').lower()
+
+                                # Get odds value
+                                odds_val = None
+                                if '1' in entry:
+                                    odds_val = float(entry['1'])
+                                elif 'odds_over' in entry:
+                                    odds_val = float(entry['odds_over'])
+                                else:
+                                    for k, v in entry.items():
+                                        if k not in ['bookmaker_name', 'period'] and isinstance(v, (int, float, str)):
+                                            try:
+                                                odds_val = float(v)
+                                                break
+                                            except:
+                                                pass
+
+                                if odds_val and bookie:
+                                    match['odds'][formatted_market]['bookmakers'][bookie] = odds_val
+
+            if match['odds']:
+                matches_by_date[match_date].append(match)
+
+        return dict(matches_by_date)
+
+    @tracing.traced("season_refresh")
+    async def _refresh_season(
+        self,
+        sport: str,
+        league: str,
+        season: str,
+        match_date: str,
+        markets: frozenset,
+        refresh: bool = False,
+    ) -> int:
+        """
+        Scrape the season pages holding match_date and merge them into the season cache.
+
+        Runs one at a time per season, so nearby dates share each other's
+        pages and page index. An uncached day is scraped for markets plus
+        the season's markets; a cached one only for the markets it lacks,
+        and not at all if it gained them meanwhile (unless refresh=True).
+        Scraped days are merged into cached ones and record the markets
+        scraped for them, even if the source had none.
+        """
+        tracing.annotate(
+            sport=sport, league=league, season=season, date=match_date,
+            markets=",".join(sorted(markets)), refresh=refresh,
+        )
+        async with self._season_lock(sport, league, season):
+            info = self.db.get_season_cache_info(sport, league, season)
+            day = self.db.get_season_day(sport, league, season, match_date)
+            if day is None or refresh:
+                scrape_markets = markets | self._season_markets(info)
+            else:
+                scrape_markets = markets - self._day_markets(day)
+                if not scrape_markets:
+                    tracing.annotate(outcome="covered")
+                    return 0  # Filled by a scrape that finished while this one waited
+            tracing.annotate(scrape_markets=",".join(sorted(scrape_markets)))
+
+            async with self._scrape_slot():
+                start = time.perf_counter()
+                try:
+                    matches_by_date = await self._scrape_season_with_oddsharvester(
+                        sport, league, season, match_date, scrape_markets
+                    )
+                    outcome = "success" if matches_by_date and any(matches_by_date.values()) else "empty"
+                except Exception as e:
+                    matches_by_date = None
+                    if isinstance(e, asyncio.TimeoutError) or "Timeout" in type(e).__name__:
+                        outcome = "timeout"
+                        logger.warning("⏱️ OddsHarvester timeout - trying fallback")
+                    else:
+                        outcome = "error"
+                        logger.warning(f"⚠️ OddsHarvester error: {e}")
+                latency = time.perf_counter() - start
+                metrics.SCRAPE_DURATION.observe(latency, "oddsharvester", outcome)
+                self.concurrency.record(latency, outcome)
+                tracing.annotate(outcome=outcome)
+
+            if not matches_by_date:
+                return 0
+
+            cached_days = self.db.get_season_days(sport, league, season, list(matches_by_date))
+            day_markets = {}
+            for scraped_date, matches in matches_by_date.items():
+                cached = cached_days.get(scraped_date)
+                if cached is None:
+                    day_markets[scraped_date] = sorted(scrape_markets)
+                    continue
+                matches_by_date[scraped_date] = merge_matches(
+                    cached["matches"], matches, normalize_team_name
+                )
+                day_markets[scraped_date] = sorted(self._day_markets(cached) | scrape_markets)
+
+            with tracing.span("db.store_season"):
+                changed = self.db.store_season_matches(
+                    sport,
+                    league,
+                    season,
+                    matches_by_date,
+                    sorted(self._season_markets(info) | scrape_markets),
+                    day_markets,
+                )
+        logger.info(f"💾 Season cache {sport}/{league} {season}: {changed} days updated")
+        return changed
+
+    def _season_lock(self, sport: str, league: str, season: str) -> asyncio.Lock:
+        """Lock serialising scrapes of one league season (dropped once unused)."""
+        key = (sport, league, season)
+        lock = self._season_locks.get(key)
+        if lock is None:
+            lock = self._season_locks[key] = asyncio.Lock()
+        return lock
+
+    @staticmethod
+    def _season_markets(info: Optional[dict]) -> frozenset:
+        """Markets a season cache row covers; rows from before market scoping hold the defaults."""
+        if not info:
+            return frozenset()
+        if info["markets"] is None:
+            return DEFAULT_MARKETS
+        return frozenset(info["markets"])
+
+    @staticmethod
+    def _day_markets(day: dict) -> frozenset:
+        """Markets a cached season day was scraped for; days from before market scoping hold the defaults."""
+        if day["markets"] is None:
+            return DEFAULT_MARKETS
+        return frozenset(day["markets"])
+
+    def _season_needs_refresh(self, info: Optional[dict], season: str, match_date: str) -> bool:
+        """
+        Decide whether to scrape for a date the season cache does not cover.
+
+        Dates of past seasons, and dates within the cached span of the
+        current season, are seeked right away (once: days without matches
+        are cached too). A date beyond the current season's cached span is
+        scraped at most once per SEASON_REFRESH_MINUTES.
+        """
+        if not info:
+            return True
+
+        if season != season_for_date(datetime.now().date().isoformat()):
+            return True
+
+        if info["covered_to"] and match_date <= info["covered_to"]:
+            return True
+
+        age_minutes = (time.time() - info["last_scraped"]) / 60
+        return age_minutes >= SEASON_REFRESH_MINUTES
+
+    async def _scrape_league_with_oddsharvester(
+        self,
+        sport: str,
+        league: str,
+        event_date: str,
+        markets: frozenset = DEFAULT_MARKETS,
+        refresh: bool = False,
+    ) -> Optional[dict]:
+        """
+        Get one day's matches from the season cache, scraping its results page(s) if needed.
+
+        Concurrent requests for the same day and markets share one scrape.
+        An uncached day is scraped with the wanted markets plus those the
+        season covers; if only markets are missing, just those are scraped
+        and merged in. refresh=True (prefetch after kickoff) rescrapes even
+        if the day is already covered, since it may have been cached before
+        the matches. Returns None if the season has no matches on that day.
+        """
+        if not map_to_oddsharvester_params(sport, league):
+            logger.warning(f"⚠️ No OddsHarvester mapping for {sport}/{league}")
+            return None
+
+        season = season_for_date(event_date)
+        match_date = event_date[:10]
+        # Markets OddsHarvester lacks are never missing from its days
+        markets = frozenset(market for market in markets if oddsharvester_markets([market]))
+        info = self.db.get_season_cache_info(sport, league, season)
+        with tracing.span("db.season_matches"):
+            day = self.db.get_season_day(sport, league, season, match_date)
+
+        if refresh or (day is None and self._season_needs_refresh(info, season, match_date)):
+            metrics.CACHE_REQUESTS.inc("season", "miss")
+            scrape = True
+        elif day is not None and markets - self._day_markets(day):
+            metrics.CACHE_REQUESTS.inc("season", "partial")
+            scrape = True
+        else:
+            metrics.CACHE_REQUESTS.inc("season", "hit")
+            scrape = False
+
+        if scrape:
+            await self._scrape_flights.do(
+                ("season", sport, league, season, match_date, markets),
+                lambda: self._refresh_season(sport, league, season, match_date, markets, refresh),
+            )
+            with tracing.span("db.season_matches"):
+                day = self.db.get_season_day(sport, league, season, match_date)
+
+        if not day or not day["matches"]:
+            logger.warning(f"⚠️ No matches found for date {match_date} in season cache {season}")
             return None
 
-    async def _scrape_with_odds_api(self, sport: str, league: str, event_date: str) -> Optional[dict]:
-        """Fallback: Fetch odds from The Odds API (async to avoid blocking event loop)."""
+        logger.info(f"✅ Found {len(day['matches'])} matches for {match_date} in season cache {season}")
+        return {
+            'matches': day["matches"],
+            'sport': sport,
+            'league': league,
+            'season': season,
+            'markets': sorted(self._day_markets(day)),
+            'scraped_at': datetime.now().isoformat(),
+            'source': 'oddsharvester'
+        }
+
+    async def _scrape_with_odds_api(
+        self,
+        sport: str,
+        league: str,
+        event_date: str,
+        markets: frozenset = DEFAULT_MARKETS,
+        bookmakers: Optional[list[str]] = None,
+    ) -> Optional[dict]:
+        """
+        Fallback: Fetch odds from The Odds API (async to avoid blocking event loop).
+
+        Requests only the API markets behind the given bet markets, from the
+        named bookmakers instead of whole regions (quota is billed per market
+        and per 10 bookmakers).
+        """
         try:
-            if not THE_ODDS_API_KEY:
+            if not self.odds_api.api_key:
                 logger.warning("⚠️ THE_ODDS_API_KEY not configured")
                 return None
             
@@ -647,26 +1832,28 @@ class JobProcessor:
                 logger.warning(f"⚠️ No API mapping for {sport}/{league}")
                 return None
             
-            logger.info(f"🌐 Fetching from The Odds API: {sport_key}")
-            
-            url = f"https://api.the-odds-api.com/v4/sports/{sport_key}/odds"
-            params = {
-                'apiKey': THE_ODDS_API_KEY,
-                'regions': 'us,uk,eu',
-                'markets': 'h2h,spreads,totals',
-                'oddsFormat': 'decimal',
-                'dateFormat': 'iso'
-            }
+            api_markets = odds_api_markets(markets)
+            if not api_markets:
+                logger.info(f"⚠️ The Odds API offers none of {', '.join(sorted(markets))}")
+                return None
+            bookmakers = bookmakers or odds_api_bookmakers([], normalize_bookmaker)
+
+            logger.info(f"🌐 Fetching from The Odds API: {sport_key} ({', '.join(api_markets)})")
             
-            # Use async httpx instead of blocking requests
-            import httpx
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                response = await client.get(url, params=params)
-                remaining = response.headers.get('x-requests-remaining', 'unknown')
-                logger.info(f"📊 API Quota: {remaining} remaining")
-                
-                response.raise_for_status()
-                events = response.json()
+            context = _group_context.get() or {}
+            try:
+                # Shared pooled client; quota policy may defer or refuse
+                events = await self.odds_api.get_odds(
+                    sport_key,
+                    regions=None,
+                    markets=','.join(api_markets),
+                    # Interactive lookups may spend the quota reserve
+                    priority="high" if context.get("priority") == "interactive" else "low",
+                    bookmakers=','.join(bookmakers),
+                )
+            except QuotaDeferred as e:
+                logger.warning(f"⏸️ The Odds API request deferred for {sport}/{league}: {e}")
+                return None
             
             if not events:
                 return None
@@ -688,21 +1875,10 @@ class JobProcessor:
                 }
                 
                 for bookmaker in event.get('bookmakers', []):
-                    bookie_key = bookmaker['key'].lower()
-                    bookie_map = {
-                        'pinnacle': 'pinnacle',
-                        'betfair': 'betfair',
-                        'smarkets': 'smarkets',
-                        'bet365': 'bet365'
-                    }
-                    normalized_bookie = bookie_map.get(bookie_key, bookie_key)
+                    normalized_bookie = from_odds_api_bookmaker(bookmaker['key'].lower())
                     
                     for market in bookmaker.get('markets', []):
-                        market_name = {
-                            'h2h': '1X2',
-                            'spreads': 'Spread',
-                            'totals': 'Over/Under 2.5'
-                        }.get(market['key'], market['key'])
+                        market_name = from_odds_api(market['key'])
                         
                         if market_name not in match['odds']:
                             match['odds'][market_name] = {'bookmakers': {}}
@@ -722,6 +1898,11 @@ class JobProcessor:
                 'sport': sport,
                 'league': league,
                 'season': f"{target_date.year}-{target_date.year + 1}",
+                'markets': sorted(markets),
+                # Bookmakers each API-served market was requested from
+                'bookmakers': {
+                    market: sorted(bookmakers) for market in markets if odds_api_markets([market])
+                },
                 'scraped_at': datetime.now().isoformat(),
                 'source': 'the_odds_api'
             } if matches else None
@@ -730,20 +1911,36 @@ class JobProcessor:
             logger.error(f"❌ The Odds API error: {e}")
             return None
 
-    async def _scrape_league(self, sport: str, league: str, event_date: str) -> Optional[dict]:
+    async def _scrape_league(
+        self,
+        sport: str,
+        league: str,
+        event_date: str,
+        markets: frozenset = DEFAULT_MARKETS,
+        bookmakers: Optional[list[str]] = None,
+        refresh: bool = False,
+    ) -> Optional[dict]:
         """
         Try to fetch odds using OddsHarvester first, fallback to The Odds API.
+        Sources that offer none of the wanted markets are skipped.
         Returns scraped data or None if both fail.
         """
-        logger.info(f"🌐 Fetching odds for {sport}/{league} on {event_date}")
+        logger.info(
+            f"🌐 Fetching odds for {sport}/{league} on {event_date} ({', '.join(sorted(markets))})"
+        )
         
         # Skip OddsHarvester if league is unknown (it will error out)
         if league == "unknown":
             logger.info(f"⚠️ League unknown - skipping OddsHarvester, using The Odds API only")
+        elif not oddsharvester_markets(markets):
+            logger.info(f"⚠️ OddsHarvester offers none of these markets, using The Odds API only")
         else:
             # Strategy 1: Try OddsHarvester (free, unlimited)
             try:
-                result = await self._scrape_league_with_oddsharvester(sport, league, event_date)
+                with tracing.span("oddsharvester"):
+                    result = await self._scrape_league_with_oddsharvester(
+                        sport, league, event_date, markets, refresh
+                    )
                 
                 if result:
                     logger.info(f"✅ OddsHarvester succeeded for {sport}/{league}")
@@ -753,9 +1950,16 @@ class JobProcessor:
                 logger.warning(f"⚠️ OddsHarvester failed: {e}")
         
         # Strategy 2: Fallback to The Odds API (reliable, quota-limited)
+        if not odds_api_markets(markets):
+            logger.warning(f"⚠️ The Odds API offers none of these markets for {sport}/{league}")
+            return None
         logger.info(f"🔄 Falling back to The Odds API...")
         try:
-            result = await self._scrape_with_odds_api(sport, league, event_date)
+            with tracing.span("odds_api"):
+                async with self._scrape_slot():
+                    result = await self._scrape_with_odds_api(
+                        sport, league, event_date, markets, bookmakers
+                    )
             if result:
                 logger.info(f"✅ The Odds API succeeded for {sport}/{league}")
                 return result
@@ -767,9 +1971,12 @@ class JobProcessor:
         return None
     
     def _match_bet_to_odds(
-        self, bet: dict, scraped_data: Optional[dict]
+        self,
+        bet: dict,
+        scraped_data: Optional[dict],
+        match_index: Optional[MatchIndex] = None,
     ) -> dict:
-        """Match a bet to closing odds from scraped data."""
+        """Match a bet to closing odds from scraped data (indexed once per payload)."""
         result = {
             "closingOdds": None,
             "bookmakerUsed": None,
@@ -781,36 +1988,23 @@ class JobProcessor:
         if not scraped_data:
             return result
 
-        # Normalize team names for matching
-        home_normalized = normalize_team_name(bet["home_team"])
-        away_normalized = normalize_team_name(bet["away_team"])
         target_bookmaker = normalize_bookmaker(bet["bookmaker"])
 
-        matches = scraped_data.get("matches", [])
-
-        # Find matching event
-        best_match = None
-        best_score = 0.0
-
-        for match in matches:
-            match_home = normalize_team_name(match.get("home_team", ""))
-            match_away = normalize_team_name(match.get("away_team", ""))
+        if match_index is None:
+            match_index = MatchIndex(scraped_data.get("matches", []), normalize_team_name)
 
-            # Calculate match score
-            home_result = find_best_match(home_normalized, [match_home])
-            away_result = find_best_match(away_normalized, [match_away])
-
-            if home_result and away_result:
-                score = (home_result["score"] + away_result["score"]) / 2
-                if score > best_score:
-                    best_score = score
-                    best_match = match
+        # Find matching event among pruned candidates
+        best_match, best_score = match_index.best_match(
+            bet["home_team"], bet["away_team"], bet.get("event_date", "")
+        )
 
         if not best_match or best_score < 0.5:  # Lowered from 0.75 for testing
-            logger.warning(f"❌ No match found for {bet['home_team']} vs {bet['away_team']} (best score: {best_score:.2f})")
+            logger.debug(
+                "No match found for %s vs %s (best score: %.2f)",
+                bet["home_team"], bet["away_team"], best_score or 0.0,
+            )
             return result
 
-        logger.info(f"✅ Matched {bet['home_team']} vs {bet['away_team']} with score {best_score:.2f}")
         result["matchScore"] = best_score
 
         # Get odds from matched event
@@ -818,7 +2012,7 @@ class JobProcessor:
         market_odds = odds_data.get(bet["market"], {})
 
         if not market_odds:
-            logger.warning(f"Market '{bet['market']}' not found. Available: {list(odds_data.keys())}")
+            logger.debug("Market '%s' not found. Available: %s", bet["market"], list(odds_data))
             return result
 
         # Apply fallback hierarchy: exact -> pinnacle -> weighted average
@@ -877,16 +2071,76 @@ class JobProcessor:
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifespan."""
-    global db, job_processor, scheduler
+    global db, job_archive, job_processor, scheduler, health_monitor
 
-    # Startup
+    # Startup gates readiness only on the databases and the job processor;
+    # network, scheduler and probe work runs in run_post_startup_tasks()
     logger.info("Starting OddsHarvester API server...")
+
+    # Initialize database
+    db = Database(DB_PATH)
+    logger.info(f"Database initialized at {DB_PATH}")
+
+    job_archive = JobArchive(ARCHIVE_DB_PATH)
+    logger.info(f"Job archive initialized at {ARCHIVE_DB_PATH}")
+
+    # Start job processor
+    job_processor = JobProcessor(db, max_workers=MAX_CONCURRENCY, mode=WORKER_MODE)
+    await job_processor.start()
+    if WORKER_MODE == "queue":
+        logger.info("📤 Worker mode: groups are processed by worker.py processes")
+
+    # Health probes run in the background; the first one no longer delays startup
+    health_monitor = HealthMonitor(
+        collect_health_stats,
+        ODDS_HARVESTER_PATH,
+        refresh_seconds=HEALTH_REFRESH_SECONDS,
+        probe_interval_seconds=HEALTH_PROBE_HOURS * 3600,
+        initial_status=db.get_metadata("health_status"),
+        on_probe=store_health_status,
+    )
+    await health_monitor.start()
+
+    post_startup = asyncio.create_task(run_post_startup_tasks())
+    background_tasks.add(post_startup)
+    post_startup.add_done_callback(background_tasks.discard)
+
+    yield
+
+    # Shutdown
+    logger.info("Shutting down...")
+    for task in list(background_tasks):
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    if health_monitor:
+        await health_monitor.stop()
+    if job_processor:
+        await job_processor.stop()
+    if scheduler:
+        scheduler.shutdown()
+    if job_archive:
+        job_archive.close()
+    if db:
+        db.close()
+
+
+async def run_post_startup_tasks():
+    """Startup work that does not gate readiness, run once the server is up."""
+    global scheduler
+
+    await asyncio.sleep(0)  # Let lifespan finish so uvicorn starts serving
+    log_odds_api_config()
+    scheduler = await asyncio.to_thread(start_scheduler)
+    await check_harvester_update()
+
+
+def log_odds_api_config():
+    """Log where The Odds API key came from, or how to configure it."""
+    key, source = load_odds_api_key()
     logger.info(f"📁 Shared config directory: {SHARED_CONFIG_DIR}")
-    
-    # Log API configuration status
-    if THE_ODDS_API_KEY:
-        logger.info(f"✅ The Odds API key configured from {config_source}")
-        logger.info(f"   Key preview: {THE_ODDS_API_KEY[:10]}...{THE_ODDS_API_KEY[-4:]}")
+    if key:
+        logger.info(f"✅ The Odds API key configured from {source}")
+        logger.info(f"   Key preview: {key[:10]}...{key[-4:]}")
     else:
         logger.warning("⚠️ The Odds API key not configured - fallback will not work")
         logger.warning(f"   📋 Setup instructions:")
@@ -895,72 +2149,75 @@ async def lifespan(app: FastAPI):
         logger.warning(f"   3. Restart this server")
         logger.warning(f"   Alternative: Set environment variable $env:THE_ODDS_API_KEY='your_key'")
 
-    # Initialize database
-    db_path = Path(__file__).parent / "clv_cache.db"
-    db = Database(str(db_path))
-    logger.info(f"Database initialized at {db_path}")
 
-    # Start job processor
-    job_processor = JobProcessor(db, max_workers=MAX_CONCURRENCY)
-    await job_processor.start()
+def start_scheduler() -> "BackgroundScheduler":
+    """Import APScheduler and start the cleanup/archive jobs (runs on a worker thread)."""
+    from apscheduler.schedulers.background import BackgroundScheduler
 
-    # Start scheduler for cleanup
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(
+    background = BackgroundScheduler()
+    background.add_job(
         lambda: cleanup_old_cache(db, CACHE_RETENTION_DAYS),
         "interval",
         hours=24,
         id="cache_cleanup",
     )
-    scheduler.add_job(
-        lambda: run_health_check(),
+    background.add_job(
+        lambda: run_job_archiver(),
         "interval",
         hours=6,
-        id="health_check",
+        id="job_archive",
     )
-    scheduler.start()
+    background.start()
     logger.info("Scheduler started")
+    return background
+
+
+def fetch_remote_harvester_version(timeout: float) -> str:
+    """Short hash of OddsHarvester's main branch on GitHub (blocking)."""
+    import urllib.request
 
-    # Check for OddsHarvester updates
+    url = "https://api.github.com/repos/jordantete/OddsHarvester/commits/main"
+    req = urllib.request.Request(url, headers={"User-Agent": "OddsHarvester-CLV-API"})
+    with urllib.request.urlopen(req, timeout=timeout) as response:
+        data = json.loads(response.read().decode())
+    return data["sha"][:7]
+
+
+async def check_harvester_update():
+    """Log whether an OddsHarvester update is available."""
     try:
         logger.info("🔍 Checking for OddsHarvester updates...")
         local_version = get_odds_harvester_version()
         logger.info(f"   Local version: {local_version}")
-        
-        # Try to get remote version
-        import urllib.request
-        url = "https://api.github.com/repos/jordantete/OddsHarvester/commits/main"
-        req = urllib.request.Request(url, headers={"User-Agent": "OddsHarvester-CLV-API"})
-        
-        with urllib.request.urlopen(req, timeout=5) as response:
-            data = json.loads(response.read().decode())
-            remote_sha = data["sha"][:7]
-            
-            if local_version != remote_sha and local_version != "unknown":
-                logger.warning(f"⚠️  OddsHarvester update available!")
-                logger.warning(f"   Current: {local_version} | Latest: {remote_sha}")
-                logger.warning(f"   Update with: cd {ODDS_HARVESTER_PATH} && git pull")
-            else:
-                logger.info(f"✅ OddsHarvester is up to date ({local_version})")
+
+        remote_sha = await asyncio.to_thread(fetch_remote_harvester_version, 5)
+        if local_version != remote_sha and local_version != "unknown":
+            logger.warning(f"⚠️  OddsHarvester update available!")
+            logger.warning(f"   Current: {local_version} | Latest: {remote_sha}")
+            logger.warning(f"   Update with: cd {ODDS_HARVESTER_PATH} && git pull")
+        else:
+            logger.info(f"✅ OddsHarvester is up to date ({local_version})")
     except Exception as e:
         logger.info(f"ℹ️  Could not check for updates (offline or rate limited): {str(e)[:50]}")
 
-    # Run initial health check
-    run_health_check()
 
-    yield
+# === Helper Functions ===
 
-    # Shutdown
-    logger.info("Shutting down...")
-    if job_processor:
-        await job_processor.stop()
-    if scheduler:
-        scheduler.shutdown()
-    if db:
-        db.close()
 
+def kickoff_timestamp(event_date: str) -> float:
+    """
+    Unix time of a bet's kickoff ("2025-12-08T19:30:00Z").
 
-# === Helper Functions ===
+    Naive times are taken as UTC; a bare date counts as the end of that
+    day, since the kickoff time is unknown.
+    """
+    if "T" not in event_date and " " not in event_date.strip():
+        kickoff = datetime.fromisoformat(event_date[:10]) + timedelta(days=1)
+    else:
+        kickoff = datetime.fromisoformat(event_date.replace("Z", "+00:00"))
+    if kickoff.tzinfo is None:
+        kickoff = kickoff.replace(tzinfo=timezone.utc)
+    return kickoff.timestamp()
 
 
 def normalize_team_name(team: str) -> str:
@@ -1010,73 +2267,61 @@ def normalize_bookmaker(bookmaker: str) -> str:
 
 
 def get_odds_harvester_version() -> str:
-    """Get OddsHarvester git commit hash."""
-    try:
-        result = subprocess.run(
-            ["git", "rev-parse", "--short", "HEAD"],
-            cwd=ODDS_HARVESTER_PATH,
-            capture_output=True,
-            text=True,
-        )
-        return result.stdout.strip() if result.returncode == 0 else "unknown"
-    except Exception:
-        return "unknown"
+    """Get OddsHarvester git commit hash (cached until its .git files change)."""
+    if health_monitor:
+        return health_monitor.version.get()
+    return "unknown"
 
 
-def run_health_check():
-    """Run a health check scrape to verify OddsHarvester is working."""
-    global db
+def store_health_status(status: str):
+    """Persist a probe result (runs on a worker thread)."""
+    if not db:
+        return
+    if status == "healthy":
+        db.set_metadata("last_health_check", datetime.now().isoformat())
+    db.set_metadata("health_status", status)
 
-    try:
-        logger.info("Running health check...")
 
-        # Try to scrape a known completed match (recent Premier League)
-        # This is a lightweight check to verify the scraper works
-        test_cmd = [
-            sys.executable,
-            "-m",
-            "src.main",
-            "--help",
-        ]
+def collect_health_stats() -> dict:
+    """DB-backed and psutil /health fields, collected by the health monitor off the event loop."""
+    pending_jobs = len(db.get_jobs_by_status("queued")) + len(
+        db.get_jobs_by_status("processing")
+    )
 
-        result = subprocess.run(
-            test_cmd,
-            cwd=ODDS_HARVESTER_PATH,
-            capture_output=True,
-            text=True,
-            timeout=30,
+    cache_stats = get_cache_stats(db)
+    oldest_timestamp = cache_stats.get("oldest_timestamp")
+    cache_age = None
+    if oldest_timestamp:
+        cache_age = int(
+            (datetime.now() - datetime.fromisoformat(oldest_timestamp)).total_seconds()
+            / 86400
         )
 
-        if result.returncode == 0:
-            if db:
-                db.set_metadata("last_health_check", datetime.now().isoformat())
-                db.set_metadata("health_status", "healthy")
-            logger.info("Health check passed")
-        else:
-            if db:
-                db.set_metadata("health_status", "degraded")
-            logger.warning("Health check failed: OddsHarvester not responding properly")
-
-    except Exception as e:
-        logger.error(f"Health check error: {e}")
-        if db:
-            db.set_metadata("health_status", "critical")
-
+    return {
+        "db_size": get_db_size(db),
+        "cache_age": cache_age,
+        "pending_jobs": pending_jobs,
+        "failure_rate": get_failure_rate(db),
+        "task_queue": db.get_task_queue_stats() if WORKER_MODE == "queue" else None,
+        # Pool stats read process memory via psutil, so they are refreshed here too
+        "browser_pool": job_processor.browser_pool.get_stats() if job_processor else None,
+    }
 
-def calculate_health_state() -> str:
-    """Calculate overall health state."""
-    if not db:
-        return "unknown"
 
-    failure_rate = get_failure_rate(db)
-    health_status = db.get_metadata("health_status") or "unknown"
+def run_job_archiver():
+    """Move finished jobs older than JOB_ARCHIVE_DAYS into the archive DB."""
+    if not db or not job_archive:
+        return
 
-    if health_status == "critical" or failure_rate > 0.5:
-        return "critical"
-    elif health_status == "degraded" or failure_rate > 0.1:
-        return "degraded"
-    else:
-        return "healthy"
+    try:
+        moved = archive_completed_jobs(db, job_archive, JOB_ARCHIVE_DAYS)
+        if moved["jobs"]:
+            logger.info(
+                f"🗄️ Archived {moved['jobs']} jobs ({moved['bets']} bets, "
+                f"{moved['failures']} failures) older than {JOB_ARCHIVE_DAYS} days"
+            )
+    except Exception as e:
+        logger.error(f"Job archiver error: {e}")
 
 
 def get_cache_stats(db: Database) -> dict:
@@ -1158,36 +2403,48 @@ app.add_middleware(
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
-    """Get server health status."""
-    global db, job_processor
+    """
+    Get server health status.
 
-    if not db:
-        raise HTTPException(status_code=503, detail="Database not initialized")
+    DB-backed fields, browser pool memory and the OddsHarvester probe come
+    from the health monitor's latest snapshot; only in-memory processor
+    stats are read live.
+    """
+    global health_monitor, job_processor
 
-    pending_jobs = len(db.get_jobs_by_status("queued")) + len(
-        db.get_jobs_by_status("processing")
-    )
-
-    cache_stats = get_cache_stats(db)
-    oldest_timestamp = cache_stats.get("oldest_timestamp")
-    cache_age = None
-    if oldest_timestamp:
-        cache_age = int(
-            (datetime.now() - datetime.fromisoformat(oldest_timestamp)).total_seconds()
-            / 86400
-        )
+    snapshot = health_monitor.snapshot if health_monitor else None
+    if not snapshot:
+        raise HTTPException(status_code=503, detail="Database not initialized")
 
     return HealthResponse(
         status="ok",
         version="1.0.0",
-        odds_harvester_version=get_odds_harvester_version(),
-        db_size=get_db_size(db),
-        cache_age=cache_age,
-        pending_jobs=pending_jobs,
-        failure_rate=get_failure_rate(db),
+        odds_harvester_version=snapshot["odds_harvester_version"],
+        db_size=snapshot.get("db_size", 0.0),
+        cache_age=snapshot.get("cache_age"),
+        pending_jobs=snapshot.get("pending_jobs", 0),
+        failure_rate=snapshot["failure_rate"],
         active_concurrency=job_processor.get_active_concurrency() if job_processor else 0,
         recommended_concurrency=job_processor.get_recommended_concurrency() if job_processor else MAX_CONCURRENCY,
-        health_state=calculate_health_state(),
+        health_state=snapshot["health_state"],
+        health_probe=snapshot["probe"],
+        snapshot_at=snapshot["refreshed_at"],
+        concurrency_controller=job_processor.get_concurrency_stats() if job_processor else None,
+        worker_mode=WORKER_MODE,
+        task_queue=snapshot.get("task_queue"),
+        dispatch_latency_ms=job_processor.get_dispatch_stats() if job_processor else None,
+        scheduler=job_processor.get_scheduler_stats() if job_processor else None,
+        scrape_dedup=job_processor.get_scrape_stats() if job_processor else None,
+        browser_pool=snapshot.get("browser_pool"),
+        odds_api_quota=job_processor.odds_api.get_stats() if job_processor else None,
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Pipeline metrics in the Prometheus text format."""
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
     )
 
 
@@ -1202,7 +2459,10 @@ async def create_batch_job(request: BatchRequest):
     job_id = str(uuid.uuid4())
 
     # Create job record
-    db.create_job(job_id, len(request.bets))
+    priority = request.priority or (
+        "interactive" if len(request.bets) <= SMALL_BATCH_SIZE else "routine"
+    )
+    db.create_job(job_id, len(request.bets), priority)
 
     # Create bet request records
     for bet in request.bets:
@@ -1218,21 +2478,38 @@ async def create_batch_job(request: BatchRequest):
             bookmaker=bet.bookmaker,
         )
 
-    logger.info(f"Created job {job_id} with {len(request.bets)} bets")
+    logger.info(f"Created {priority} job {job_id} with {len(request.bets)} bets")
 
     # For small batches (<= 20 bets), process immediately and return results
     # This provides synchronous response for browser extension compatibility
-    if len(request.bets) <= 20:
-        logger.info(f"Processing job {job_id} synchronously (small batch)")
-        
+    if len(request.bets) <= SMALL_BATCH_SIZE:
+        timeout = request.deadlineMs / 1000 if request.deadlineMs is not None else None
+        logger.info(
+            f"Processing job {job_id} synchronously (small batch"
+            + (f", deadline {request.deadlineMs}ms)" if timeout is not None else ")")
+        )
+
         # Call the actual job processing logic (includes grouping, scraping, matching)
-        await job_processor._process_job(job_id)
-        
+        finished = await job_processor.run_job_now(job_id, timeout=timeout, priority=priority)
+
+        # Bets matched so far (cache hits finish well inside any deadline)
+        done_ids = None
+        if not finished:
+            log = job_processor.events.get_log(job_id)
+            done_ids = {
+                e["data"]["bet_id"] for e in (log.events if log else [])
+                if e["type"] == "bet_result"
+            }
+
         # Retrieve results from database
         bet_requests = db.get_bet_requests(job_id)
         results = []
-        
+        pending = []
+
         for bet_req in bet_requests:
+            if done_ids is not None and bet_req["bet_id"] not in done_ids:
+                pending.append(bet_req["bet_id"])
+                continue
             results.append({
                 "bet_id": bet_req["bet_id"],
                 "success": bet_req.get("result_odds") is not None,
@@ -1244,9 +2521,22 @@ async def create_batch_job(request: BatchRequest):
                 "confidence": bet_req.get("confidence")
             })
         
-        # Job status already updated by _process_job
-        job_status = db.get_job(job_id)
-        
+        if pending:
+            logger.info(
+                f"⏳ Job {job_id}: deadline reached with {len(pending)} bets pending, "
+                f"continuing in background"
+            )
+            return {
+                "job_id": job_id,
+                "total_bets": len(request.bets),
+                "status": "processing",
+                "processed": len(results),
+                "failed": len([r for r in results if not r.get("success")]),
+                "results": results,
+                "pending": pending,
+                "message": "Deadline reached. Use /api/job-status/{job_id} or /api/job-events/{job_id} for the rest.",
+            }
+
         return {
             "job_id": job_id,
             "total_bets": len(request.bets),
@@ -1256,7 +2546,8 @@ async def create_batch_job(request: BatchRequest):
             "results": results
         }
     
-    # For large batches, return job ID for async polling
+    # For large batches, wake the processor and return job ID for async polling
+    job_processor.notify_job_queued(job_id, priority)
     return {
         "job_id": job_id,
         "total_bets": len(request.bets),
@@ -1265,32 +2556,346 @@ async def create_batch_job(request: BatchRequest):
     }
 
 
-@app.get("/api/job-status/{job_id}", response_model=JobStatusResponse)
-async def get_job_status(job_id: str):
-    """Get status of a batch job."""
+def job_etag(job: dict) -> str:
+    """Weak ETag of a job's status response; changes with status and progress."""
+    return f'W/"{job["status"]}-{job["processed_bets"]}-{job["total_bets"]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check using weak comparison."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+@app.post("/api/register-upcoming")
+async def register_upcoming(request: RegisterUpcomingRequest):
+    """
+    Register upcoming bets for closing-odds prefetch.
+
+    Bets are grouped into (sport, league, date) windows; each window is
+    scraped once, shortly after its last kickoff, so later batch lookups
+    for these bets are answered from the cache.
+    """
+    global job_processor
+
+    if not job_processor:
+        raise HTTPException(status_code=503, detail="Job processor not initialized")
+
+    bets = []
+    for bet in request.bets:
+        try:
+            kickoff_timestamp(bet.eventDate)
+        except ValueError:
+            raise HTTPException(status_code=422, detail=f"Invalid eventDate for bet {bet.betId}")
+        bets.append({
+            "bet_id": bet.betId,
+            "sport": bet.sport,
+            "tournament": bet.tournament or "",
+            "home_team": bet.homeTeam,
+            "away_team": bet.awayTeam,
+            "event_date": bet.eventDate,
+        })
+
+    windows = job_processor.register_upcoming(bets)
+    logger.info(f"🗓️ Registered {len(bets)} upcoming bets in {len(windows)} prefetch windows")
+    return {"registered": len(bets), "windows": windows}
+
+
+@app.get("/api/prefetch-schedule")
+async def get_prefetch_schedule(status: Optional[str] = None, limit: int = 200):
+    """List prefetch windows by due time (status: pending, running, completed, failed)."""
     global db
 
     if not db:
         raise HTTPException(status_code=503, detail="Database not initialized")
 
-    job = db.get_job(job_id)
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
+    return {"windows": db.get_prefetch_schedule(status, min(max(limit, 1), 1000))}
+
+
+@app.get("/api/export-results")
+async def export_results(
+    request: Request,
+    format: str = "ndjson",
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    sport: Optional[str] = None,
+    bookmaker: Optional[str] = None,
+    fallback_type: Optional[str] = None,
+    include_archive: bool = False,
+):
+    """
+    Stream matched CLV results of all jobs as NDJSON or CSV.
+
+    Filters: event date range (YYYY-MM-DD, inclusive), sport, bet
+    bookmaker and fallback type. Rows are read in batches from an indexed
+    cursor and sent with chunked transfer, gzip'd when the client accepts
+    it; include_archive appends results of archived jobs.
+    """
+    global db, job_archive
+
+    if not db:
+        raise HTTPException(status_code=503, detail="Database not initialized")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=422, detail=f"format must be one of {list(EXPORT_FORMATS)}")
+    for value in (date_from, date_to):
+        if value:
+            try:
+                datetime.fromisoformat(value[:10])
+            except ValueError:
+                raise HTTPException(status_code=422, detail=f"Invalid date: {value}")
+
+    filters = {
+        "date_from": date_from,
+        "date_to": date_to,
+        "sport": sport,
+        "bookmaker": bookmaker,
+        "fallback_type": fallback_type,
+    }
+    archive = job_archive if include_archive else None
+
+    def batches():
+        # Sync generator: Starlette pulls each batch on a worker thread
+        for rows in db.iter_bet_results(**filters):
+            yield rows, False
+        if archive:
+            for rows in archive.iter_bet_results(**filters):
+                yield rows, True
+
+    body = encode_batches(batches(), format)
+    headers = {
+        "Content-Disposition": (
+            f'attachment; filename="clv-results-{datetime.now():%Y%m%d}.{format}"'
+        ),
+        "Vary": "Accept-Encoding",
+    }
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        body = gzip_chunks(body)
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(body, media_type=EXPORT_FORMATS[format], headers=headers)
 
-    bet_results = db.get_bet_results(job_id)
 
+@app.get("/api/job-status/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(job_id: str, request: Request, response: Response, wait: float = 0):
+    """
+    Get status of a batch job.
+
+    Responses carry an ETag; a request whose If-None-Match still matches
+    gets 304 with no body. With ?wait=<seconds> (up to
+    JOB_STATUS_MAX_WAIT_SECONDS) such a request is held until the job's
+    progress changes or the wait runs out, woken by the in-memory job
+    event bus rather than by polling the database.
+    """
+    global db
+
+    if not db:
+        raise HTTPException(status_code=503, detail="Database not initialized")
+
+    if_none_match = request.headers.get("if-none-match")
+    wait = min(max(wait, 0.0), JOB_STATUS_MAX_WAIT_SECONDS)
+    deadline = time.monotonic() + wait
+
+    while True:
+        # Take the event cursor before reading the job, so no change is missed
+        log = job_processor.events.get_log(job_id) if job_processor else None
+        cursor = log.next_seq - 1 if log else 0
+
+        job = db.get_job(job_id)
+        archived = False
+        if not job:
+            # Old jobs live in the cold store once archived
+            job = job_archive.get_job(job_id) if job_archive else None
+            if not job:
+                raise HTTPException(status_code=404, detail="Job not found")
+            archived = True
+
+        etag = job_etag(job)
+        if not etag_matches(if_none_match, etag):
+            break
+
+        remaining = deadline - time.monotonic()
+        if archived or job["status"] in ("completed", "failed") or remaining <= 0 or not job_processor:
+            metrics.JOB_STATUS_REQUESTS.inc("not_modified", str(wait > 0).lower())
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+        await job_processor.events.wait(job_id, cursor, timeout=remaining)
+
+    metrics.JOB_STATUS_REQUESTS.inc("full", str(wait > 0).lower())
+    if archived:
+        bet_results = job_archive.get_bet_results(job_id)
+        groups = []
+    else:
+        bet_results = db.get_bet_results(job_id)
+        groups = db.get_job_groups(job_id)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
     return JobStatusResponse(
         job_id=job_id,
         status=job["status"],
         progress={
             "current": job["processed_bets"],
             "total": job["total_bets"],
+            "groups": groups,
         },
         results=bet_results,
         error=job.get("error_log"),
+        archived=archived,
+        priority=job.get("priority"),
     )
 
 
+@app.get("/api/traces")
+async def list_job_traces():
+    """Jobs whose traces are retained in memory (newest first), for /api/jobs/{id}/trace."""
+    return {"traces": tracing.list_traces()}
+
+
+@app.get("/api/jobs/{job_id}/trace")
+async def get_job_trace(job_id: str, response: Response, format: str = "tree"):
+    """
+    Stage timings of a recent job processed by this server.
+
+    format=tree returns the span tree (times in ms from the job start);
+    format=chrome returns Chrome trace-event JSON for chrome://tracing,
+    Perfetto or speedscope. Only the last TRACE_RETAIN_JOBS jobs are kept,
+    in memory; in queue mode group stages run in the worker processes.
+    """
+    if format not in ("tree", "chrome"):
+        raise HTTPException(status_code=422, detail="format must be one of ['tree', 'chrome']")
+
+    trace = tracing.get_trace(job_id) if format == "tree" else tracing.to_chrome(job_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="No trace retained for this job")
+    if format == "chrome":
+        response.headers["Content-Disposition"] = f'attachment; filename="trace-{job_id}.json"'
+    return trace
+
+
+def get_job_snapshot(job_id: str) -> Optional[dict]:
+    """Current job state and results, sent to stream clients that cannot resume."""
+    job = db.get_job(job_id)
+    if job:
+        results = db.get_bet_results(job_id)
+    else:
+        job = job_archive.get_job(job_id) if job_archive else None
+        if not job:
+            return None
+        results = job_archive.get_bet_results(job_id)
+
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "progress": {"current": job["processed_bets"], "total": job["total_bets"]},
+        "results": results,
+        "error": job.get("error_log"),
+    }
+
+
+async def iter_job_events(job_id: str, cursor: int, epoch: Optional[str] = None):
+    """
+    Yield (seq, event_type, data) for a job, starting after cursor.
+
+    If the events after cursor are no longer in memory, or the cursor's
+    epoch is from another process (e.g. before a restart), a snapshot from
+    the database is yielded first and streaming continues from the live
+    log. The iterator ends after the job's terminal event, or at once
+    when resuming from (or past) it.
+    """
+    events = job_processor.events
+
+    if not events.can_resume(job_id, cursor, epoch):
+        snapshot = get_job_snapshot(job_id)
+        if snapshot is None:
+            return
+        log = events.get_log(job_id)
+        cursor = log.next_seq - 1 if log else 0
+        yield cursor, "snapshot", snapshot
+        if snapshot["status"] in ("completed", "failed"):
+            return
+
+    while True:
+        if events.is_exhausted(job_id, cursor):
+            return  # Reconnect after the terminal event: nothing left to stream
+        batch = await events.wait(job_id, cursor, timeout=JOB_EVENTS_KEEPALIVE_SECONDS)
+        if not batch:
+            yield cursor, None, None  # keep-alive
+            continue
+        for event in batch:
+            cursor = event["seq"]
+            yield cursor, event["type"], event["data"]
+            if event["type"] in TERMINAL_EVENTS:
+                return
+
+
+@app.get("/api/job-events/{job_id}")
+async def stream_job_events(job_id: str, request: Request, cursor: str = "0"):
+    """
+    Server-sent event stream of job progress and per-bet results.
+
+    Reconnecting clients resume via the Last-Event-ID header (sent
+    automatically by EventSource) or the cursor query parameter; event
+    ids are "<epoch>-<seq>" cursors (see job_events).
+    """
+    if not db or not job_processor:
+        raise HTTPException(status_code=503, detail="Database not initialized")
+
+    epoch, seq = parse_cursor(request.headers.get("last-event-id") or cursor)
+
+    if not db.get_job(job_id) and not (job_archive and job_archive.get_job(job_id)):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    events = job_processor.events
+
+    async def event_source():
+        async for event_seq, event_type, data in iter_job_events(job_id, seq, epoch):
+            if await request.is_disconnected():
+                break
+            if event_type is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield (
+                f"id: {events.format_cursor(event_seq)}\n"
+                f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+            )
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/ws/job-events/{job_id}")
+async def websocket_job_events(websocket: WebSocket, job_id: str, cursor: str = "0"):
+    """
+    WebSocket stream of job events; messages are {seq, cursor, type, data}
+    JSON objects. Reconnect with the last message's cursor to resume.
+    """
+    await websocket.accept()
+    if not db or not job_processor:
+        await websocket.close(code=1011)
+        return
+
+    events = job_processor.events
+    epoch, seq = parse_cursor(cursor)
+    try:
+        async for event_seq, event_type, data in iter_job_events(job_id, seq, epoch):
+            if event_type is None:
+                continue
+            await websocket.send_json({
+                "seq": event_seq, "cursor": events.format_cursor(event_seq),
+                "type": event_type, "data": data,
+            })
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+
 @app.delete("/api/clear-cache")
 async def clear_cache(retention_days: int = 0):
     """Clear cached data."""
@@ -1310,6 +2915,26 @@ async def clear_cache(retention_days: int = 0):
     }
 
 
+@app.post("/api/archive-jobs")
+async def archive_jobs(older_than_days: int = JOB_ARCHIVE_DAYS):
+    """Move finished jobs older than N days to the archive DB."""
+    global db, job_archive
+
+    if not db or not job_archive:
+        raise HTTPException(status_code=503, detail="Database not initialized")
+
+    # Copies and deletes in SQLite; keep it off the event loop
+    moved = await asyncio.to_thread(archive_completed_jobs, db, job_archive, older_than_days)
+
+    return {
+        "success": True,
+        "archived_jobs": moved["jobs"],
+        "archived_bets": moved["bets"],
+        "archived_failures": moved["failures"],
+        "total_archived_jobs": job_archive.get_job_count(),
+    }
+
+
 @app.get("/api/cache-stats", response_model=CacheStatsResponse)
 async def get_cache_statistics():
     """Get cache statistics."""
@@ -1332,21 +2957,12 @@ async def get_cache_statistics():
 @app.get("/api/check-updates", response_model=UpdateCheckResponse)
 async def check_for_updates():
     """Check for OddsHarvester updates."""
-    import urllib.request
-
     try:
         # Get local version
         local_version = get_odds_harvester_version()
 
-        # Get remote version from GitHub
-        url = "https://api.github.com/repos/jordantete/OddsHarvester/commits/main"
-        req = urllib.request.Request(
-            url, headers={"User-Agent": "OddsHarvester-CLV-API"}
-        )
-
-        with urllib.request.urlopen(req, timeout=10) as response:
-            data = json.loads(response.read().decode())
-            remote_sha = data["sha"][:7]
+        # Get remote version from GitHub, off the event loop
+        remote_sha = await asyncio.to_thread(fetch_remote_harvester_version, 10)
 
         # Check if different
         update_available = local_version != remote_sha and local_version != "unknown"
@@ -1383,6 +2999,20 @@ async def update_harvester():
         logger.error(f"Update failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/log-level")
+async def get_log_level():
+    """Get the root and per-logger log levels."""
+    return get_log_levels()
+
+
+@app.post("/api/log-level")
+async def update_log_level(request: LogLevelRequest):
+    """Change a log level at runtime (e.g. DEBUG for per-bet match lines)."""
+    level = set_log_level(request.level, request.logger)
+    logger.info(f"🔧 Log level of {request.logger or 'root'} set to {level}")
+    return {"success": True, "levels": get_log_levels()}
+
+
 @app.get("/api/league-mappings")
 async def get_mappings():
     """Get current league mappings."""
@@ -1397,4 +3027,5 @@ async def update_mappings(mappings: dict):
 if __name__ == "__main__":
     import uvicorn
     logger.info(f"Starting server on {API_HOST}:{API_PORT}")
-    uvicorn.run(app, host=API_HOST, port=API_PORT)
+    # log_config=None: uvicorn's loggers propagate into the queue pipeline
+    uvicorn.run(app, host=API_HOST, port=API_PORT, log_config=None)
@@ -0,0 +1,432 @@
+"""Tests for the job processor's concurrency primitives.
+
+Run with: python -m pytest -q test_concurrency.py
+"""
+
+import asyncio
+import gc
+
+import pytest
+
+import concurrency
+from concurrency import AimdController, FairShareSemaphore, SingleFlight
+
+WEIGHTS = {"interactive": 8.0, "routine": 3.0, "backfill": 1.0}
+
+
+class FakeClock:
+    """Stands in for time.monotonic so aging is deterministic."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(concurrency.time, "monotonic", fake)
+    return fake
+
+
+async def _settle():
+    """Let queued tasks run up to their next suspension point."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+# === FairShareSemaphore ===
+
+
+def test_fair_share_grants_free_slots_immediately(clock):
+    async def main():
+        sem = FairShareSemaphore(2, WEIGHTS)
+        await sem.acquire("a", "routine")
+        await sem.acquire("b", "backfill")
+        assert sem.in_use == 2 and sem.waiting == 0
+        assert sem.granted == {"interactive": 0, "routine": 1, "backfill": 1}
+
+    asyncio.run(main())
+
+
+def test_fair_share_orders_waiters_by_weighted_service(clock):
+    async def main():
+        sem = FairShareSemaphore(1, WEIGHTS)
+        order = []
+
+        async def worker(flow, cls):
+            await sem.acquire(flow, cls)
+            order.append(flow)
+
+        await sem.acquire("holder", "routine")
+        tasks = [asyncio.create_task(worker("backfill-job", "backfill")) for _ in range(3)]
+        tasks += [asyncio.create_task(worker("interactive-job", "interactive")) for _ in range(3)]
+        await _settle()
+        assert sem.waiting == 6
+
+        sem.release("holder")
+        for _ in range(6):
+            await _settle()
+            sem.release(order[-1])
+        await asyncio.gather(*tasks)
+        # Tied at first; afterwards one backfill grant costs as much as eight interactive ones
+        assert order == [
+            "backfill-job", "interactive-job", "interactive-job", "interactive-job",
+            "backfill-job", "backfill-job",
+        ]
+        assert sem.contended_grants == 6
+
+    asyncio.run(main())
+
+
+def _next_grant(clock, backfill_waited: float) -> str:
+    """Which of a well-served backfill flow and a new interactive flow gets the next slot."""
+
+    async def main():
+        sem = FairShareSemaphore(1, WEIGHTS, aging_seconds=30)
+        order = []
+
+        async def worker(flow, cls):
+            await sem.acquire(flow, cls)
+            order.append(flow)
+            sem.release(flow)
+
+        await sem.acquire("backfill-job", "backfill")  # Its flow has had one grant already
+        tasks = [asyncio.create_task(worker("backfill-job", "backfill"))]
+        await _settle()
+        clock.now += backfill_waited
+        tasks.append(asyncio.create_task(worker("interactive-job", "interactive")))
+        await _settle()
+
+        sem.release("backfill-job")
+        await asyncio.gather(*tasks)
+        return order[0]
+
+    return asyncio.run(main())
+
+
+def test_fair_share_prefers_less_served_flow_without_aging(clock):
+    assert _next_grant(clock, backfill_waited=0) == "interactive-job"
+
+
+def test_fair_share_aging_lets_long_waiters_overtake(clock):
+    # One grant of credit per aging_seconds waited outweighs the earlier service
+    assert _next_grant(clock, backfill_waited=60) == "backfill-job"
+
+
+def test_fair_share_new_flows_get_no_credit_for_idling(clock):
+    async def main():
+        sem = FairShareSemaphore(1, WEIGHTS)
+        order = []
+
+        async def worker(flow):
+            await sem.acquire(flow, "routine")
+            order.append(flow)
+
+        # busy is served four times (virtual time 4/3), moving the clock to 1
+        await sem.acquire("busy", "routine")
+        for _ in range(3):
+            task = asyncio.create_task(worker("busy"))
+            await _settle()
+            sem.release("busy")
+            await task
+        order.clear()
+
+        tasks = [asyncio.create_task(worker("late")) for _ in range(3)]
+        tasks += [asyncio.create_task(worker("busy")) for _ in range(3)]
+        await _settle()
+        sem.release("busy")
+        for _ in range(5):
+            await _settle()
+            sem.release(order[-1])
+        await asyncio.gather(*tasks)
+        # late starts at the clock (1), not 0, so it gets one grant of catch-up, not four
+        assert order == ["late", "late", "busy", "late", "busy", "busy"]
+
+    asyncio.run(main())
+
+
+def test_fair_share_cancelled_waiter_is_dropped(clock):
+    async def main():
+        sem = FairShareSemaphore(1, WEIGHTS)
+        await sem.acquire("holder", "routine")
+        waiter = asyncio.create_task(sem.acquire("quitter", "backfill"))
+        await _settle()
+        assert sem.waiting == 1
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert sem.waiting == 0
+        assert "quitter" not in sem._vtime
+
+        sem.release("holder")
+        assert sem.in_use == 0
+
+    asyncio.run(main())
+
+
+def test_fair_share_slot_granted_to_a_cancelled_waiter_is_handed_on(clock):
+    async def main():
+        sem = FairShareSemaphore(1, WEIGHTS)
+        await sem.acquire("holder", "routine")
+        first = asyncio.create_task(sem.acquire("first", "routine"))
+        second = asyncio.create_task(sem.acquire("second", "routine"))
+        await _settle()
+
+        sem.release("holder")  # Grants first...
+        first.cancel()  # ...which is cancelled before it runs
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        await second
+        assert sem.in_use == 1
+        assert sem._holders == {"second": 1}
+
+    asyncio.run(main())
+
+
+def test_fair_share_raising_the_limit_wakes_waiters(clock):
+    async def main():
+        sem = FairShareSemaphore(1, WEIGHTS)
+        await sem.acquire("a", "routine")
+        waiters = [asyncio.create_task(sem.acquire("b", "routine")) for _ in range(2)]
+        await _settle()
+        sem.set_limit(3)
+        await asyncio.gather(*waiters)
+        assert sem.in_use == 3
+
+        sem.set_limit(1)  # Lowering never interrupts holders
+        assert sem.in_use == 3
+
+    asyncio.run(main())
+
+
+# === AimdController ===
+
+
+def _controller(available_mb=8192.0, swap_mb=0.0, **kwargs) -> AimdController:
+    """Controller with host memory readings fixed (mutable through .host)."""
+    controller = AimdController(**{"min_limit": 1, "max_limit": 8, "initial": 4, **kwargs})
+    controller.host = [available_mb, swap_mb]
+    controller._host_memory = lambda: tuple(controller.host)
+    return controller
+
+
+def _window(controller: AimdController, latencies, outcome="success", **update) -> dict:
+    for latency in latencies:
+        controller.record(latency, outcome)
+    return controller.update(**{"saturated": False, **update})
+
+
+def test_aimd_increases_by_one_when_saturated_with_headroom():
+    controller = _controller()
+    decision = _window(controller, [1.0, 1.0, 1.0], saturated=True)
+    assert (decision["action"], decision["reason"], decision["limit"]) == ("increase", "headroom", 5)
+
+
+def test_aimd_holds_when_not_saturated():
+    controller = _controller()
+    decision = _window(controller, [1.0, 1.0, 1.0])
+    assert (decision["action"], decision["reason"], controller.limit) == ("hold", "steady", 4)
+
+
+def test_aimd_never_exceeds_max_limit():
+    controller = _controller(initial=8)
+    assert _window(controller, [1.0], saturated=True)["limit"] == 8
+
+
+def test_aimd_needs_memory_for_another_browser_to_increase():
+    controller = _controller(available_mb=1200.0, memory_per_worker_mb=1024, min_free_mb=512)
+    decision = _window(controller, [1.0], saturated=True)
+    assert (decision["action"], decision["limit"]) == ("hold", 4)
+
+
+def test_aimd_halves_on_low_host_memory():
+    controller = _controller(available_mb=256.0)
+    decision = _window(controller, [1.0], saturated=True)
+    assert (decision["action"], decision["reason"], decision["limit"]) == ("decrease", "memory", 2)
+
+
+def test_aimd_halves_on_swap_growth_between_windows():
+    controller = _controller(swap_mb=100.0)
+    assert _window(controller, [1.0])["action"] == "hold"  # First reading is only a reference
+    controller.host[1] = 500.0
+    decision = _window(controller, [1.0])
+    assert (decision["reason"], decision["limit"], decision["swap_growth_mb"]) == ("swap", 2, 400.0)
+
+
+def test_aimd_halves_on_browser_rss():
+    controller = _controller(max_rss_mb=1536)
+    decision = _window(controller, [1.0], saturated=True, browser_rss_mb=4000.0, browsers=2)
+    assert (decision["reason"], decision["limit"]) == ("browser_rss", 2)
+
+
+def test_aimd_halves_on_timeouts_only_with_enough_samples():
+    controller = _controller()
+    assert _window(controller, [30.0, 30.0], outcome="timeout")["action"] == "hold"
+
+    controller = _controller()
+    controller.record(1.0, "success")
+    decision = _window(controller, [30.0, 30.0], outcome="timeout")
+    assert (decision["reason"], decision["limit"], decision["timeout_rate"]) == ("timeouts", 2, 0.67)
+
+
+def test_aimd_halves_when_latency_exceeds_learned_baseline():
+    controller = _controller()
+    _window(controller, [2.0, 2.0, 2.0])
+    assert controller.baseline_latency == 2.0
+
+    assert _window(controller, [3.5, 3.5, 3.5])["action"] == "hold"  # Within tolerance
+    baseline = controller.baseline_latency
+    decision = _window(controller, [10.0, 10.0, 10.0])
+    assert (decision["reason"], decision["limit"]) == ("latency", 2)
+    assert controller.baseline_latency == baseline  # Backed-off windows are not learned
+
+
+def test_aimd_holds_for_one_window_after_a_decrease():
+    controller = _controller()
+    controller.host[0] = 256.0
+    assert _window(controller, [1.0], saturated=True)["limit"] == 2
+
+    controller.host[0] = 8192.0
+    decision = _window(controller, [1.0], saturated=True)
+    assert (decision["action"], decision["reason"], decision["limit"]) == ("hold", "cooldown", 2)
+    assert _window(controller, [1.0], saturated=True)["limit"] == 3
+
+
+def test_aimd_never_drops_below_min_limit():
+    controller = _controller(min_limit=2, initial=3)
+    controller.host[0] = 256.0
+    for _ in range(3):
+        decision = _window(controller, [1.0])
+    assert decision["limit"] == 2
+
+
+def test_aimd_windows_start_empty():
+    controller = _controller()
+    _window(controller, [30.0, 30.0, 30.0], outcome="timeout")
+    decision = controller.update(saturated=False)
+    assert (decision["samples"], decision["timeout_rate"], decision["errors"]) == (0, 0.0, 0)
+
+
+# === SingleFlight ===
+
+
+class Work:
+    """A factory whose runs block until released, counting how often it runs."""
+
+    def __init__(self):
+        self.runs = 0
+        self.gate = asyncio.Event()
+        self.error: Exception | None = None
+
+    async def __call__(self):
+        self.runs += 1
+        await self.gate.wait()
+        if self.error:
+            raise self.error
+        return f"result-{self.runs}"
+
+
+def test_single_flight_callers_share_one_run():
+    async def main():
+        flights, work = SingleFlight(), Work()
+        callers = [asyncio.create_task(flights.do("key", work)) for _ in range(3)]
+        await _settle()
+        assert flights.in_flight == 1
+
+        work.gate.set()
+        assert await asyncio.gather(*callers) == ["result-1"] * 3
+        assert work.runs == 1
+        assert flights.get_stats() == {"started": 1, "coalesced": 2, "in_flight": 0}
+
+    asyncio.run(main())
+
+
+def test_single_flight_keys_run_independently():
+    async def main():
+        flights, work = SingleFlight(), Work()
+        work.gate.set()
+        assert await asyncio.gather(flights.do("a", work), flights.do("b", work)) == ["result-1", "result-2"]
+        assert (flights.started, flights.coalesced) == (2, 0)
+
+    asyncio.run(main())
+
+
+def test_single_flight_error_reaches_every_caller_and_is_not_cached():
+    async def main():
+        flights, work = SingleFlight(), Work()
+        work.error = RuntimeError("scrape failed")
+        callers = [asyncio.create_task(flights.do("key", work)) for _ in range(2)]
+        await _settle()
+        work.gate.set()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert results[0] is results[1]
+        assert flights.in_flight == 0
+
+        work.error = None  # The next call starts a fresh run
+        assert await flights.do("key", work) == "result-2"
+
+    asyncio.run(main())
+
+
+def test_single_flight_cancelled_caller_leaves_shared_work_running():
+    async def main():
+        flights, work = SingleFlight(), Work()
+        quitter = asyncio.create_task(flights.do("key", work))
+        stayer = asyncio.create_task(flights.do("key", work))
+        await _settle()
+
+        quitter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await quitter
+        assert flights.in_flight == 1
+
+        work.gate.set()
+        assert await stayer == "result-1"
+
+    asyncio.run(main())
+
+
+def test_single_flight_error_with_every_caller_cancelled_is_retrieved():
+    async def main():
+        loop = asyncio.get_running_loop()
+        unhandled = []
+        loop.set_exception_handler(lambda _, context: unhandled.append(context))
+
+        flights, work = SingleFlight(), Work()
+        work.error = RuntimeError("nobody is listening")
+        caller = asyncio.create_task(flights.do("key", work))
+        await _settle()
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+
+        work.gate.set()
+        await _settle()
+        assert flights.in_flight == 0
+        gc.collect()
+        assert unhandled == []
+
+    asyncio.run(main())
+
+
+def test_single_flight_cancel_all_stops_work_outliving_its_callers():
+    async def main():
+        flights, work = SingleFlight(), Work()
+        caller = asyncio.create_task(flights.do("key", work))
+        await _settle()
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        task = flights._inflight["key"]
+        assert not task.done()  # Shielded from its caller
+
+        await flights.cancel_all()
+        assert task.cancelled()
+        assert flights.in_flight == 0
+
+    asyncio.run(main())
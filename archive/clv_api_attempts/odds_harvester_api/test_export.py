@@ -0,0 +1,168 @@
+"""Tests for the bulk result export.
+
+Run with: python -m pytest -q test_export.py
+"""
+
+import asyncio
+import csv
+import gzip
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+import server
+from database import Database
+from export import EXPORT_FIELDS, encode_batches, gzip_chunks
+from job_archive import JobArchive, archive_completed_jobs
+
+# (bet_id, sport, event_date, bookmaker, fallback_type or None if unmatched)
+BETS = [
+    ("b1", "football", "2024-03-15T20:00:00Z", "Bet365", "exact"),
+    ("b2", "Football", "2024-03-16", "Pinnacle", "pinnacle"),
+    ("b3", "football", "2024-03-16T23:30:00Z", "bet365", "exact"),
+    ("b4", "tennis", "2024-03-17", "Bet365", "exact"),
+    ("b5", "football", "2024-03-16", "Bet365", None),
+]
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "clv_cache.db"))
+    database.create_job("job-1", len(BETS))
+    for bet_id, sport, event_date, bookmaker, _ in BETS:
+        database.create_bet_request(
+            "job-1", bet_id, sport, "Premier League",
+            "Brighton & Hove Albion", 'Nottingham "Forest"', "1X2", event_date, bookmaker,
+        )
+    for bet, (_, _, _, _, fallback_type) in zip(database.get_bet_requests("job-1"), BETS):
+        database.record_bet_result("job-1", bet["id"], {
+            "closingOdds": 2.05 if fallback_type else None, "bookmakerUsed": "Pinnacle",
+            "confidence": 0.9, "fallbackType": fallback_type or "failed", "matchScore": 0.97,
+        })
+    yield database
+    database.close()
+
+
+def _exported(db: Database, **filters) -> list[str]:
+    return [row["bet_id"] for batch in db.iter_bet_results(**filters) for row in batch]
+
+
+# === Filters ===
+
+
+def test_export_includes_only_matched_bets_by_event_date(db):
+    assert _exported(db) == ["b1", "b2", "b3", "b4"]
+
+
+@pytest.mark.parametrize(
+    "filters, bet_ids",
+    [
+        ({"date_from": "2024-03-16"}, ["b2", "b3", "b4"]),
+        ({"date_to": "2024-03-16"}, ["b1", "b2", "b3"]),  # Inclusive, times included
+        ({"date_from": "2024-03-16", "date_to": "2024-03-16"}, ["b2", "b3"]),
+        ({"sport": "FOOTBALL"}, ["b1", "b2", "b3"]),
+        ({"bookmaker": "BET365"}, ["b1", "b3", "b4"]),
+        ({"fallback_type": "pinnacle"}, ["b2"]),
+        ({"sport": "football", "bookmaker": "bet365", "date_from": "2024-03-16"}, ["b3"]),
+    ],
+)
+def test_export_filters(db, filters, bet_ids):
+    assert _exported(db, **filters) == bet_ids
+
+
+def test_export_reads_in_batches(db):
+    assert [len(batch) for batch in db.iter_bet_results(batch_size=3)] == [3, 1]
+
+
+# === Encoding ===
+
+
+def _rows(db: Database) -> list[dict]:
+    return [row for batch in db.iter_bet_results() for row in batch]
+
+
+def test_csv_has_a_header_and_quotes_awkward_values(db):
+    body = b"".join(encode_batches([(_rows(db)[:2], False), (_rows(db)[2:], True)], "csv"))
+    rows = list(csv.DictReader(io.StringIO(body.decode())))
+
+    assert tuple(rows[0]) == EXPORT_FIELDS
+    assert [(row["bet_id"], row["archived"]) for row in rows] == [
+        ("b1", "False"), ("b2", "False"), ("b3", "True"), ("b4", "True"),
+    ]
+    assert (rows[0]["home_team"], rows[0]["away_team"]) == ("Brighton & Hove Albion", 'Nottingham "Forest"')
+    assert rows[0]["closing_odds"] == "2.05"
+
+
+def test_csv_without_rows_is_just_the_header():
+    assert b"".join(encode_batches([], "csv")) == (",".join(EXPORT_FIELDS) + "\n").encode()
+
+
+def test_ndjson_is_one_object_per_line(db):
+    body = b"".join(encode_batches([(_rows(db), False)], "ndjson"))
+    lines = [json.loads(line) for line in body.decode().splitlines()]
+    assert [line["bet_id"] for line in lines] == ["b1", "b2", "b3", "b4"]
+    assert tuple(lines[0]) == EXPORT_FIELDS
+    assert (lines[0]["closing_odds"], lines[0]["archived"]) == (2.05, False)
+
+
+def test_gzip_chunks_form_one_gzip_stream():
+    chunks = [b"first line\n", b"", "ş\n".encode() * 1000]
+    compressed = list(gzip_chunks(chunks))
+    assert gzip.decompress(b"".join(compressed)) == b"".join(chunks)
+
+
+# === Endpoint ===
+
+
+async def _body(response) -> bytes:
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+def _export(accept_encoding: str = "", **params):
+    request = SimpleNamespace(headers={"accept-encoding": accept_encoding})
+
+    async def main():
+        response = await server.export_results(request, **params)
+        return response, await _body(response)
+
+    return asyncio.run(main())
+
+
+def test_endpoint_appends_archived_results_and_gzips(db, tmp_path, monkeypatch):
+    archive = JobArchive(str(tmp_path / "clv_archive.db"))
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "job_archive", archive)
+    db.update_job_status("job-1", "completed")
+    db.create_job("job-2", 1)
+    db.create_bet_request(
+        "job-2", "b6", "football", "Premier League", "Arsenal", "Chelsea", "1X2", "2024-03-18", "Bet365",
+    )
+    db.record_bet_result("job-2", db.get_bet_requests("job-2")[0]["id"], {
+        "closingOdds": 1.8, "bookmakerUsed": "Bet365", "confidence": 1.0,
+        "fallbackType": "exact", "matchScore": 1.0,
+    })
+    archive_completed_jobs(db, archive, retention_days=0)  # Moves job-1 only
+
+    response, body = _export("gzip, br", format="csv", include_archive=True, sport="football")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.media_type == "text/csv; charset=utf-8"
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(body).decode())))
+    assert [(row["bet_id"], row["archived"]) for row in rows] == [
+        ("b6", "False"), ("b1", "True"), ("b2", "True"), ("b3", "True"),
+    ]
+
+    response, body = _export(format="ndjson", fallback_type="exact")
+    assert "content-encoding" not in response.headers
+    assert [json.loads(line)["bet_id"] for line in body.decode().splitlines()] == ["b6"]
+    archive.close()
+
+
+@pytest.mark.parametrize("params", [{"format": "xml"}, {"date_from": "16/03/2024"}])
+def test_endpoint_rejects_bad_parameters(db, monkeypatch, params):
+    monkeypatch.setattr(server, "db", db)
+    with pytest.raises(HTTPException) as error:
+        _export(**{"format": "ndjson", **params})
+    assert error.value.status_code == 422
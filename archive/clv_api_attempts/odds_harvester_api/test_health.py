@@ -0,0 +1,38 @@
+"""Tests for the /health snapshot.
+
+Run with: python -m pytest -q test_health.py
+"""
+
+import asyncio
+
+import pytest
+
+import server
+from database import Database
+from health import HealthMonitor
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "clv_cache.db"))
+    yield database
+    database.close()
+
+
+def test_health_serves_pool_stats_from_the_snapshot(db, tmp_path, monkeypatch):
+    processor = server.JobProcessor(db)
+    monitor = HealthMonitor(server.collect_health_stats, str(tmp_path))
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "job_processor", processor)
+    monkeypatch.setattr(server, "health_monitor", monitor)
+
+    asyncio.run(monitor.refresh())
+    assert monitor.snapshot["browser_pool"]["live"] == 0
+
+    def get_stats():
+        raise AssertionError("pool stats read on the request path")
+
+    monkeypatch.setattr(processor.browser_pool, "get_stats", get_stats)
+    health = asyncio.run(server.health_check())
+    assert health.browser_pool == monitor.snapshot["browser_pool"]
+    assert health.failure_rate == 0.0
@@ -0,0 +1,148 @@
+"""Tests for archiving finished jobs to the cold store.
+
+Run with: python -m pytest -q test_job_archive.py
+"""
+
+import asyncio
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, Response
+
+import server
+from database import Database
+from job_archive import (
+    ARCHIVED_FAILURE_FIELDS,
+    ARCHIVED_RESULT_FIELDS,
+    JobArchive,
+    _pack,
+    _unpack,
+    archive_completed_jobs,
+)
+
+MATCHED = {
+    "closingOdds": 2.05, "bookmakerUsed": "Pinnacle", "confidence": 0.9,
+    "fallbackType": "exact", "matchScore": 0.97,
+}
+
+
+@pytest.fixture
+def stores(tmp_path):
+    db = Database(str(tmp_path / "clv_cache.db"))
+    archive = JobArchive(str(tmp_path / "clv_archive.db"))
+    yield db, archive
+    db.close()
+    archive.close()
+
+
+def _job(db: Database, job_id: str, status: str = "completed", bets: int = 2):
+    """A job of `bets` bets, the first one matched."""
+    db.create_job(job_id, bets)
+    for i in range(bets):
+        db.create_bet_request(
+            job_id, f"{job_id}-b{i}", "football", "Premier League",
+            f"Home {i}", f"Away {i}", "1X2", "2024-03-16", "Bet365",
+        )
+    first = db.get_bet_requests(job_id)[0]
+    db.record_bet_result(job_id, first["id"], MATCHED)
+    db.update_job_status(job_id, status, "1 of 2 groups failed" if status == "failed" else None)
+
+
+def test_pack_round_trips_rows_in_field_order():
+    rows = [
+        {"timestamp": 1, "error_type": "scrape", "error_message": "Nš Mura – timeout"},
+        {"timestamp": 2, "error_type": None, "error_message": None, "ignored": "x"},
+    ]
+    blob = _pack(rows, ARCHIVED_FAILURE_FIELDS)
+    assert blob[:2] == b"\x1f\x8b"  # gzip
+    assert _unpack(blob, ARCHIVED_FAILURE_FIELDS) == [
+        {"timestamp": 1, "error_type": "scrape", "error_message": "Nš Mura – timeout"},
+        {"timestamp": 2, "error_type": None, "error_message": None},
+    ]
+
+
+def test_unpack_of_nothing_is_empty():
+    assert _unpack(None, ARCHIVED_RESULT_FIELDS) == []
+    assert _unpack(_pack([], ARCHIVED_RESULT_FIELDS), ARCHIVED_RESULT_FIELDS) == []
+
+
+def test_archive_moves_finished_jobs_with_results_and_failures(stores):
+    db, archive = stores
+    _job(db, "done")
+    _job(db, "broken", status="failed")
+    _job(db, "running", status="processing")
+    db.log_failure("broken", "group_error", "football/epl on 2024-03-16: timeout")
+
+    moved = archive_completed_jobs(db, archive, retention_days=0)
+
+    assert moved == {"jobs": 2, "bets": 4, "failures": 1}
+    assert db.get_job("done") is None and db.get_bet_requests("done") == []
+    assert db.get_failures_for_job("broken") == []
+    assert db.get_job("running")["status"] == "processing"
+
+    job = archive.get_job("broken")
+    assert (job["status"], job["total_bets"], job["processed_bets"]) == ("failed", 2, 1)
+    assert job["error_log"] == "1 of 2 groups failed"
+    assert archive.get_bet_results("done") == [{"bet_id": "done-b0", **MATCHED}]
+    assert [bet["home_team"] for bet in archive.get_bet_requests("done")] == ["Home 0", "Home 1"]
+    assert archive.get_job_count() == 2
+
+
+def test_archive_keeps_jobs_inside_the_retention_window(stores):
+    db, archive = stores
+    _job(db, "recent")
+    assert archive_completed_jobs(db, archive, retention_days=14)["jobs"] == 0
+    assert db.get_job("recent") is not None
+
+
+def test_archive_works_in_batches(stores):
+    db, archive = stores
+    for i in range(5):
+        _job(db, f"job-{i}", bets=1)
+    moved = archive_completed_jobs(db, archive, retention_days=0, batch_size=2)
+    assert (moved["jobs"], archive.get_job_count()) == (5, 5)
+
+
+def test_archived_results_are_read_through_a_read_only_connection(stores):
+    db, archive = stores
+    _job(db, "done")
+    archive_completed_jobs(db, archive, retention_days=0)
+
+    batches = list(archive.iter_bet_results(sport="FOOTBALL", date_from="2024-03-16"))
+    assert [[row["bet_id"] for row in batch] for batch in batches] == [["done-b0"]]
+    assert batches[0][0]["job_id"] == "done"
+    assert list(archive.iter_bet_results(date_to="2024-03-15")) == []
+
+    conn = archive._read_only_connection()
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("DELETE FROM archived_jobs")
+    conn.close()
+
+
+def _get_job_status(job_id: str, if_none_match: str = None):
+    request = SimpleNamespace(headers={"if-none-match": if_none_match} if if_none_match else {})
+    response = Response()
+    return asyncio.run(server.get_job_status(job_id, request, response)), response
+
+
+def test_job_status_serves_archived_jobs(stores, monkeypatch):
+    db, archive = stores
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "job_archive", archive)
+    monkeypatch.setattr(server, "job_processor", None)
+    _job(db, "done")
+    hot, _ = _get_job_status("done")
+    archive_completed_jobs(db, archive, retention_days=0)
+
+    status, response = _get_job_status("done")
+    assert status.archived and not hot.archived
+    assert (status.status, status.progress["current"], status.progress["total"]) == ("completed", 1, 2)
+    assert status.results == hot.results == [{"bet_id": "done-b0", **MATCHED}]
+
+    not_modified, _ = _get_job_status("done", if_none_match=response.headers["ETag"])
+    assert not_modified.status_code == 304
+
+    with pytest.raises(HTTPException) as missing:
+        _get_job_status("never-existed")
+    assert missing.value.status_code == 404
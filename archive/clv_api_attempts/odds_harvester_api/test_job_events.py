@@ -0,0 +1,116 @@
+"""Tests for job event logs and the job event stream iterator.
+
+Run with: python -m pytest -q test_job_events.py
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import server
+from job_events import JobEventBus, parse_cursor
+
+
+def _finished_bus(job_id: str = "job-1") -> JobEventBus:
+    bus = JobEventBus()
+    bus.publish(job_id, "job_started", total=1)
+    bus.publish(job_id, "bet_result", bet_id="b1")
+    bus.publish(job_id, "job_completed", processed=1)
+    return bus
+
+
+async def _collect(
+    job_id: str, cursor: int, bus: JobEventBus, limit: int = 100, epoch: str = None
+) -> list:
+    """Drain iter_job_events, failing instead of spinning if it never ends."""
+    server.job_processor = SimpleNamespace(events=bus)
+    items = []
+
+    async def drain():
+        async for item in server.iter_job_events(job_id, cursor, epoch):
+            items.append(item)
+            assert len(items) <= limit, "iterator keeps yielding after the terminal event"
+
+    await asyncio.wait_for(drain(), timeout=2)
+    return items
+
+
+def test_wait_returns_events_after_cursor():
+    bus = _finished_bus()
+    events = asyncio.run(bus.wait("job-1", 1, timeout=1))
+    assert [event["type"] for event in events] == ["bet_result", "job_completed"]
+
+
+def test_finished_log_is_exhausted_only_at_its_end():
+    bus = _finished_bus()
+    assert not bus.is_exhausted("job-1", 2)
+    assert bus.is_exhausted("job-1", 3)
+    assert bus.is_exhausted("job-1", 7)
+    assert not bus.is_exhausted("unknown", 3)
+
+
+def test_running_log_is_not_exhausted():
+    bus = JobEventBus()
+    bus.publish("job-1", "job_started", total=1)
+    assert not bus.is_exhausted("job-1", 1)
+
+
+def test_stream_ends_after_terminal_event():
+    items = asyncio.run(_collect("job-1", 0, _finished_bus()))
+    assert [event_type for _, event_type, _ in items] == ["job_started", "bet_result", "job_completed"]
+    assert items[-1][0] == 3
+
+
+def test_reconnect_to_finished_job_ends_without_keepalives():
+    # EventSource reconnects with Last-Event-ID set to the job_completed seq
+    assert asyncio.run(_collect("job-1", 3, _finished_bus())) == []
+
+
+def test_reconnect_past_end_of_finished_job_ends():
+    assert asyncio.run(_collect("job-1", 10, _finished_bus())) == []
+
+
+def test_reconnect_mid_stream_resumes_from_cursor():
+    items = asyncio.run(_collect("job-1", 1, _finished_bus()))
+    assert [seq for seq, _, _ in items] == [2, 3]
+
+
+def test_waiting_on_an_unknown_job_creates_no_log():
+    bus = JobEventBus()
+    assert asyncio.run(bus.wait("never-queued", 0, timeout=0.05)) == []
+    assert bus.get_log("never-queued") is None
+
+
+def test_wait_ends_when_the_jobs_first_event_is_published():
+    async def main():
+        bus = JobEventBus()
+        waiter = asyncio.create_task(bus.wait("job-1", 0, timeout=2))
+        await asyncio.sleep(0.01)
+        bus.publish("other-job", "job_started", total=1)
+        bus.publish("job-1", "job_started", total=1)
+        return await waiter
+
+    assert [event["type"] for event in asyncio.run(main())] == ["job_started"]
+
+
+@pytest.mark.parametrize(
+    "value, parsed",
+    [("1f2e3d4c-17", ("1f2e3d4c", 17)), ("17", (None, 17)), ("", (None, 0)), ("abc", (None, 0))],
+)
+def test_parse_cursor(value, parsed):
+    assert parse_cursor(value) == parsed
+
+
+def test_cursor_from_another_process_gets_a_snapshot(monkeypatch):
+    # The job was resumed after a restart: its new log starts again at seq 1
+    bus = _finished_bus()
+    snapshot = {"status": "completed", "progress": {"current": 1, "total": 1}}
+    monkeypatch.setattr(server, "get_job_snapshot", lambda job_id: snapshot)
+
+    items = asyncio.run(_collect("job-1", 2, bus, epoch="0" * 8))
+    assert items == [(3, "snapshot", snapshot)]
+
+    epoch, seq = parse_cursor(bus.format_cursor(2))
+    items = asyncio.run(_collect("job-1", seq, bus, epoch=epoch))
+    assert [event_seq for event_seq, _, _ in items] == [3]
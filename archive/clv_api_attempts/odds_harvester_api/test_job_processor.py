@@ -0,0 +1,354 @@
+"""Tests for JobProcessor dispatch and job processing.
+
+Run with: python -m pytest -q test_job_processor.py
+"""
+
+import asyncio
+
+import pytest
+
+import server
+from database import Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "clv_cache.db"))
+    yield database
+    database.close()
+
+
+def _queue_job(
+    db: Database, job_id: str, priority: str = "routine", dates: tuple = ("2024-03-16",)
+):
+    """A queued job with one Premier League bet per date (one group each)."""
+    db.create_job(job_id, len(dates), priority)
+    for i, event_date in enumerate(dates):
+        db.create_bet_request(
+            job_id, f"{job_id}-b{i}", "football", "Premier League",
+            "Arsenal", "Chelsea", "1X2", event_date, "Pinnacle",
+        )
+
+
+async def _until(condition, timeout: float = 2.0):
+    """Poll condition() on the event loop until it holds."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+async def _dispatching_processor(db: Database) -> tuple[server.JobProcessor, list]:
+    """A started processor whose jobs only record that they were dispatched."""
+    processor = server.JobProcessor(db)
+    dispatched = []
+
+    async def process_job(job_id):
+        dispatched.append(job_id)
+        processor._active_jobs.pop(job_id, None)
+
+    processor._process_job = process_job
+    await processor.start()
+    return processor, dispatched
+
+
+# === Dispatch ===
+
+
+@pytest.fixture
+def no_sweep(monkeypatch):
+    """Keep the recovery sweep from running again during a test."""
+    monkeypatch.setattr(server, "JOB_RECOVERY_SWEEP_SECONDS", 3600)
+
+
+def test_notified_job_is_dispatched_without_waiting_for_the_sweep(db, no_sweep):
+    async def main():
+        processor, dispatched = await _dispatching_processor(db)
+        await asyncio.sleep(0.05)  # The startup sweep found nothing
+        _queue_job(db, "job-1", "interactive")
+        processor.notify_job_queued("job-1", "interactive")
+
+        await _until(lambda: dispatched == ["job-1"])
+        assert db.get_job("job-1")["status"] == "processing"
+        assert processor.get_dispatch_stats()["interactive"]["samples"] == 1
+        await processor.stop()
+
+    asyncio.run(main())
+
+
+def test_jobs_queued_without_a_signal_are_picked_up_by_the_sweep(db, no_sweep):
+    async def main():
+        _queue_job(db, "backfill-job", "backfill")
+        _queue_job(db, "interactive-job", "interactive")
+        processor, dispatched = await _dispatching_processor(db)
+
+        await _until(lambda: len(dispatched) == 2)
+        assert dispatched == ["interactive-job", "backfill-job"]  # By priority class
+        await processor.stop()
+
+    asyncio.run(main())
+
+
+def test_repeated_wakeups_dispatch_a_job_once(db, no_sweep):
+    async def main():
+        processor, dispatched = await _dispatching_processor(db)
+        _queue_job(db, "job-1")
+        for _ in range(3):
+            processor.notify_job_queued("job-1")
+
+        await _until(lambda: processor._wakeup.empty())
+        await asyncio.sleep(0.05)
+        assert dispatched == ["job-1"]
+        await processor.stop()
+
+    asyncio.run(main())
+
+
+def test_wakeup_for_a_job_claimed_elsewhere_is_ignored(db, no_sweep):
+    async def main():
+        processor, dispatched = await _dispatching_processor(db)
+        _queue_job(db, "job-1")
+        assert db.claim_job("job-1")  # e.g. by run_job_now in another request
+        processor.notify_job_queued("job-1")
+
+        await _until(lambda: processor._wakeup.empty())
+        await asyncio.sleep(0.05)
+        assert dispatched == []
+        await processor.stop()
+
+    asyncio.run(main())
+
+
+def test_unknown_priority_is_dispatched_as_routine(db, no_sweep):
+    async def main():
+        processor, dispatched = await _dispatching_processor(db)
+        _queue_job(db, "job-1")
+        processor.notify_job_queued("job-1", "urgent")
+
+        await _until(lambda: dispatched == ["job-1"])
+        assert list(processor.get_dispatch_stats()) == ["routine"]
+        await processor.stop()
+
+    asyncio.run(main())
+
+
+# === Partial group failures ===
+
+DATES = ("2024-03-16", "2024-03-17", "2024-03-18")
+
+
+async def _process(
+    db: Database, job_id: str, failing_dates: set, processor: server.JobProcessor = None
+) -> server.JobProcessor:
+    """Run a job to the end, failing the scrape of the given dates."""
+    processor = processor or server.JobProcessor(db)
+
+    async def scrape_and_cache(sport, league, event_date, markets, bookmakers=None):
+        if event_date in failing_dates:
+            raise RuntimeError("scrape blew up")
+        return {"matches": []}
+
+    processor._scrape_and_cache = scrape_and_cache
+    processor.running = True
+    assert db.claim_job(job_id)
+    await processor._process_job(job_id)
+    return processor
+
+
+def _event_types(processor: server.JobProcessor, job_id: str) -> list[str]:
+    return [event["type"] for event in processor.events.get_log(job_id).events]
+
+
+def test_job_with_some_failed_groups_completes_with_an_error_log(db):
+    _queue_job(db, "job-1", dates=DATES)
+    processor = asyncio.run(_process(db, "job-1", {"2024-03-17"}))
+
+    job = db.get_job("job-1")
+    assert job["status"] == "completed"
+    assert job["error_log"] == (
+        "1 of 3 groups failed: football/england-premier-league on 2024-03-17: scrape blew up"
+    )
+    assert job["processed_bets"] == 2  # The failed group's bet stays unprocessed
+    assert {group["event_date"]: group["status"] for group in db.get_job_groups("job-1")} == {
+        "2024-03-16": "completed", "2024-03-17": "failed", "2024-03-18": "completed",
+    }
+    assert [failure["error_type"] for failure in db.get_failures_for_job("job-1")] == ["group_error"]
+
+    completed = processor.events.get_log("job-1").events[-1]
+    assert (completed["type"], completed["data"]["failed_groups"]) == ("job_completed", 1)
+
+
+def test_job_fails_when_every_group_fails(db):
+    _queue_job(db, "job-1", dates=DATES)
+    processor = asyncio.run(_process(db, "job-1", set(DATES)))
+
+    job = db.get_job("job-1")
+    assert job["status"] == "failed"
+    assert job["error_log"].startswith("All 3 groups failed: ")
+    assert [failure["error_type"] for failure in db.get_failures_for_job("job-1")] == ["group_error"] * 3
+    assert _event_types(processor, "job-1")[-1] == "job_failed"
+
+
+def test_job_without_failures_has_no_error_log(db):
+    _queue_job(db, "job-1", dates=DATES)
+    asyncio.run(_process(db, "job-1", set()))
+    job = db.get_job("job-1")
+    assert (job["status"], job["error_log"], job["processed_bets"]) == ("completed", None, 3)
+
+
+@pytest.mark.parametrize(
+    "statuses, outcome",
+    [
+        (("completed", "failed"), ("completed", "1 of 2 groups failed")),
+        (("failed", "failed"), ("failed", "2 of 2 groups failed")),
+        (("completed", "running"), None),  # Not done yet
+    ],
+)
+def test_queued_job_finishes_by_the_same_rule(db, statuses, outcome):
+    _queue_job(db, "job-1", dates=DATES[:2])
+    assert db.claim_job("job-1")
+    db.create_job_groups(
+        "job-1", [("football", "epl", date, []) for date in DATES[:2]], status="queued"
+    )
+    for date, status in zip(DATES, statuses):
+        db.update_job_group("job-1", "football", "epl", date, status=status)
+
+    assert db.finish_job_if_done("job-1") == (outcome and outcome[0])
+    if outcome:
+        job = db.get_job("job-1")
+        assert (job["status"], job["error_log"]) == outcome
+
+
+# === Shutdown and resume ===
+
+
+def test_job_interrupted_by_shutdown_resumes_from_its_checkpoints(db):
+    _queue_job(db, "job-1", dates=DATES)
+
+    async def interrupt():
+        # One slot: the first group finishes, the second holds the slot
+        # until shutdown begins and the third is still waiting for it
+        processor = server.JobProcessor(db)
+        processor._scrape_slots.set_limit(1)
+        holding, release, scraped = asyncio.Event(), asyncio.Event(), []
+
+        async def scrape_and_cache(sport, league, event_date, markets, bookmakers=None):
+            async with processor._scrape_slot():
+                if event_date == DATES[1]:
+                    holding.set()
+                    await release.wait()
+                scraped.append(event_date)
+            return {"matches": []}
+
+        processor._scrape_and_cache = scrape_and_cache
+        processor.running = True
+        assert db.claim_job("job-1")
+        job = asyncio.create_task(processor._process_job("job-1"))
+        await asyncio.wait_for(holding.wait(), timeout=2)
+
+        processor.running = False  # As JobProcessor.stop does first
+        release.set()
+        await asyncio.gather(job, return_exceptions=True)
+        return scraped
+
+    assert asyncio.run(interrupt()) == list(DATES[:2])  # The waiting group never scraped
+    assert db.get_job("job-1")["status"] == "processing"
+    assert {group["event_date"]: group["status"] for group in db.get_job_groups("job-1")} == {
+        DATES[0]: "completed", DATES[1]: "completed", DATES[2]: "interrupted",
+    }
+
+    # Next start: the job is requeued and only the unprocessed bet is scored
+    assert db.requeue_interrupted_jobs() == ["job-1"]
+    processor = server.JobProcessor(db)
+    scored = []
+    match_bet = processor._match_bet_to_odds
+
+    def match_bet_to_odds(bet, cached_data, match_index=None):
+        scored.append(bet["bet_id"])
+        return match_bet(bet, cached_data, match_index)
+
+    processor._match_bet_to_odds = match_bet_to_odds
+    asyncio.run(_process(db, "job-1", set(), processor))
+
+    assert scored == ["job-1-b2"]
+    job = db.get_job("job-1")
+    assert (job["status"], job["processed_bets"]) == ("completed", 3)
+    events = processor.events.get_log("job-1").events
+    assert events[0]["data"]["resumed"] == 2
+    assert [event["data"]["processed"] for event in events if event["type"] == "bet_result"] == [3]
+    assert events[-1]["data"]["processed"] == 3
+
+
+# === Client deadline ===
+
+
+def _batch(dates: tuple, deadline_ms: int = None) -> server.BatchRequest:
+    return server.BatchRequest(
+        bets=[
+            server.BetRequest(
+                betId=f"b{i}", sport="football", tournament="Premier League",
+                homeTeam="Arsenal", awayTeam="Chelsea", market="1X2",
+                eventDate=event_date, bookmaker="Pinnacle",
+            )
+            for i, event_date in enumerate(dates)
+        ],
+        deadlineMs=deadline_ms,
+    )
+
+
+def _slow_processor(db: Database, monkeypatch, slow_date: str) -> asyncio.Event:
+    """Serve a processor whose scrape of slow_date blocks until the returned event is set."""
+    processor = server.JobProcessor(db)
+    release = asyncio.Event()
+
+    async def scrape_and_cache(sport, league, event_date, markets, bookmakers=None):
+        if event_date == slow_date:
+            await release.wait()
+        return {"matches": []}
+
+    processor._scrape_and_cache = scrape_and_cache
+    processor.running = True
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "job_processor", processor)
+    return release
+
+
+def test_deadline_returns_finished_bets_and_keeps_processing_the_rest(db, monkeypatch):
+    async def main():
+        release = _slow_processor(db, monkeypatch, slow_date=DATES[1])
+        response = await server.create_batch_job(_batch(DATES[:2], deadline_ms=200))
+        assert response["status"] == "processing"
+        assert [result["bet_id"] for result in response["results"]] == ["b0"]
+        assert response["pending"] == ["b1"]
+
+        release.set()
+        await _until(lambda: db.get_job(response["job_id"])["status"] == "completed")
+        assert db.get_job(response["job_id"])["processed_bets"] == 2
+
+    asyncio.run(main())
+
+
+def test_without_a_deadline_the_response_waits_for_every_bet(db, monkeypatch):
+    async def main():
+        release = _slow_processor(db, monkeypatch, slow_date=DATES[1])
+        submitted = asyncio.create_task(server.create_batch_job(_batch(DATES[:2])))
+        await asyncio.sleep(0.2)
+        assert not submitted.done()
+
+        release.set()
+        response = await asyncio.wait_for(submitted, timeout=2)
+        assert (response["status"], response["processed"]) == ("completed", 2)
+        assert "pending" not in response
+
+    asyncio.run(main())
+
+
+def test_deadline_met_by_cached_bets_returns_a_complete_response(db, monkeypatch):
+    async def main():
+        _slow_processor(db, monkeypatch, slow_date="never")
+        response = await server.create_batch_job(_batch(DATES[:2], deadline_ms=1000))
+        assert (response["status"], response["processed"]) == ("completed", 2)
+        assert "pending" not in response
+
+    asyncio.run(main())
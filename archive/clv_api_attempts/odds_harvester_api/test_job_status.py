@@ -0,0 +1,152 @@
+"""Tests for job status ETags and long-polling.
+
+Run with: python -m pytest -q test_job_status.py
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Response
+
+import metrics
+import server
+from database import Database
+from job_events import JobEventBus
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    database = Database(str(tmp_path / "clv_cache.db"))
+    database.create_job("job-1", 2)
+    for i in range(2):
+        database.create_bet_request(
+            "job-1", f"b{i}", "football", "Premier League",
+            "Arsenal", "Chelsea", "1X2", "2024-03-16", "Pinnacle",
+        )
+    assert database.claim_job("job-1")
+    monkeypatch.setattr(server, "db", database)
+    monkeypatch.setattr(server, "job_archive", None)
+    monkeypatch.setattr(server, "job_processor", SimpleNamespace(events=JobEventBus()))
+    yield database
+    database.close()
+
+
+async def _status(if_none_match: str = None, wait: float = 0):
+    request = SimpleNamespace(headers={"if-none-match": if_none_match} if if_none_match else {})
+    response = Response()
+    result = await server.get_job_status("job-1", request, response, wait=wait)
+    return result, result.headers if isinstance(result, Response) else response.headers
+
+
+def _record_first_bet(db: Database):
+    bet = db.get_bet_requests("job-1")[0]
+    db.record_bet_result("job-1", bet["id"], {
+        "closingOdds": 2.05, "bookmakerUsed": "Pinnacle", "confidence": 0.9,
+        "fallbackType": "exact", "matchScore": 0.97,
+    })
+
+
+# === ETags ===
+
+
+@pytest.mark.parametrize(
+    "if_none_match, matches",
+    [
+        (None, False),
+        ('W/"processing-1-2"', True),
+        ('"processing-1-2"', True),  # Weak comparison ignores W/
+        ('W/"processing-0-2", W/"processing-1-2"', True),
+        ("*", True),
+        ('W/"completed-2-2"', False),
+    ],
+)
+def test_etag_matches_by_weak_comparison(if_none_match, matches):
+    assert server.etag_matches(if_none_match, 'W/"processing-1-2"') is matches
+
+
+def test_etag_changes_with_status_and_progress():
+    job = {"status": "processing", "processed_bets": 1, "total_bets": 2}
+    assert server.job_etag(job) == 'W/"processing-1-2"'
+    assert server.job_etag({**job, "processed_bets": 2}) != server.job_etag(job)
+    assert server.job_etag({**job, "status": "completed"}) != server.job_etag(job)
+
+
+def test_matching_etag_gets_304_without_a_body(db):
+    full, headers = asyncio.run(_status())
+    assert full.status == "processing" and full.progress["current"] == 0
+    before = metrics.JOB_STATUS_REQUESTS.get("not_modified", "false")
+
+    not_modified, _ = asyncio.run(_status(headers["ETag"]))
+    assert not_modified.status_code == 304 and not_modified.body == b""
+    assert not_modified.headers["ETag"] == headers["ETag"]
+    assert metrics.JOB_STATUS_REQUESTS.get("not_modified", "false") == before + 1
+
+    _record_first_bet(db)
+    changed, _ = asyncio.run(_status(headers["ETag"]))
+    assert changed.progress["current"] == 1
+
+
+# === Long-polling ===
+
+
+def test_long_poll_returns_when_the_job_progresses(db):
+    async def main():
+        _, headers = await _status()
+        events = server.job_processor.events
+        events.publish("job-1", "job_started", total=2)
+        poll = asyncio.create_task(_status(headers["ETag"], wait=5))
+        await asyncio.sleep(0.05)
+        assert not poll.done()
+
+        _record_first_bet(db)
+        events.publish("job-1", "bet_result", bet_id="b0", processed=1, total=2)
+        started = time.monotonic()
+        result, new_headers = await asyncio.wait_for(poll, timeout=2)
+        return result, new_headers, headers, time.monotonic() - started
+
+    result, new_headers, headers, elapsed = asyncio.run(main())
+    assert result.progress["current"] == 1
+    assert new_headers["ETag"] != headers["ETag"]
+    assert elapsed < 1
+
+
+def test_long_poll_is_woken_by_the_jobs_first_event(db):
+    # No event log yet (e.g. the job is still queued): the poll waits for one
+    async def main():
+        _, headers = await _status()
+        poll = asyncio.create_task(_status(headers["ETag"], wait=5))
+        await asyncio.sleep(0.05)
+        _record_first_bet(db)
+        server.job_processor.events.publish("job-1", "bet_result", bet_id="b0")
+        return await asyncio.wait_for(poll, timeout=2)
+
+    result, _ = asyncio.run(main())
+    assert result.progress["current"] == 1
+
+
+def test_long_poll_times_out_with_304(db):
+    async def main():
+        _, headers = await _status()
+        started = time.monotonic()
+        result, _ = await _status(headers["ETag"], wait=0.2)
+        return result, time.monotonic() - started
+
+    result, elapsed = asyncio.run(main())
+    assert result.status_code == 304
+    assert 0.15 < elapsed < 1
+
+
+def test_long_poll_on_a_finished_job_returns_304_at_once(db):
+    db.update_job_status("job-1", "completed")
+
+    async def main():
+        _, headers = await _status()
+        started = time.monotonic()
+        result, _ = await _status(headers["ETag"], wait=30)
+        return result, time.monotonic() - started
+
+    result, elapsed = asyncio.run(main())
+    assert result.status_code == 304
+    assert elapsed < 0.5
@@ -0,0 +1,62 @@
+"""Tests for the queued logging pipeline.
+
+Run with: python -m pytest -q test_log_setup.py
+"""
+
+import logging
+import sys
+
+import pytest
+
+from log_setup import _LazyQueueHandler
+
+
+def _record(msg, args, exc_info=None) -> logging.LogRecord:
+    return logging.LogRecord("test", logging.INFO, __file__, 1, msg, args, exc_info)
+
+
+@pytest.fixture
+def handler():
+    return _LazyQueueHandler(None)
+
+
+@pytest.mark.parametrize(
+    "msg, args",
+    [
+        ("no args", ()),
+        ("%s vs %s -> %s (%.2f)", ("Arsenal", "Chelsea", None, 0.5)),
+        ("%s", (("nested", 1, (2.0, True)),)),
+    ],
+)
+def test_immutable_args_are_enqueued_unformatted(handler, msg, args):
+    record = _record(msg, args)
+    assert handler.prepare(record) is record
+
+
+def test_mutable_args_are_formatted_at_the_call(handler):
+    teams = ["Arsenal"]
+    record = _record("teams %s", (teams,))
+    prepared = handler.prepare(record)
+    teams.append("Chelsea")  # Changed before the listener formats it
+
+    assert prepared is not record
+    assert prepared.getMessage() == "teams ['Arsenal']"
+    assert prepared.args is None
+    assert record.args == (teams,)  # Other handlers still see the original
+
+
+def test_mapping_args_are_formatted_at_the_call(handler):
+    bet = {"home_team": "Arsenal", "closingOdds": None}
+    prepared = handler.prepare(_record("%(home_team)s at %(closingOdds)s", (bet,)))
+    bet["closingOdds"] = 2.1
+    assert prepared.getMessage() == "Arsenal at None"
+
+
+def test_formatting_at_the_call_keeps_exc_info(handler):
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        exc_info = sys.exc_info()
+    prepared = handler.prepare(_record("failed %s", ([1],), exc_info))
+    assert prepared.exc_info is exc_info
+    assert "RuntimeError: boom" in logging.Formatter().format(prepared)
@@ -0,0 +1,110 @@
+"""Tests comparing MatchIndex with a full find_best_match scan.
+
+Run with: python -m pytest -q test_match_index.py
+"""
+
+import random
+from datetime import date
+
+import pytest
+
+from fuzzy_matcher import find_best_match
+from match_index import MAX_DAY_DISTANCE, MatchIndex, parse_match_date
+from server import normalize_team_name
+
+PAYLOAD = [
+    {"home_team": "Arsenal", "away_team": "Chelsea", "date": "2024-03-16T12:30:00Z"},
+    {"home_team": "Manchester United", "away_team": "Liverpool", "date": "2024-03-16"},
+    {"home_team": "Manchester City", "away_team": "Tottenham Hotspur", "date": "2024-03-16"},
+    {"home_team": "Brighton & Hove Albion", "away_team": "Nottingham Forest", "date": "2024-03-17"},
+    {"home_team": "Wolverhampton Wanderers", "away_team": "AFC Bournemouth", "date": "2024-03-17"},
+    {"home_team": "Newcastle United", "away_team": "West Ham United", "date": "17.03.2024"},
+    {"home_team": "Crystal Palace", "away_team": "Everton", "date": "2024-03-18T00:00:00Z"},
+    {"home_team": "Borussia Mönchengladbach", "away_team": "1. FC Köln", "date": "2024-03-16"},
+    {"home_team": "Arsenal", "away_team": "Chelsea", "date": "2024-03-27"},  # Same fixture, other round
+    {"home_team": "Aston Villa", "away_team": "Luton Town", "date": None},
+]
+
+BETS = [
+    ("Arsenal", "Chelsea", "2024-03-16"),
+    ("Arsenal FC", "Chelsea FC", "2024-03-16T00:00:00Z"),  # Midnight kickoff
+    ("Arsenal", "Chelsea", "2024-03-15T23:45:00Z"),  # Day before, within a day
+    ("Arsenal", "Chelsea", "2024-03-27"),  # The later fixture
+    ("Man Utd", "Liverpool", "2024-03-16"),
+    ("Manchester Utd", "Liverpol", "2024-03-16"),  # Near-miss spellings
+    ("Man City", "Tottenham", "2024-03-16"),
+    ("Brighton", "Nottm Forest", "2024-03-17"),
+    ("Wolves", "Bournemouth", "2024-03-17"),
+    ("Newcastle", "West Ham", "2024-03-17"),
+    ("Crystal Palace", "Everton", "2024-03-17T23:59:59Z"),
+    ("Borussia Monchengladbach", "FC Koln", "2024-03-16"),
+    ("Aston Villa", "Luton", "2024-03-20"),  # Payload match without a date
+    ("Aston Villa", "Luton", ""),  # Bet without a date
+    ("Real Madrid", "Barcelona", "2024-03-16"),  # Not in the payload
+    ("Arsenal", "Chelsea", "2024-03-20"),  # Both fixtures too far away
+]
+
+
+def _scan(matches: list[dict], home_team: str, away_team: str, event_date: str):
+    """Reference: score every match within a day of the bet with find_best_match."""
+    home, away = normalize_team_name(home_team), normalize_team_name(away_team)
+    day = parse_match_date(event_date)
+    best_match, best_score = None, 0.0
+    for match in matches:
+        match_day = parse_match_date(match.get("date"))
+        if day and match_day:
+            if abs((date.fromisoformat(match_day) - date.fromisoformat(day)).days) > MAX_DAY_DISTANCE:
+                continue
+        home_result = find_best_match(home, [normalize_team_name(match["home_team"])])
+        away_result = find_best_match(away, [normalize_team_name(match["away_team"])])
+        if home_result and away_result:
+            score = (home_result["score"] + away_result["score"]) / 2
+            if score > best_score:
+                best_match, best_score = match, score
+    return best_match, best_score
+
+
+@pytest.fixture(scope="module")
+def index():
+    return MatchIndex(PAYLOAD, normalize_team_name)
+
+
+@pytest.mark.parametrize("home, away, event_date", BETS)
+def test_index_agrees_with_a_full_scan(index, home, away, event_date):
+    assert index.best_match(home, away, event_date) == _scan(PAYLOAD, home, away, event_date)
+
+
+def test_index_picks_the_fixture_nearest_the_bet_date(index):
+    assert index.best_match("Arsenal", "Chelsea", "2024-03-16")[0] is PAYLOAD[0]
+    assert index.best_match("Arsenal", "Chelsea", "2024-03-27")[0] is PAYLOAD[8]
+    assert index.best_match("Arsenal", "Chelsea", "2024-03-20") == (None, 0.0)
+
+
+def test_index_ignores_bets_without_team_names(index):
+    assert index.best_match("", "Chelsea", "2024-03-16") == (None, 0.0)
+
+
+def _typo(rng: random.Random, name: str) -> str:
+    """Drop, swap or double one character (sometimes none)."""
+    if len(name) < 4 or rng.random() < 0.3:
+        return name
+    i = rng.randrange(1, len(name) - 1)
+    return rng.choice([
+        name[:i] + name[i + 1:],
+        name[:i] + name[i + 1] + name[i] + name[i + 2:],
+        name[:i] + name[i] + name[i:],
+    ])
+
+
+def test_index_agrees_with_a_full_scan_on_perturbed_bets(index):
+    rng = random.Random(34)
+    days = ["2024-03-14", "2024-03-15", "2024-03-16", "2024-03-17", "2024-03-18T00:00:00Z", ""]
+    for _ in range(500):
+        match = rng.choice(PAYLOAD)
+        home, away = _typo(rng, match["home_team"]), _typo(rng, match["away_team"])
+        if rng.random() < 0.2:
+            home, away = away, home
+        event_date = rng.choice(days)
+        assert index.best_match(home, away, event_date) == _scan(PAYLOAD, home, away, event_date), (
+            home, away, event_date,
+        )
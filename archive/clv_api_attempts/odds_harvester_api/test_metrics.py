@@ -0,0 +1,41 @@
+"""Tests for the Prometheus text metrics.
+
+Run with: python -m pytest -q test_metrics.py
+"""
+
+import threading
+
+from metrics import FAST_BUCKETS, Counter, Histogram
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_seconds", "Test latency", ("operation",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, "read")
+    lines = histogram.render()
+    assert 'test_seconds_bucket{operation="read",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{operation="read",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{operation="read"} 3' in lines
+
+
+def test_render_while_threads_add_label_sets():
+    counter = Counter("test_total", "Test counter", ("operation",))
+    histogram = Histogram("test_db_seconds", "Test latency", ("operation",), buckets=FAST_BUCKETS)
+
+    def record(worker: int):
+        for i in range(2000):
+            counter.inc(f"op-{worker}-{i}")
+            histogram.observe(0.001, f"op-{worker}-{i}")
+
+    threads = [threading.Thread(target=record, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        counter.render()
+        histogram.render()
+    for thread in threads:
+        thread.join()
+
+    # No increment was lost, and every label set was counted once by both
+    assert sum(counter._values.values()) == len(counter._values) == 8000
+    assert sum(series[2] for series in histogram._series.values()) == 8000
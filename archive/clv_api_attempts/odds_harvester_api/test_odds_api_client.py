@@ -0,0 +1,201 @@
+"""Tests for The Odds API client's quota policy and response cache.
+
+Run with: python -m pytest -q test_odds_api_client.py
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from database import Database
+from odds_api_client import OddsApiClient, QuotaDeferred, TokenBucket, seconds_until_quota_reset
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "clv_cache.db"))
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def client(db):
+    return OddsApiClient(db, "test-key", reserve=50, burst=10, defer_seconds=30)
+
+
+def _admit(client: OddsApiClient, cost: int, priority: str = "low"):
+    asyncio.run(client._admit(cost, priority))
+
+
+# === Quota reset ===
+
+
+@pytest.mark.parametrize(
+    "now, seconds",
+    [
+        (datetime(2024, 12, 31, 23, 0, tzinfo=timezone.utc), 3600),  # Rolls over the year
+        (datetime(2024, 2, 29, 0, 0, tzinfo=timezone.utc), 86400),
+        (datetime(2024, 6, 1, 0, 0, tzinfo=timezone.utc), 30 * 86400),
+        (datetime(2024, 6, 30, 23, 59, 59, 500000, tzinfo=timezone.utc), 1.0),  # Floored
+    ],
+)
+def test_quota_resets_at_the_start_of_next_month(now, seconds):
+    assert seconds_until_quota_reset(now) == seconds
+
+
+# === Token bucket ===
+
+
+def test_bucket_takes_until_empty_then_reports_the_wait():
+    bucket = TokenBucket(rate=0.5, capacity=3)
+    assert all(bucket.try_take() for _ in range(3))
+    assert not bucket.try_take()
+    assert bucket.wait_time(1) == pytest.approx(2.0, abs=0.01)
+
+
+def test_bucket_with_no_refill_never_frees_up():
+    bucket = TokenBucket(rate=1.0, capacity=1)
+    bucket.force_take(3)
+    bucket.set_rate(0)
+    assert bucket.tokens == pytest.approx(-2, abs=0.01)
+    assert bucket.wait_time(1) == float("inf")
+
+
+# === Admission ===
+
+
+def test_budget_rate_spreads_spendable_quota_over_the_month(client):
+    assert client._budget_rate() == 1.0  # Unknown quota
+    client.remaining = 50 + 3600
+    assert client._budget_rate() == pytest.approx(3600 / seconds_until_quota_reset(), rel=0.01)
+    client.remaining = 10
+    assert client._budget_rate() == 0.0
+
+
+def test_exhausted_quota_refuses_every_priority(client):
+    client.remaining = 2
+    for priority in ("low", "high"):
+        with pytest.raises(QuotaDeferred, match="quota exhausted"):
+            _admit(client, 3, priority)
+    assert client.refused == 2
+
+
+def test_only_high_priority_requests_may_use_the_reserve(client):
+    client.remaining = 60
+    with pytest.raises(QuotaDeferred, match="keeping 50"):
+        _admit(client, 20)
+    _admit(client, 20, "high")
+    assert client.bucket.tokens == pytest.approx(-10, abs=0.1)  # Taken even past the burst
+
+
+def test_short_rate_wait_is_deferred(client):
+    client.remaining = 1000
+    client.bucket = TokenBucket(rate=100.0, capacity=1)
+    client.bucket.tokens = 0
+    _admit(client, 1)
+    assert (client.deferred, client.refused) == (1, 0)
+
+
+def test_long_rate_wait_is_refused(client):
+    client.remaining = 1000
+    client.bucket = TokenBucket(rate=0.01, capacity=1)
+    client.bucket.tokens = 0
+    with pytest.raises(QuotaDeferred, match="rate budget exhausted"):
+        _admit(client, 1)
+    assert client.deferred == 0
+
+
+# === Quota ledger ===
+
+
+def _response(**headers) -> SimpleNamespace:
+    return SimpleNamespace(headers=headers)
+
+
+def test_quota_headers_update_the_limiter_and_persist(db, client):
+    client._record_quota(_response(**{"x-requests-remaining": "450", "x-requests-used": "50"}))
+    assert (client.remaining, client.used) == (450, 50)
+    assert client.bucket.rate == pytest.approx(400 / seconds_until_quota_reset(), rel=0.01)
+
+    restarted = OddsApiClient(db, "test-key")
+    assert (restarted.remaining, restarted.used) == (450, 50)
+
+
+def test_ledger_from_an_earlier_month_is_ignored(db, client):
+    client._record_quota(_response(**{"x-requests-remaining": "7", "x-requests-used": "493"}))
+    db.set_metadata(OddsApiClient.LEDGER_KEYS["period"], "1999-01")
+    assert OddsApiClient(db, "test-key").remaining is None
+
+
+def test_responses_without_quota_headers_change_nothing(client):
+    client._record_quota(_response())
+    client._record_quota(_response(**{"x-requests-remaining": "lots"}))
+    assert client.remaining is None
+
+
+# === Response cache ===
+
+
+class FakeHttp:
+    """Records /odds requests and answers with one event per requested bookmaker."""
+
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.requested: list[str] = []
+
+    async def get(self, url, params):
+        self.requested.append(params["bookmakers"])
+        await asyncio.sleep(self.delay)
+        books = params["bookmakers"].split(",")
+        return SimpleNamespace(
+            status_code=200, http_version="HTTP/1.1", headers={"x-requests-last": str(len(books))},
+            raise_for_status=lambda: None,
+            json=lambda: [{"bookmakers": [{"key": book} for book in books]}],
+        )
+
+
+@pytest.fixture
+def http(client):
+    fake = FakeHttp(delay=0.01)
+    client._get_client = lambda: fake
+    return fake
+
+
+def _books(events: list[dict]) -> set:
+    return {book["key"] for book in events[0]["bookmakers"]}
+
+
+def _get_odds(client: OddsApiClient, bookmakers: str):
+    return client.get_odds("soccer_epl", None, "h2h", bookmakers=bookmakers)
+
+
+def test_groups_wanting_different_bookmakers_share_one_cache_entry(client, http):
+    async def main():
+        first = await _get_odds(client, "betfair,pinnacle")
+        second = await _get_odds(client, "pinnacle,williamhill")  # Lacks williamhill: top-up
+        third = await _get_odds(client, "betfair,williamhill")  # Covered by the union
+        return first, second, third
+
+    first, second, third = asyncio.run(main())
+    assert http.requested == ["betfair,pinnacle", "betfair,pinnacle,williamhill"]
+    assert _books(first) == {"betfair", "pinnacle"}
+    assert _books(second) == _books(third) == {"betfair", "pinnacle", "williamhill"}
+    assert list(client._responses) == [("soccer_epl", "h2h")]
+    assert (client.cache_misses, client.cache_hits) == (2, 1)
+
+
+def test_concurrent_group_tops_up_the_fetch_it_joined(client, http):
+    async def main():
+        return await asyncio.gather(
+            _get_odds(client, "pinnacle"),
+            _get_odds(client, "pinnacle"),  # Joins the first fetch
+            _get_odds(client, "williamhill"),  # Joins it too, then needs williamhill
+        )
+
+    first, joined, topped_up = asyncio.run(main())
+    assert http.requested == ["pinnacle", "pinnacle,williamhill"]
+    assert _books(first) == _books(joined) == {"pinnacle"}
+    assert _books(topped_up) == {"pinnacle", "williamhill"}
+    assert client.quota_saved == 1  # Only the plain join saved a request
@@ -0,0 +1,154 @@
+"""Tests for kickoff-anchored prefetch scheduling.
+
+Run with: python -m pytest -q test_prefetch.py
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+import server
+from database import Database
+
+WINDOW = ("football", "england-premier-league", "2024-03-16")
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "clv_cache.db"))
+    yield database
+    database.close()
+
+
+def _window(db: Database) -> dict:
+    (window,) = db.get_prefetch_schedule()
+    return window
+
+
+def _bet(bet_id: str, event_date: str, home: str = "Arsenal", away: str = "Chelsea") -> dict:
+    return {
+        "bet_id": bet_id, "sport": "football", "tournament": "Premier League",
+        "home_team": home, "away_team": away, "event_date": event_date,
+    }
+
+
+# === Kickoff times ===
+
+
+@pytest.mark.parametrize(
+    "event_date, kickoff",
+    [
+        ("2024-03-16T15:00:00Z", datetime(2024, 3, 16, 15, tzinfo=timezone.utc)),
+        ("2024-03-16T15:00:00", datetime(2024, 3, 16, 15, tzinfo=timezone.utc)),  # Naive is UTC
+        ("2024-03-16T16:00:00+01:00", datetime(2024, 3, 16, 15, tzinfo=timezone.utc)),
+        ("2024-03-16", datetime(2024, 3, 17, tzinfo=timezone.utc)),  # Unknown time: end of day
+    ],
+)
+def test_kickoff_timestamp(event_date, kickoff):
+    assert server.kickoff_timestamp(event_date) == kickoff.timestamp()
+
+
+def test_registered_bets_share_one_window_due_after_the_last_kickoff(db):
+    processor = server.JobProcessor(db)
+    windows = processor.register_upcoming([
+        _bet("b1", "2024-03-16T12:30:00Z"),
+        _bet("b2", "2024-03-16T17:30:00Z", "Liverpool", "Everton"),
+        _bet("b3", "2024-03-17T14:00:00Z"),
+    ])
+
+    assert [(w["eventDate"], w["bets"]) for w in windows] == [("2024-03-16", 2), ("2024-03-17", 1)]
+    last_kickoff = server.kickoff_timestamp("2024-03-16T17:30:00Z")
+    due = db.get_prefetch_schedule()[0]
+    assert due["due_at"] == last_kickoff + server.PREFETCH_DELAY_MINUTES * 60
+    assert processor._prefetch_wakeup.is_set()
+
+
+# === Schedule ===
+
+
+def test_later_kickoff_pushes_the_window_back_and_reopens_it(db):
+    db.schedule_prefetch(*WINDOW, due_at=1000.0, registrations=2)
+    db.schedule_prefetch(*WINDOW, due_at=500.0, registrations=1)  # Earlier: due time kept
+    window = _window(db)
+    assert (window["due_at"], window["registrations"]) == (1000.0, 3)
+
+    (claimed,) = db.claim_due_prefetches(now=1000.0, limit=5)
+    db.finish_prefetch(claimed["id"], "completed", matches=10)
+    db.schedule_prefetch(*WINDOW, due_at=2000.0, registrations=1)
+    window = _window(db)
+    assert (window["status"], window["due_at"], window["attempts"]) == ("pending", 2000.0, 0)
+
+
+def test_only_due_pending_windows_are_claimed_in_due_order(db):
+    db.schedule_prefetch("football", "spain-laliga", "2024-03-16", due_at=300.0, registrations=1)
+    db.schedule_prefetch(*WINDOW, due_at=100.0, registrations=1)
+    db.schedule_prefetch("football", "italy-serie-a", "2024-03-16", due_at=900.0, registrations=1)
+
+    claimed = db.claim_due_prefetches(now=500.0, limit=5)
+    assert [window["league"] for window in claimed] == ["england-premier-league", "spain-laliga"]
+    assert db.claim_due_prefetches(now=500.0, limit=5) == []
+    assert db.get_next_prefetch_due() == 900.0
+
+
+def test_claim_respects_the_limit(db):
+    for league in ("a", "b", "c"):
+        db.schedule_prefetch("football", league, "2024-03-16", due_at=100.0, registrations=1)
+    assert len(db.claim_due_prefetches(now=100.0, limit=2)) == 2
+    assert len(db.get_prefetch_schedule(status="pending")) == 1
+
+
+def test_window_reopened_while_running_stays_pending(db):
+    db.schedule_prefetch(*WINDOW, due_at=100.0, registrations=1)
+    (claimed,) = db.claim_due_prefetches(now=100.0, limit=1)
+    db.schedule_prefetch(*WINDOW, due_at=800.0, registrations=1)
+
+    assert not db.finish_prefetch(claimed["id"], "completed", matches=10)
+    window = _window(db)
+    assert (window["status"], window["due_at"], window["matches"]) == ("pending", 800.0, None)
+
+
+def test_running_windows_are_reset_after_a_restart(db):
+    db.schedule_prefetch(*WINDOW, due_at=100.0, registrations=1)
+    db.claim_due_prefetches(now=100.0, limit=1)
+    assert db.reset_running_prefetches() == 1
+    assert _window(db)["status"] == "pending"
+
+
+# === Running windows ===
+
+
+def _run_due_prefetch(db: Database, scraped) -> dict:
+    """Claim the due window and run its prefetch, scraping `scraped`."""
+    processor = server.JobProcessor(db)
+
+    async def scrape_and_cache(sport, league, event_date, markets=None, bookmakers=None, refresh=False):
+        assert refresh  # Prefetches always refetch the window
+        return scraped
+
+    processor._scrape_and_cache = scrape_and_cache
+    (entry,) = db.claim_due_prefetches(now=time.time(), limit=1)
+    asyncio.run(processor._run_prefetch(entry))
+    return _window(db)
+
+
+def test_prefetch_with_matches_completes(db):
+    db.schedule_prefetch(*WINDOW, due_at=100.0, registrations=1)
+    window = _run_due_prefetch(db, {"matches": [{}, {}]})
+    assert (window["status"], window["matches"], window["attempts"]) == ("completed", 2, 1)
+
+
+def test_empty_prefetch_is_retried_then_failed(db, monkeypatch):
+    monkeypatch.setattr(server, "PREFETCH_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(server, "PREFETCH_RETRY_MINUTES", 0)
+    db.schedule_prefetch(*WINDOW, due_at=100.0, registrations=1)
+
+    window = _run_due_prefetch(db, {"matches": []})
+    assert (window["status"], window["attempts"], window["last_error"]) == (
+        "pending", 1, "no matches scraped",
+    )
+    assert window["due_at"] > 100.0  # Moved to the retry time
+
+    window = _run_due_prefetch(db, None)
+    assert (window["status"], window["attempts"]) == ("failed", 2)
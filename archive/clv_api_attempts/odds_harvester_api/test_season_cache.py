@@ -0,0 +1,105 @@
+"""Tests for the season scrape cache indexed by match date.
+
+Run with: python -m pytest -q test_season_cache.py
+"""
+
+import pytest
+
+from database import Database, season_for_date
+
+SEASON = ("football", "england-premier-league", "2023-2024")
+
+
+def _match(home: str, away: str, day: str) -> dict:
+    return {"home_team": home, "away_team": away, "start_date": f"{day} 15:00:00", "odds": {}}
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "clv_cache.db"))
+    database.store_season_matches(
+        *SEASON,
+        {
+            "2024-01-13": [_match("Arsenal", "Chelsea", "2024-01-13"), _match("Spurs", "Wolves", "2024-01-13")],
+            "2024-01-14": [],  # Scraped, no matches that day
+            "2024-01-20": [_match("Everton", "Fulham", "2024-01-20")],
+        },
+        markets=["1X2"],
+    )
+    yield database
+    database.close()
+
+
+@pytest.mark.parametrize(
+    "event_date, season",
+    [
+        ("2024-08-01", "2024-2025"),
+        ("2024-07-31", "2023-2024"),
+        ("2025-01-15T20:00:00", "2024-2025"),
+        ("2023-12-31", "2023-2024"),
+    ],
+)
+def test_season_for_date_starts_seasons_in_august(event_date, season):
+    assert season_for_date(event_date) == season
+
+
+def test_day_lookup_returns_only_that_days_matches(db):
+    day = db.get_season_day(*SEASON, "2024-01-13")
+    assert [match["home_team"] for match in day["matches"]] == ["Arsenal", "Spurs"]
+    assert day["markets"] == ["1X2"]
+
+
+def test_day_without_matches_differs_from_an_uncached_day(db):
+    assert db.get_season_day(*SEASON, "2024-01-14") == {"matches": [], "markets": ["1X2"]}
+    assert db.get_season_day(*SEASON, "2024-01-15") is None
+
+
+def test_days_lookup_returns_cached_days_only(db):
+    days = db.get_season_days(*SEASON, ["2024-01-13", "2024-01-15", "2024-01-20"])
+    assert sorted(days) == ["2024-01-13", "2024-01-20"]
+    assert db.get_season_days(*SEASON, []) == {}
+
+
+def test_days_are_scoped_to_their_league_and_season(db):
+    assert db.get_season_day("football", "spain-laliga", "2023-2024", "2024-01-13") is None
+    assert db.get_season_day("football", "england-premier-league", "2024-2025", "2024-01-13") is None
+
+
+def test_rescrape_rewrites_only_changed_days(db):
+    changed = db.store_season_matches(
+        *SEASON,
+        {
+            "2024-01-13": [_match("Arsenal", "Chelsea", "2024-01-13"), _match("Spurs", "Wolves", "2024-01-13")],
+            "2024-01-14": [],
+            "2024-01-20": [_match("Everton", "Fulham", "2024-01-20"), _match("Leeds", "Burnley", "2024-01-20")],
+        },
+        markets=["1X2"],
+    )
+    assert changed == 1
+    assert len(db.get_season_day(*SEASON, "2024-01-20")["matches"]) == 2
+
+
+def test_new_markets_count_as_a_change(db):
+    changed = db.store_season_matches(
+        *SEASON, {"2024-01-14": []}, markets=["1X2", "Over/Under"],
+    )
+    assert changed == 1
+    assert db.get_season_day(*SEASON, "2024-01-14")["markets"] == ["1X2", "Over/Under"]
+
+
+def test_day_markets_override_the_season_markets(db):
+    db.store_season_matches(
+        *SEASON,
+        {"2024-01-27": []},
+        markets=["1X2"],
+        day_markets={"2024-01-27": ["1X2", "Both Teams to Score"]},
+    )
+    assert db.get_season_day(*SEASON, "2024-01-27")["markets"] == ["1X2", "Both Teams to Score"]
+
+
+def test_covered_span_widens_across_merges(db):
+    db.store_season_matches(*SEASON, {"2023-08-12": []}, markets=["1X2"])
+    info = db.get_season_cache_info(*SEASON)
+    assert (info["covered_from"], info["covered_to"], info["day_count"]) == ("2023-08-12", "2024-01-20", 4)
+    assert info["markets"] == ["1X2"]
+    assert db.get_season_cache_info("football", "spain-laliga", "2023-2024") is None
@@ -0,0 +1,160 @@
+"""Tests for date-seeking over historic results pages.
+
+Run with: python -m pytest -q test_season_pages.py
+"""
+
+import asyncio
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from season_pages import complete_dates, dates_between, locate_pages, parse_page_dates
+
+# Pages run newest to oldest: (oldest, newest) match date per page.
+# 2024-01-10 spans pages 1-3; 2024-01-02..09 and 2023-12-26..30 hold no matches.
+RANGES = {
+    1: ("2024-01-10", "2024-01-20"),
+    2: ("2024-01-10", "2024-01-10"),
+    3: ("2024-01-01", "2024-01-10"),
+    4: ("2023-12-20", "2024-01-01"),
+    5: ("2023-12-01", "2023-12-20"),
+}
+
+
+def _locate(target: str, ranges: dict = RANGES) -> tuple[list[int], list[int]]:
+    """Located pages and the pages probed to find them."""
+    probed = []
+
+    async def probe(page: int):
+        probed.append(page)
+        return ranges[page]
+
+    return asyncio.run(locate_pages(target, len(ranges), probe)), probed
+
+
+# === parse_page_dates ===
+
+
+def test_parse_page_dates_reads_date_headers():
+    text = "Premier League 2023/2024\n20 May 2024 1X2 B's\nArsenal - Everton\n04 Dec 2023 - Round 14\n"
+    assert parse_page_dates(text) == ("2023-12-04", "2024-05-20")
+
+
+def test_parse_page_dates_resolves_today_and_yesterday():
+    text = "Today, 19 Oct\nYesterday, 18 Oct\n12 Oct 2026 - Round 8"
+    assert parse_page_dates(text, today=date(2026, 10, 19)) == ("2026-10-12", "2026-10-19")
+
+
+def test_parse_page_dates_skips_invalid_dates_and_pages_without_headers():
+    assert parse_page_dates("30 Feb 2024\n01 Mar 2024") == ("2024-03-01", "2024-03-01")
+    assert parse_page_dates("No results") is None
+
+
+# === locate_pages ===
+
+
+@pytest.mark.parametrize(
+    "target, pages",
+    [
+        ("2024-01-15", [1]),  # Inside one page
+        ("2024-01-20", [1]),  # Newest day of page 1 (no newer page)
+        ("2024-01-10", [1, 2, 3]),  # Spans three pages
+        ("2024-01-01", [3, 4]),  # Spans a page boundary
+        ("2023-12-20", [4, 5]),
+        ("2023-12-05", [5]),
+    ],
+)
+def test_locate_pages_finds_every_page_holding_the_date(target, pages):
+    assert _locate(target)[0] == pages
+
+
+@pytest.mark.parametrize("target, pages", [("2024-01-05", [3]), ("2023-12-28", [4])])
+def test_locate_pages_returns_the_page_spanning_an_empty_day(target, pages):
+    # Scraping that page shows the day has no matches (see complete_dates)
+    assert _locate(target)[0] == pages
+
+
+@pytest.mark.parametrize("target", ["2023-11-30", "2024-02-01"])
+def test_locate_pages_returns_nothing_outside_the_season(target):
+    assert _locate(target)[0] == []
+
+
+def test_locate_pages_returns_nothing_for_a_gap_between_pages():
+    ranges = {1: ("2024-01-10", "2024-01-20"), 2: ("2024-01-01", "2024-01-05")}
+    assert _locate("2024-01-07", ranges)[0] == []
+
+
+def test_locate_pages_probes_logarithmically():
+    # 256 pages of four days each, newest first
+    start = date(2020, 1, 1)
+    ranges = {}
+    for page in range(1, 257):
+        newest = start + timedelta(days=4 * (256 - page) + 3)
+        ranges[page] = ((newest - timedelta(days=3)).isoformat(), newest.isoformat())
+    for page in (1, 77, 128, 256):
+        pages, probed = _locate(ranges[page][0], ranges)
+        assert pages == [page]
+        assert len(set(probed)) <= 8 + 2  # log2(256) plus the neighbours of a boundary day
+
+
+def test_locate_pages_matches_a_linear_scan_on_random_seasons():
+    rng = random.Random(50)
+    for _ in range(200):
+        # Matches on random days, 1-6 per day, split into pages of `size`
+        days = sorted(
+            {date(2023, 8, 1) + timedelta(days=rng.randrange(300)) for _ in range(rng.randint(1, 60))},
+            reverse=True,
+        )
+        matches = [day.isoformat() for day in days for _ in range(rng.randint(1, 6))]
+        size = rng.randint(1, 12)
+        chunks = [matches[i:i + size] for i in range(0, len(matches), size)]
+        ranges = {page: (min(chunk), max(chunk)) for page, chunk in enumerate(chunks, 1)}
+
+        for offset in range(-3, 304, 7):
+            target = (date(2023, 8, 1) + timedelta(days=offset)).isoformat()
+            expected = [page for page, chunk in enumerate(chunks, 1) if target in chunk]
+            pages, _ = _locate(target, ranges)
+            if expected:
+                assert pages == expected
+            else:
+                # No matches that day: at most the page whose span contains it
+                assert all(target not in chunks[page - 1] for page in pages)
+
+
+# === complete_dates ===
+
+
+def test_complete_dates_keeps_edges_without_neighbours():
+    assert complete_dates([1, 2, 3, 4, 5], 5, RANGES) == ("2023-12-01", "2024-01-20")
+
+
+def test_complete_dates_trims_days_continuing_on_unscraped_pages():
+    # 2024-01-01 continues on page 4 and 2024-01-10 on page 2
+    assert complete_dates([3], 5, RANGES) == ("2024-01-02", "2024-01-09")
+
+
+def test_complete_dates_keeps_edges_known_to_end_on_the_page():
+    ranges = {1: ("2024-01-10", "2024-01-20"), 2: ("2024-01-01", "2024-01-05"), 3: ("2023-12-01", "2023-12-31")}
+    assert complete_dates([2], 3, ranges) == ("2024-01-01", "2024-01-05")
+
+
+def test_complete_dates_trims_edges_next_to_unprobed_pages():
+    ranges = {2: ("2024-01-01", "2024-01-05")}
+    assert complete_dates([2], 3, ranges) == ("2024-01-02", "2024-01-04")
+
+
+def test_complete_dates_returns_none_when_no_full_day_is_covered():
+    assert complete_dates([2], 5, RANGES) is None
+
+
+def test_located_pages_always_cover_the_target_completely():
+    for target in ("2024-01-10", "2024-01-01", "2023-12-20", "2024-01-15"):
+        pages, _ = _locate(target)
+        oldest, newest = complete_dates(pages, len(RANGES), RANGES)
+        assert oldest <= target <= newest
+
+
+def test_dates_between_is_inclusive():
+    assert dates_between("2024-02-28", "2024-03-01") == ["2024-02-28", "2024-02-29", "2024-03-01"]
+    assert dates_between("2024-01-01", "2024-01-01") == ["2024-01-01"]
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Startup-time benchmark: guards against slow imports or blocking work in lifespan.
+
+Each run starts a fresh interpreter, imports server.py and runs the lifespan
+startup against throwaway databases, timing both phases. Exits non-zero if
+the median exceeds the budget, so it can gate a release.
+
+Usage:
+    python test_startup_time.py [--runs 5] [--budget-ms 1500]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# Runs inside the child interpreter; prints one JSON line of timings
+CHILD = r"""
+import asyncio, json, time
+t0 = time.perf_counter()
+import server
+t1 = time.perf_counter()
+
+async def main():
+    async with server.lifespan(server.app):
+        t2 = time.perf_counter()
+    return t2
+
+t2 = asyncio.run(main())
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "lifespan_ms": (t2 - t1) * 1000}))
+"""
+
+
+def run_once(workdir: Path, index: int) -> dict:
+    env = dict(os.environ)
+    env.update(
+        CLV_DB_PATH=str(workdir / f"startup_{index}.db"),
+        CLV_ARCHIVE_DB_PATH=str(workdir / f"startup_{index}_archive.db"),
+        # Keep the probe and update check from touching a real checkout
+        ODDS_HARVESTER_PATH=str(workdir / "OddsHarvester"),
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        cwd=Path(__file__).parent,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        raise SystemExit(f"❌ Startup run {index} failed")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", "1500")),
+        help="Maximum median import + lifespan time",
+    )
+    args = parser.parse_args()
+
+    print(f"\n{'='*80}")
+    print(f"Startup benchmark ({args.runs} runs, budget {args.budget_ms:.0f} ms)")
+    print(f"{'='*80}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = []
+        for index in range(args.runs):
+            timing = run_once(Path(tmp), index)
+            runs.append(timing)
+            print(
+                f"  Run {index + 1}: import {timing['import_ms']:.0f} ms, "
+                f"lifespan {timing['lifespan_ms']:.0f} ms"
+            )
+
+    import_ms = statistics.median(r["import_ms"] for r in runs)
+    lifespan_ms = statistics.median(r["lifespan_ms"] for r in runs)
+    total_ms = statistics.median(r["import_ms"] + r["lifespan_ms"] for r in runs)
+
+    print(f"\nMedian: import {import_ms:.0f} ms | lifespan {lifespan_ms:.0f} ms | total {total_ms:.0f} ms")
+    if total_ms > args.budget_ms:
+        print(f"❌ Startup exceeds budget by {total_ms - args.budget_ms:.0f} ms")
+        sys.exit(1)
+    print("✅ Startup within budget")
+
+
+if __name__ == "__main__":
+    main()
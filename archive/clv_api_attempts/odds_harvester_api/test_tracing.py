@@ -0,0 +1,169 @@
+"""Tests for job span trees and their Chrome trace export.
+
+Run with: python -m pytest -q test_tracing.py
+"""
+
+import asyncio
+from collections import OrderedDict
+
+import pytest
+from fastapi import HTTPException, Response
+
+import server
+import tracing
+
+
+@pytest.fixture(autouse=True)
+def traces(monkeypatch):
+    """Fresh trace registry and default limits for every test."""
+    monkeypatch.setattr(tracing, "_traces", OrderedDict())
+    monkeypatch.setattr(tracing, "MAX_TRACES", tracing.MAX_TRACES)
+    monkeypatch.setattr(tracing, "MAX_SPANS_PER_TRACE", tracing.MAX_SPANS_PER_TRACE)
+
+
+async def _group(name: str, delay: float):
+    with tracing.span("group", group=name):
+        with tracing.span("scrape"):
+            await asyncio.sleep(delay)
+        with tracing.span("match_bets", bets=2):
+            pass
+
+
+async def _job(job_id: str = "job-1", groups: int = 2):
+    """A job whose groups run concurrently, as _process_job runs them."""
+    token = tracing.start_job(job_id, priority="routine")
+    try:
+        with tracing.span("db.load_bets"):
+            pass
+        await asyncio.gather(*(_group(f"g{i}", 0.02) for i in range(groups)))
+    finally:
+        tracing.finish_job(token)
+
+
+def _names(node: dict) -> list:
+    return [node["name"], [_names(child) for child in node["children"]]]
+
+
+# === Span trees ===
+
+
+def test_spans_nest_under_the_job_across_gathered_tasks():
+    asyncio.run(_job())
+    trace = tracing.get_trace("job-1")
+
+    assert trace["complete"] and trace["spans"] == 8 and trace["dropped_spans"] == 0
+    group = ["group", [["scrape", []], ["match_bets", []]]]
+    assert _names(trace["root"]) == ["job", [["db.load_bets", []], group, group]]
+    assert trace["root"]["attrs"] == {"priority": "routine"}
+    scrape = trace["root"]["children"][1]["children"][0]
+    assert scrape["duration_ms"] >= 15 and scrape["start_ms"] >= 0
+
+
+def test_span_outside_a_job_records_nothing():
+    with tracing.span("scrape") as span:
+        span.set(matches=3)
+        tracing.annotate(outcome="success")
+    assert tracing.list_traces() == []
+
+
+def test_failed_span_records_the_error_type():
+    async def main():
+        token = tracing.start_job("job-1")
+        try:
+            with tracing.span("scrape"):
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        finally:
+            tracing.finish_job(token)
+
+    asyncio.run(main())
+    (scrape,) = tracing.get_trace("job-1")["root"]["children"]
+    assert scrape["attrs"] == {"error": "RuntimeError"}
+
+
+def test_spans_beyond_the_cap_are_counted_as_dropped():
+    tracing.configure(max_spans=3)
+    asyncio.run(_job())
+    trace = tracing.get_trace("job-1")
+    assert (trace["spans"], trace["dropped_spans"]) == (3, 5)
+
+
+def test_running_job_is_reported_as_incomplete():
+    async def main():
+        token = tracing.start_job("job-1")
+        with tracing.span("scrape"):
+            trace = tracing.get_trace("job-1")
+        tracing.finish_job(token)
+        return trace
+
+    trace = asyncio.run(main())
+    assert not trace["complete"]
+    assert trace["root"]["running"] and trace["root"]["children"][0]["running"]
+
+
+def test_only_the_newest_traces_are_retained():
+    tracing.configure(max_traces=2)
+    for job_id in ("job-1", "job-2", "job-3"):
+        asyncio.run(_job(job_id, groups=1))
+    assert [trace["job_id"] for trace in tracing.list_traces()] == ["job-3", "job-2"]
+    assert tracing.get_trace("job-1") is None
+
+
+# === Chrome export ===
+
+
+def test_chrome_export_puts_concurrent_groups_on_separate_lanes():
+    asyncio.run(_job(groups=3))
+    chrome = tracing.to_chrome("job-1")
+
+    events = [event for event in chrome["traceEvents"] if event["ph"] == "X"]
+    groups = [event for event in events if event["name"] == "group"]
+    # They overlap in time; the first fits on the job's lane after db.load_bets
+    assert sorted(event["tid"] for event in groups) == [0, 1, 2]
+    job = next(event for event in events if event["name"] == "job")
+    assert (job["tid"], job["ts"], job["args"]) == (0, 0, {"job_id": "job-1", "priority": "routine"})
+
+    # Every lane holds properly nested complete events
+    for lane in {event["tid"] for event in events}:
+        stack = []
+        for event in sorted((e for e in events if e["tid"] == lane), key=lambda e: (e["ts"], -e["dur"])):
+            while stack and stack[-1] <= event["ts"]:
+                stack.pop()
+            assert not stack or event["ts"] + event["dur"] <= stack[-1] + 0.2
+            stack.append(event["ts"] + event["dur"])
+
+    lanes = [event for event in chrome["traceEvents"] if event["name"] == "thread_name"]
+    assert [lane["args"]["name"] for lane in lanes] == ["job", "lane 1", "lane 2"]
+
+
+def test_chrome_export_stringifies_attribute_values():
+    async def main():
+        token = tracing.start_job("job-1")
+        with tracing.span("scrape", markets=frozenset({"1X2"}), matches=3, joined=None):
+            pass
+        tracing.finish_job(token)
+
+    asyncio.run(main())
+    scrape = next(e for e in tracing.to_chrome("job-1")["traceEvents"] if e["name"] == "scrape")
+    assert scrape["args"] == {"markets": "frozenset({'1X2'})", "matches": 3, "joined": None}
+    assert scrape["cat"] == "scrape"
+
+
+# === Endpoints ===
+
+
+def test_trace_endpoints():
+    asyncio.run(_job())
+    listed = asyncio.run(server.list_job_traces())
+    assert [trace["job_id"] for trace in listed["traces"]] == ["job-1"]
+
+    response = Response()
+    chrome = asyncio.run(server.get_job_trace("job-1", response, format="chrome"))
+    assert "traceEvents" in chrome
+    assert response.headers["Content-Disposition"] == 'attachment; filename="trace-job-1.json"'
+
+    for job_id, trace_format, status in (("job-1", "svg", 422), ("unknown", "tree", 404)):
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(server.get_job_trace(job_id, Response(), format=trace_format))
+        assert error.value.status_code == status
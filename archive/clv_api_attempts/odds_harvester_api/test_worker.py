@@ -0,0 +1,150 @@
+"""Tests for group task leases and the queue-mode worker.
+
+Run with: python -m pytest -q test_worker.py
+"""
+
+import asyncio
+
+import pytest
+
+import server
+from database import Database
+from worker import TaskWorker
+
+PRIORITIES = list(server.PRIORITY_WEIGHTS)
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "clv_cache.db"))
+    yield database
+    database.close()
+
+
+def _queue_group(db: Database, job_id: str = "job-1", event_date: str = "2024-03-16"):
+    """A processing job with one bet in one queued group task."""
+    db.create_job(job_id, 1)
+    db.create_bet_request(
+        job_id, f"{job_id}-b0", "football", "Premier League",
+        "Arsenal", "Chelsea", "1X2", event_date, "Pinnacle",
+    )
+    assert db.claim_job(job_id)
+    bet = db.get_bet_requests(job_id)[0]
+    db.create_job_groups(
+        job_id, [("football", "england-premier-league", event_date, [bet["id"]])], status="queued"
+    )
+
+
+def _lease(db: Database, owner: str, lease_seconds: float = 30):
+    return db.lease_group_task(owner, lease_seconds, PRIORITIES)
+
+
+def _group(db: Database, job_id: str = "job-1") -> dict:
+    return db.get_job_groups(job_id)[0]
+
+
+def _worker(db: Database, worker_id: str, scrape, max_attempts: int = 3) -> TaskWorker:
+    """A worker wired to db whose processor scrapes with `scrape` (no run loop)."""
+    worker = TaskWorker(db.db_path, worker_id, max_attempts=max_attempts)
+    worker.db = db
+    worker.processor = server.JobProcessor(db)
+    worker.processor._scrape_and_cache = scrape
+    worker.processor.running = True
+    return worker
+
+
+# === Leases ===
+
+
+def test_a_task_is_leased_by_one_worker_at_a_time(db):
+    _queue_group(db)
+    task = _lease(db, "w1")
+    assert (task["lease_owner"], task["attempts"], task["priority"]) == ("w1", 1, "routine")
+    assert _lease(db, "w2") is None
+    assert db.renew_group_lease(task["id"], "w1", 30)
+    assert not db.renew_group_lease(task["id"], "w2", 30)
+
+
+def test_an_expired_lease_is_taken_over(db):
+    _queue_group(db)
+    first = _lease(db, "w1", lease_seconds=-1)  # Already expired: w1 stopped heartbeating
+    second = _lease(db, "w2")
+    assert second["id"] == first["id"]
+    assert (second["lease_owner"], second["attempts"]) == ("w2", 2)
+    assert not db.renew_group_lease(first["id"], "w1", 30)
+
+
+def test_group_writes_of_a_former_lease_owner_are_ignored(db):
+    _queue_group(db)
+    _lease(db, "w1", lease_seconds=-1)
+    _lease(db, "w2")
+    group = _group(db)
+    key = (group["sport"], group["league"], group["event_date"])
+
+    assert not db.update_job_group("job-1", *key, "w1", status="interrupted", elapsed_ms=5.0)
+    assert db.update_job_group("job-1", *key, "w2", status="scraping")
+    group = _group(db)
+    assert (group["status"], group["lease_owner"], group["elapsed_ms"]) == ("scraping", "w2", None)
+
+
+def test_worker_that_lost_its_lease_leaves_the_group_to_the_new_owner(db):
+    _queue_group(db)
+
+    async def main():
+        scraping = asyncio.Event()
+
+        async def scrape(sport, league, event_date, markets, bookmakers=None):
+            scraping.set()
+            await asyncio.sleep(10)
+
+        worker = _worker(db, "w1", scrape)
+        runner = asyncio.create_task(worker._run_task(_lease(db, "w1", lease_seconds=-1)))
+        await asyncio.wait_for(scraping.wait(), timeout=2)
+
+        # w2 takes the expired lease; w1's heartbeat then cancels its run
+        assert _lease(db, "w2")["lease_owner"] == "w2"
+        runner.cancel()
+        await asyncio.gather(runner, return_exceptions=True)
+
+    asyncio.run(main())
+    group = _group(db)
+    assert (group["status"], group["lease_owner"]) == ("running", "w2")
+    assert (group["completed_at"], group["elapsed_ms"]) == (None, None)
+
+
+# === Task outcomes ===
+
+
+def test_completed_task_finishes_the_job(db):
+    _queue_group(db)
+
+    async def scrape(sport, league, event_date, markets, bookmakers=None):
+        return {"matches": []}
+
+    worker = _worker(db, "w1", scrape)
+    asyncio.run(worker._run_task(_lease(db, "w1")))
+
+    group = _group(db)
+    assert (group["status"], group["lease_owner"]) == ("completed", None)
+    assert db.get_job("job-1")["status"] == "completed"
+    assert worker.completed == 1
+
+
+def test_failing_task_is_retried_then_failed(db):
+    _queue_group(db)
+
+    async def scrape(sport, league, event_date, markets, bookmakers=None):
+        raise RuntimeError("scrape blew up")
+
+    worker = _worker(db, "w1", scrape, max_attempts=2)
+    asyncio.run(worker._run_task(_lease(db, "w1")))
+    group = _group(db)
+    assert (group["status"], group["lease_owner"], group["attempts"]) == ("queued", None, 1)
+    assert db.get_job("job-1")["status"] == "processing"
+
+    asyncio.run(worker._run_task(_lease(db, "w1")))
+    group = _group(db)
+    assert (group["status"], group["lease_owner"], group["attempts"]) == ("failed", None, 2)
+    assert (worker.retried, worker.failed) == (1, 1)
+    assert db.get_job("job-1")["status"] == "failed"
+    assert [failure["error_type"] for failure in db.get_failures_for_job("job-1")] == ["worker_error"]
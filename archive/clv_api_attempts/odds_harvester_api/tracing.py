@@ -0,0 +1,274 @@
+"""
+Pipeline Tracing for the CLV API
+================================
+
+Lightweight in-process span trees, one per job:
+- start_job() opens a root span and makes it current for the job's task
+- span("name", **attrs) times a stage under the current span; tasks
+  created inside it (asyncio.gather, SingleFlight) inherit the parent
+- Trees of the most recent jobs are kept in memory for /api/jobs/{id}/trace
+  (listed by /api/traces)
+- to_chrome() exports a tree as Chrome trace events (chrome://tracing,
+  Perfetto, speedscope)
+
+Outside a traced job span() is a no-op, so instrumented code paths cost one
+context variable lookup when nothing is recording. Spans per job are capped;
+extra spans are counted as dropped instead of recorded.
+"""
+
+import functools
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from datetime import datetime
+from typing import Optional
+
+MAX_TRACES = 100
+MAX_SPANS_PER_TRACE = 5000
+
+
+class Span:
+    """One timed stage; end is None while it is still running."""
+
+    __slots__ = ("name", "start", "end", "attrs", "children", "trace")
+
+    def __init__(self, name: str, trace: "Trace", attrs: dict):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attrs = attrs
+        self.children: list["Span"] = []
+        self.trace = trace
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class _NoopSpan:
+    """Stands in for a span when nothing is being recorded."""
+
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Trace:
+    """Span tree of one job."""
+
+    __slots__ = ("job_id", "started_at", "root", "spans", "dropped")
+
+    def __init__(self, job_id: str, attrs: dict):
+        self.job_id = job_id
+        self.started_at = datetime.now().isoformat()
+        self.spans = 1
+        self.dropped = 0
+        self.root = Span("job", self, attrs)
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+_traces: "OrderedDict[str, Trace]" = OrderedDict()
+
+
+def configure(max_traces: int = MAX_TRACES, max_spans: int = MAX_SPANS_PER_TRACE):
+    """Set how many job traces are retained and how many spans each may hold."""
+    global MAX_TRACES, MAX_SPANS_PER_TRACE
+    MAX_TRACES = max(1, max_traces)
+    MAX_SPANS_PER_TRACE = max(1, max_spans)
+
+
+def start_job(job_id: str, **attrs) -> Token:
+    """Open the root span of a job trace in the current context; pass the token to finish_job."""
+    trace = Trace(job_id, attrs)
+    _traces.pop(job_id, None)  # A resumed job gets a fresh trace
+    _traces[job_id] = trace
+    while len(_traces) > MAX_TRACES:
+        _traces.popitem(last=False)
+    return _current.set(trace.root)
+
+
+def finish_job(token: Token):
+    """Close the root span opened by start_job."""
+    root = _current.get()
+    if root is not None:
+        root.end = time.perf_counter()
+    _current.reset(token)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time the enclosed block as a child of the current span."""
+    parent = _current.get()
+    if parent is None:
+        yield _NOOP
+        return
+    trace = parent.trace
+    if trace.spans >= MAX_SPANS_PER_TRACE:
+        trace.dropped += 1
+        yield _NOOP
+        return
+
+    child = Span(name, trace, attrs)
+    parent.children.append(child)
+    trace.spans += 1
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        child.end = time.perf_counter()
+        _current.reset(token)
+
+
+def traced(name: str):
+    """Decorator: run an async function inside span(name)."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def annotate(**attrs):
+    """Add attributes to the current span, if any."""
+    current = _current.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+# === Export ===
+
+
+def _span_tree(node: Span, origin: float, now: float) -> dict:
+    end = node.end if node.end is not None else now
+    tree = {
+        "name": node.name,
+        "start_ms": round((node.start - origin) * 1000, 3),
+        "duration_ms": round((end - node.start) * 1000, 3),
+        "attrs": dict(node.attrs),
+        "children": [_span_tree(child, origin, now) for child in node.children],
+    }
+    if node.end is None:
+        tree["running"] = True
+    return tree
+
+
+def get_trace(job_id: str) -> Optional[dict]:
+    """Span tree of a retained job trace, with times relative to the job start."""
+    trace = _traces.get(job_id)
+    if trace is None:
+        return None
+    now = time.perf_counter()
+    root = trace.root
+    return {
+        "job_id": job_id,
+        "started_at": trace.started_at,
+        "complete": root.end is not None,
+        "duration_ms": round(((root.end or now) - root.start) * 1000, 3),
+        "spans": trace.spans,
+        "dropped_spans": trace.dropped,
+        "root": _span_tree(root, root.start, now),
+    }
+
+
+def list_traces() -> list[dict]:
+    """Retained job traces, newest first."""
+    now = time.perf_counter()
+    return [
+        {
+            "job_id": job_id,
+            "started_at": trace.started_at,
+            "complete": trace.root.end is not None,
+            "duration_ms": round(((trace.root.end or now) - trace.root.start) * 1000, 3),
+            "spans": trace.spans,
+        }
+        for job_id, trace in reversed(_traces.items())
+    ]
+
+
+def _event_args(attrs: dict) -> dict:
+    return {
+        key: value if value is None or isinstance(value, (bool, int, float, str)) else str(value)
+        for key, value in attrs.items()
+    }
+
+
+def to_chrome(job_id: str) -> Optional[dict]:
+    """
+    Chrome trace-event JSON for a retained job trace.
+
+    Concurrent top-level spans (the job's groups) are spread over lanes
+    ("threads") so every lane holds properly nested complete events.
+    """
+    trace = _traces.get(job_id)
+    if trace is None:
+        return None
+    now = time.perf_counter()
+    root = trace.root
+    origin = root.start
+    events: list[dict] = []
+
+    def emit(node: Span, lane: int):
+        end = node.end if node.end is not None else now
+        events.append({
+            "name": node.name,
+            "cat": node.name.split(".", 1)[0],
+            "ph": "X",
+            "ts": round((node.start - origin) * 1e6, 1),
+            "dur": round((end - node.start) * 1e6, 1),
+            "pid": 1,
+            "tid": lane,
+            "args": _event_args(node.attrs),
+        })
+        for child in node.children:
+            emit(child, lane)
+
+    lane_ends = [root.start]  # Lane 0 holds the root span and the stages that fit inside it
+    lanes_of: list[tuple[Span, int]] = []
+    for child in sorted(root.children, key=lambda s: s.start):
+        end = child.end if child.end is not None else now
+        for lane, lane_end in enumerate(lane_ends):
+            if lane_end <= child.start:
+                lane_ends[lane] = end
+                break
+        else:
+            lane = len(lane_ends)
+            lane_ends.append(end)
+        lanes_of.append((child, lane))
+
+    root_end = root.end if root.end is not None else now
+    events.append({
+        "name": root.name,
+        "cat": "job",
+        "ph": "X",
+        "ts": 0,
+        "dur": round((root_end - origin) * 1e6, 1),
+        "pid": 1,
+        "tid": 0,
+        "args": {"job_id": job_id, **_event_args(root.attrs)},
+    })
+    for child, lane in lanes_of:
+        emit(child, lane)
+
+    metadata = [{"name": "process_name", "ph": "M", "pid": 1, "args": {"name": f"job {job_id}"}}]
+    for lane in range(len(lane_ends)):
+        metadata.append({
+            "name": "thread_name", "ph": "M", "pid": 1, "tid": lane,
+            "args": {"name": "job" if lane == 0 else f"lane {lane}"},
+        })
+    return {
+        "traceEvents": metadata + events,
+        "displayTimeUnit": "ms",
+        "otherData": {"job_id": job_id, "started_at": trace.started_at, "dropped_spans": trace.dropped},
+    }
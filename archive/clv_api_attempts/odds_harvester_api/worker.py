@@ -0,0 +1,261 @@
+"""
+CLV Scrape Worker
+=================
+
+Worker processes for CLV_WORKER_MODE=queue. The API server groups each
+job's bets and queues the groups as tasks in the job_groups table of the
+result store; workers:
+- Lease group tasks (lease_owner / lease_expires) in priority order
+- Heartbeat the lease while the group is scraped and matched
+- Write bet results back (exactly once per bet) and complete the job when
+  its last group finishes
+- Take over tasks of dead workers once their lease expires
+
+Scale across cores with --processes, and across hosts by pointing
+CLV_DB_PATH (or --db) of every worker at the same store; worker ids
+include the hostname so leases can be told apart.
+
+Usage:
+    python worker.py --processes 4 --concurrency 2
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from typing import Optional
+
+from database import Database
+from server import (
+    DB_PATH,
+    MAX_CONCURRENCY,
+    PRIORITY_AGING_SECONDS,
+    PRIORITY_WEIGHTS,
+    SHUTDOWN_DRAIN_SECONDS,
+    WORKER_LEASE_SECONDS,
+    WORKER_MAX_ATTEMPTS,
+    WORKER_POLL_SECONDS,
+    JobProcessor,
+)
+
+logger = logging.getLogger("worker")
+
+
+class TaskWorker:
+    """Leases group tasks from the store and processes them with a JobProcessor."""
+
+    def __init__(
+        self,
+        db_path: str,
+        worker_id: str,
+        concurrency: int = MAX_CONCURRENCY,
+        lease_seconds: float = WORKER_LEASE_SECONDS,
+        poll_seconds: float = WORKER_POLL_SECONDS,
+        max_attempts: int = WORKER_MAX_ATTEMPTS,
+    ):
+        self.db_path = db_path
+        self.worker_id = worker_id
+        self.concurrency = max(1, concurrency)
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+
+        self.db: Optional[Database] = None
+        self.processor: Optional[JobProcessor] = None
+        self._tasks: set[asyncio.Task] = set()
+        self._stopping: Optional[asyncio.Event] = None
+
+        # Metrics
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+
+    def stop(self):
+        """Stop leasing new tasks; run() drains the current ones."""
+        if self._stopping is not None:
+            self._stopping.set()
+
+    async def run(self):
+        """Lease and process tasks until stop() is called."""
+        self._stopping = asyncio.Event()
+        self.db = Database(self.db_path)
+        self.processor = JobProcessor(self.db, max_workers=self.concurrency)
+        await self.processor.start(dispatch=False)
+        logger.info(f"👷 Worker {self.worker_id} started ({self.concurrency} tasks, db {self.db_path})")
+
+        try:
+            while not self._stopping.is_set():
+                if len(self._tasks) >= self.concurrency:
+                    await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+
+                task = self.db.lease_group_task(
+                    self.worker_id,
+                    self.lease_seconds,
+                    list(PRIORITY_WEIGHTS),
+                    PRIORITY_AGING_SECONDS,
+                )
+                if task is None:
+                    try:
+                        await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_seconds)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                runner = asyncio.create_task(self._run_task(task))
+                self._tasks.add(runner)
+                runner.add_done_callback(self._tasks.discard)
+        finally:
+            await self._drain()
+            await self.processor.stop()
+            logger.info(
+                f"👷 Worker {self.worker_id} stopped "
+                f"({self.completed} completed, {self.failed} failed, {self.retried} retried)"
+            )
+
+    async def _drain(self):
+        """Give running tasks SHUTDOWN_DRAIN_SECONDS, then hand them back to the queue."""
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(set(self._tasks), timeout=SHUTDOWN_DRAIN_SECONDS)
+        for runner in pending:
+            runner.cancel()
+        if pending:
+            logger.warning(f"⏸️ Drain deadline reached, returning {len(pending)} tasks to the queue")
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _heartbeat(self, task: dict, runner: asyncio.Task):
+        """Renew the lease; cancel the task if another worker took it over."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not self.db.renew_group_lease(task["id"], self.worker_id, self.lease_seconds):
+                logger.warning(f"⚠️ Lost lease on group task {task['id']}, abandoning it")
+                runner.cancel()
+                return
+
+    async def _run_task(self, task: dict):
+        """Process one leased group and record the outcome."""
+        job_id = task["job_id"]
+        group_key = (task["sport"], task["league"], task["event_date"])
+        heartbeat = asyncio.create_task(self._heartbeat(task, asyncio.current_task()))
+        release_status = "queued"
+
+        try:
+            bets = [bet for bet in self.db.get_group_bets(task["id"]) if not bet.get("processed_at")]
+            if bets:
+                progress = {"processed": 0, "total": len(bets)}
+                await self.processor._process_group(
+                    job_id, group_key, bets, progress, task["priority"], lease_owner=self.worker_id
+                )
+            else:
+                # Every bet was checkpointed before the previous lease ended
+                self.db.update_job_group(job_id, *group_key, self.worker_id, status="completed")
+            release_status = "completed"
+            self.completed += 1
+
+        except asyncio.CancelledError:
+            # Shutdown or lost lease: the task goes back to the queue (a lost
+            # lease's group row is no longer written, see _process_group)
+            pass
+
+        except Exception as e:
+            if task["attempts"] < self.max_attempts:
+                logger.warning(
+                    f"⚠️ Group task {task['id']} failed (attempt {task['attempts']}), requeueing: {e}"
+                )
+                self.retried += 1
+            else:
+                logger.error(f"❌ Group task {task['id']} failed after {task['attempts']} attempts: {e}")
+                self.db.log_failure(job_id, "worker_error", str(e))
+                release_status = "failed"
+                self.failed += 1
+
+        finally:
+            heartbeat.cancel()
+            self.db.release_group_task(task["id"], self.worker_id, release_status)
+            # Progress is reported to clients by the API process, not from here
+            self.processor.events.discard(job_id)
+
+        if release_status != "queued":
+            final = self.db.finish_job_if_done(job_id)
+            if final:
+                logger.info(f"🏁 Job {job_id} {final}")
+
+
+async def run_worker(db_path: str, worker_id: str, concurrency: int):
+    """Run one worker until SIGINT/SIGTERM."""
+    worker = TaskWorker(db_path, worker_id, concurrency=concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: KeyboardInterrupt ends the process instead
+    await worker.run()
+
+
+def _process_main(db_path: str, name: str, index: int, concurrency: int):
+    """Entry point of a spawned worker process."""
+    worker_id = f"{socket.gethostname()}:{name}-{index}:{os.getpid()}"
+    try:
+        asyncio.run(run_worker(db_path, worker_id, concurrency))
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLV scrape worker (CLV_WORKER_MODE=queue)")
+    parser.add_argument("--db", default=DB_PATH, help="Result store shared with the API server")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes to start")
+    parser.add_argument(
+        "--concurrency", type=int, default=MAX_CONCURRENCY,
+        help="Group tasks (and scrape slots) per process",
+    )
+    parser.add_argument("--name", default="worker", help="Worker id prefix")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        _process_main(args.db, args.name, 0, args.concurrency)
+        return
+
+    # Spawn (not fork): each process gets its own event loop, browsers and connections
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(
+            target=_process_main,
+            args=(args.db, args.name, index, args.concurrency),
+            name=f"{args.name}-{index}",
+        )
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    logger.info(f"👷 Started {len(processes)} worker processes")
+
+    def interrupt(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, interrupt)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Ask every child to drain (SIGTERM), then wait out the drain deadline
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.time() + SHUTDOWN_DRAIN_SECONDS + 10
+        for process in processes:
+            process.join(timeout=max(0.0, deadline - time.time()))
+            if process.is_alive():
+                process.kill()
+
+
+if __name__ == "__main__":
+    main()